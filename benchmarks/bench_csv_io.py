@@ -0,0 +1,58 @@
+"""
+Compare read time of csv_default (CsvIO) and csv_arrow (ArrowCsvIO) backends.
+
+Usage: python benchmarks/bench_csv_io.py [--rows N] [--columns N] [--repeat N]
+Prints JSON with best read time (seconds) of each backend.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datasets import make_data_frame  # noqa: E402
+from dummy_synth.dataframe_io import ArrowCsvIO, CsvIO  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--columns", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "wide.csv")
+        make_data_frame(args.rows, args.columns, ("int", "float", "str")).to_csv(
+            path, index=False
+        )
+        schema_cache_dir = os.path.join(tmp_dir, "schemas")
+
+        results = {
+            "rows": args.rows,
+            "columns": args.columns,
+            "file_bytes": os.path.getsize(path),
+            "csv_default": min(
+                timeit.repeat(lambda: CsvIO().read(path), number=1, repeat=args.repeat)
+            ),
+            # first read infers types and fills the cache
+            "csv_arrow_inferred": timeit.timeit(
+                lambda: ArrowCsvIO(schema_cache_dir=schema_cache_dir).read(path),
+                number=1,
+            ),
+            "csv_arrow_cached_schema": min(
+                timeit.repeat(
+                    lambda: ArrowCsvIO(schema_cache_dir=schema_cache_dir).read(path),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            ),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Generator of synthetic datasets used by benchmarks.
+"""
+import os
+from typing import Dict, List, Sequence
+import numpy as np
+import pandas as pd
+
+DTYPES = ("int", "float", "str", "bool", "datetime")
+
+
+def make_data_frame(
+    rows: int, columns: int, dtypes: Sequence[str] = DTYPES, seed: int = 0
+) -> pd.DataFrame:
+    """
+    Return DataFrame with given number of rows and columns, column types cycle through dtypes.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        dtype = dtypes[i % len(dtypes)]
+        if dtype == "int":
+            data[f"int_{i}"] = rng.integers(0, 1_000_000, rows)
+        elif dtype == "float":
+            data[f"float_{i}"] = rng.normal(100, 15, rows)
+        elif dtype == "str":
+            data[f"str_{i}"] = rng.choice(
+                np.array([f"category_{j}" for j in range(50)]), rows
+            )
+        elif dtype == "bool":
+            data[f"bool_{i}"] = rng.random(rows) < 0.5
+        elif dtype == "datetime":
+            data[f"datetime_{i}"] = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+                rng.integers(0, 86400 * 365, rows), unit="s"
+            )
+        else:
+            raise Exception(f"Unsupported dtype {dtype}, use one of {DTYPES}.")
+    return pd.DataFrame(data)
+
+
+def write_data_frame(df: pd.DataFrame, path: str) -> None:
+    if path.endswith(".csv"):
+        df.to_csv(path, index=False)
+    elif path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        raise Exception(f"Unsupported file format of {path}.")
+
+
+def generate_dataset(
+    directory: str,
+    files: int,
+    rows: int,
+    columns: int,
+    dtypes: Sequence[str] = DTYPES,
+    formats: Sequence[str] = ("csv", "parquet"),
+    seed: int = 0,
+) -> Dict[str, List[str]]:
+    """
+    Write files (alternating formats, 10 files per subdirectory) to directory.
+
+    Return written paths grouped by format.
+    """
+    paths = {file_format: [] for file_format in formats}
+    for i in range(files):
+        file_format = formats[i % len(formats)]
+        subdirectory = os.path.join(directory, f"part_{i // 10}")
+        os.makedirs(subdirectory, exist_ok=True)
+        path = os.path.join(subdirectory, f"{i}.{file_format}")
+        write_data_frame(make_data_frame(rows, columns, dtypes, seed + i), path)
+        paths[file_format].append(path)
+    return paths
@@ -0,0 +1,366 @@
+"""
+Benchmark DataFrame IO backends, synthesizers, evaluators and end-to-end directory runs.
+
+Usage: python benchmarks/run_benchmarks.py [--rows N] [--columns N] [--files N] [--output results.json]
+                                           [--baseline baseline.json] [--tolerance 0.2] [--only io,process]
+                                           [--synthesizer NAME] [--evaluator NAME]
+Prints (or writes to --output) JSON with best time (seconds) of each benchmark.
+With --baseline, each result is compared with the same benchmark of baseline file
+and exit code is 1 if any of them is slower by more than tolerance.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datasets import DTYPES, generate_dataset, make_data_frame  # noqa: E402
+from dummy_synth import frames  # noqa: E402
+from dummy_synth.dataframe_io import (  # noqa: E402
+    ArrowCsvIO,
+    ArrowParquetIO,
+    CsvIO,
+    FeatherIO,
+    ParquetIO,
+    ParquetStreamIO,
+)
+from dummy_synth.evaluators import (  # noqa: E402
+    ConstantEvaluator,
+    RandomEvaluator,
+    SketchEvaluator,
+    StatisticalEvaluator,
+)
+from dummy_synth.processors import DirProcessor  # noqa: E402
+from dummy_synth.storages import LocalDirectoryStorage, S3Storage  # noqa: E402
+from dummy_synth.synthesizers import (  # noqa: E402
+    DummySynthesizer,
+    DummySynthesizerEmptyResult,
+    SamplingSynthesizer,
+)
+
+# backend name: (IO factory, file extension)
+IO_BACKENDS = {
+    "csv_default": (CsvIO, ".csv"),
+    "csv_arrow": (ArrowCsvIO, ".csv"),
+    "parquet_default": (ParquetIO, ".parquet"),
+    "parquet_stream": (ParquetStreamIO, ".parquet"),
+    "parquet_arrow": (ArrowParquetIO, ".parquet"),
+    "feather_default": (FeatherIO, ".arrow"),
+}
+SYNTHESIZERS = {
+    "DummySynthesizer": DummySynthesizer,
+    "DummySynthesizerEmptyResult": DummySynthesizerEmptyResult,
+    "SamplingSynthesizer": SamplingSynthesizer,
+}
+EVALUATORS = {
+    "RandomEvaluator": RandomEvaluator,
+    "ConstantEvaluator": ConstantEvaluator,
+    "StatisticalEvaluator": StatisticalEvaluator,
+    "SketchEvaluator": SketchEvaluator,
+}
+GROUPS = ("io", "synthesize", "evaluate", "process")
+
+
+def measure(fn: Callable[[], Any], repeat: int, setup: Optional[Callable] = None):
+    """
+    Return best and mean time of fn calls, setup (if given) is called before each of them untimed.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        times.append(timeit.timeit(fn, number=1))
+    return {"seconds": min(times), "mean_seconds": sum(times) / len(times)}
+
+
+def result(name: str, rows: int, timing: Dict[str, float], **extra) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "rows": rows,
+        **timing,
+        "rows_per_second": rows / timing["seconds"] if timing["seconds"] else None,
+        **extra,
+    }
+
+
+def bench_io(args: argparse.Namespace, tmp_dir: str) -> List[Dict[str, Any]]:
+    df = make_data_frame(args.rows, args.columns, args.dtypes)
+    results = []
+    for name, (io_factory, extension) in IO_BACKENDS.items():
+        kwargs = {}
+        if io_factory is ArrowCsvIO:
+            kwargs["schema_cache_dir"] = os.path.join(tmp_dir, "schemas")
+        dataframe_io = io_factory(**kwargs)
+        frame = frames.convert(df, dataframe_io.frame_type)
+        path = os.path.join(tmp_dir, f"{name}{extension}")
+        write = measure(lambda: dataframe_io.write(frame, path), args.repeat)
+        results.append(
+            result(f"io.{name}.write", args.rows, write, bytes=os.path.getsize(path))
+        )
+        read = measure(lambda: dataframe_io.read(path), args.repeat)
+        results.append(result(f"io.{name}.read", args.rows, read))
+    return results
+
+
+def bench_synthesizers(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    for frame_type in (frames.PANDAS, frames.ARROW):
+        frame = frames.convert(
+            make_data_frame(args.rows, args.columns, args.dtypes), frame_type
+        )
+        for name, synthesizer_class in SYNTHESIZERS.items():
+            synthesizer = synthesizer_class()
+            timing = measure(lambda: synthesizer.synthesize_frame(frame), args.repeat)
+            results.append(result(f"synthesize.{name}.{frame_type}", args.rows, timing))
+    return results
+
+
+def bench_evaluators(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    for frame_type in (frames.PANDAS, frames.ARROW):
+        ori_frame = frames.convert(
+            make_data_frame(args.rows, args.columns, args.dtypes), frame_type
+        )
+        syn_frame = frames.convert(
+            make_data_frame(args.rows, args.columns, args.dtypes, seed=1), frame_type
+        )
+        for name, evaluator_class in EVALUATORS.items():
+            evaluator = evaluator_class()
+            timing = measure(
+                lambda: evaluator.evaluate_frames(ori_frame, syn_frame), args.repeat
+            )
+            results.append(result(f"evaluate.{name}.{frame_type}", args.rows, timing))
+    return results
+
+
+def get_io_wrappers(**io_kwargs) -> Dict[str, Dict[str, Any]]:
+    return {
+        ".csv": {"read": CsvIO(**io_kwargs), "write": CsvIO(**io_kwargs)},
+        ".parquet": {"read": ParquetIO(**io_kwargs), "write": ParquetIO(**io_kwargs)},
+    }
+
+
+def get_processor(args: argparse.Namespace, directory: str, storage) -> DirProcessor:
+    return DirProcessor(
+        directory,
+        storage,
+        get_io_wrappers(
+            **({"storage_options": args.storage_options} if args.storage_options else {})
+        ),
+        overwrite=True,
+        synthesizer=SYNTHESIZERS[args.synthesizer](),
+        synthesize_suffix=".syn",
+        evaluator=EVALUATORS[args.evaluator](),
+        evaluate_suffix=".eval",
+        jobs=args.jobs,
+    )
+
+
+def bench_process(args: argparse.Namespace, tmp_dir: str) -> List[Dict[str, Any]]:
+    data_dir = os.path.join(tmp_dir, "data")
+    generate_dataset(data_dir, args.files, args.rows, args.columns, args.dtypes)
+    total_rows = args.files * args.rows
+
+    def clean_outputs():
+        for root, _, file_names in os.walk(data_dir):
+            for file_name in file_names:
+                if file_name.endswith((".syn", ".eval")):
+                    os.remove(os.path.join(root, file_name))
+
+    args.storage_options = None
+    timing = measure(
+        lambda: get_processor(args, data_dir, LocalDirectoryStorage()).process(),
+        args.repeat,
+        setup=clean_outputs,
+    )
+    results = [result("process.local", total_rows, timing, files=args.files)]
+
+    clean_outputs()
+    s3_result = bench_process_s3(args, data_dir, total_rows)
+    if s3_result is not None:
+        results.append(s3_result)
+    return results
+
+
+def bench_process_s3(
+    args: argparse.Namespace, data_dir: str, total_rows: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Run directory processing against moto S3 server (local S3 stand-in).
+    """
+    try:
+        import boto3
+        from moto.server import ThreadedMotoServer
+    except ImportError as e:
+        print(f"Skipping process.s3 benchmark: {e}", file=sys.stderr)
+        return None
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    # moto server logs every request
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = ThreadedMotoServer(port=args.s3_port, verbose=False)
+    server.start()
+    try:
+        endpoint_url = f"http://127.0.0.1:{args.s3_port}"
+        s3 = boto3.resource("s3", endpoint_url=endpoint_url)
+        bucket = s3.create_bucket(Bucket="benchmarks")
+
+        def upload_inputs():
+            bucket.objects.all().delete()
+            for root, _, file_names in os.walk(data_dir):
+                for file_name in file_names:
+                    path = os.path.join(root, file_name)
+                    key = "data/" + os.path.relpath(path, data_dir)
+                    bucket.upload_file(path, key)
+
+        args.storage_options = {"client_kwargs": {"endpoint_url": endpoint_url}}
+        timing = measure(
+            lambda: get_processor(
+                args, "data", S3Storage(s3, "benchmarks", args.s3_max_in_flight)
+            ).process(),
+            args.repeat,
+            setup=upload_inputs,
+        )
+    finally:
+        server.stop()
+    return result("process.s3", total_rows, timing, files=args.files)
+
+
+def compare_with_baseline(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """
+    Add baseline time and ratio to results, return names of results slower than baseline by more than tolerance.
+    """
+    baseline_seconds = {
+        item["name"]: item["seconds"] for item in baseline.get("results", [])
+    }
+    regressions = []
+    for item in results:
+        if item["name"] not in baseline_seconds:
+            continue
+        item["baseline_seconds"] = baseline_seconds[item["name"]]
+        item["ratio"] = (
+            item["seconds"] / item["baseline_seconds"]
+            if item["baseline_seconds"]
+            else None
+        )
+        if item["ratio"] is not None and item["ratio"] > 1 + tolerance:
+            regressions.append(item["name"])
+    return regressions
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows per file.")
+    parser.add_argument("--columns", type=int, default=20, help="Columns per file.")
+    parser.add_argument(
+        "--dtypes",
+        type=lambda value: value.split(","),
+        default=list(DTYPES),
+        help=f"Comma separated column types, default: {','.join(DTYPES)}.",
+    )
+    parser.add_argument(
+        "--files", type=int, default=10, help="Files used by process benchmarks."
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--s3-port", type=int, default=5055)
+    parser.add_argument("--s3-max-in-flight", type=int, default=16)
+    parser.add_argument(
+        "--synthesizer",
+        choices=list(SYNTHESIZERS),
+        default="DummySynthesizer",
+        help="Synthesizer used by process benchmarks, default: DummySynthesizer.",
+    )
+    parser.add_argument(
+        "--evaluator",
+        choices=list(EVALUATORS),
+        default="RandomEvaluator",
+        help="Evaluator used by process benchmarks, default: RandomEvaluator.",
+    )
+    parser.add_argument(
+        "--only",
+        type=lambda value: value.split(","),
+        default=list(GROUPS),
+        help=f"Comma separated benchmark groups to run, default: {','.join(GROUPS)}.",
+    )
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--baseline", help="JSON results of previous run.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown against baseline, default: 0.2 (20%%).",
+    )
+    return parser
+
+
+def main() -> int:
+    args = get_parser().parse_args()
+    unknown_groups = set(args.only) - set(GROUPS)
+    if unknown_groups:
+        raise Exception(f"Unknown benchmark groups {unknown_groups}, use {GROUPS}.")
+
+    tmp_dir = tempfile.mkdtemp(prefix="dummy_synth_bench_")
+    try:
+        results = []
+        if "io" in args.only:
+            results += bench_io(args, tmp_dir)
+        if "synthesize" in args.only:
+            results += bench_synthesizers(args)
+        if "evaluate" in args.only:
+            results += bench_evaluators(args)
+        if "process" in args.only:
+            results += bench_process(args, tmp_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    report = {
+        "params": {
+            "rows": args.rows,
+            "columns": args.columns,
+            "dtypes": args.dtypes,
+            "files": args.files,
+            "repeat": args.repeat,
+            "jobs": args.jobs,
+            "synthesizer": args.synthesizer,
+            "evaluator": args.evaluator,
+        },
+        "platform": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if regressions:
+        print(f"Slower than baseline: {', '.join(regressions)}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,24 @@
 import argparse
+from datetime import datetime
 from functools import partial
+from typing import Any, Dict, Optional
+from dummy_synth.caches import DiskCache
 from dummy_synth.config_utils import BackendType, Backends
 from dummy_synth.processors import DirProcessor
-from dummy_synth.synthesizers import AbstractSynthesizer
-from dummy_synth.evaluators import AbstractEvaluator
-import boto3
 from local_config import (
     RECURSIVE_DIR_PROCESSOR_CONFIG,
     DEFAULT_SYNTHESIZE_SUFFIX,
     DEFAULT_EVALUATE_SUFFIX,
+    DEFAULT_WORK_QUEUE,
 )
 from dummy_synth.config_utils import (
     prepare_processor_dataframe_io_config,
 )
+from dummy_synth.manifests import Manifest
+from dummy_synth.metrics import MetricsReport
+from dummy_synth.results import ResultsDataset
+from dummy_synth.scheduling import MemoryBudget
+from dummy_synth.storages import ListingFilter
 
 
 class CommandlineArgumentParserFactory:
@@ -26,8 +32,8 @@ class CommandlineArgumentParserFactory:
     def get_parser(
         cls,
         supported_backends: Backends,
-        default_synthesizer: AbstractSynthesizer,
-        default_evaluator: AbstractEvaluator,
+        default_synthesizer: str,
+        default_evaluator: str,
     ) -> argparse.ArgumentParser:
 
         parser_main = argparse.ArgumentParser(
@@ -53,6 +59,16 @@ class CommandlineArgumentParserFactory:
             supported_backends, default_synthesizer, subparsers
         )
 
+        # synthesize-evaluate
+        cls.setup_synthesize_evaluate_parser(
+            supported_backends, default_synthesizer, default_evaluator, subparsers
+        )
+
+        # synthesize-evaluate-s3
+        cls.setup_synthesize_evaluate_s3_parser(
+            supported_backends, default_synthesizer, default_evaluator, subparsers
+        )
+
         return parser_main
 
     @classmethod
@@ -62,19 +78,49 @@ class CommandlineArgumentParserFactory:
         processor_kwargs = {
             "directory": args.dir,
             "overwrite": args.overwrite,
+            "jobs": args.jobs,
+            "executor": args.executor,
         }
+        if args.manifest:
+            processor_kwargs["manifest"] = Manifest(args.manifest)
+        if args.metrics_out:
+            processor_kwargs["metrics_report"] = MetricsReport(args.metrics_out)
+        processor_kwargs["listing_filter"] = ListingFilter(
+            include=args.include,
+            exclude=args.exclude,
+            min_size=args.min_size,
+            max_size=args.max_size,
+            modified_after=args.modified_after,
+            modified_before=args.modified_before,
+        )
+        if args.queue:
+            processor_kwargs["work_queue"] = backends.get_backed_instance(
+                BackendType.QUEUE,
+                args.queue_backend,
+                args.queue,
+                args.queue_lease,
+                args.queue_max_attempts,
+            )
+        processor_kwargs["plan"] = args.plan
+        processor_kwargs["watch_seconds"] = args.watch
+        if args.memory_budget is not None:
+            processor_kwargs["memory_budget"] = MemoryBudget(
+                args.memory_budget * 1024 * 1024
+            )
+        if "chunk_rows" in args:
+            processor_kwargs["chunk_rows"] = args.chunk_rows
         if "synthesizer" in args:
             processor_kwargs["synthesizer"] = backends.get_backed_instance(
-                BackendType.SYNTHESIZER, args.synthesizer
+                BackendType.SYNTHESIZER,
+                args.synthesizer,
+                **cls.get_sampling_kwargs(backends, args),
             )
             processor_kwargs["synthesize_suffix"] = (
                 args.synthesize_suffix or DEFAULT_SYNTHESIZE_SUFFIX
             )
 
         if "evaluator" in args:
-            processor_kwargs["evaluator"] = backends.get_backed_instance(
-                BackendType.EVALUATOR, args.evaluator
-            )
+            processor_kwargs["evaluator"] = cls.get_evaluator(backends, args)
             processor_kwargs["synthesize_suffix"] = (
                 args.synthesize_suffix or DEFAULT_SYNTHESIZE_SUFFIX
             )
@@ -83,6 +129,59 @@ class CommandlineArgumentParserFactory:
             )
         return processor_kwargs
 
+    @classmethod
+    def get_results_dataset(
+        cls, args: argparse.Namespace, storage_prefix: str = ""
+    ) -> Optional[ResultsDataset]:
+        """
+        Return dataset given by --results-dataset, None if not given.
+        """
+        if not getattr(args, "results_dataset", None):
+            return None
+        return ResultsDataset(
+            storage_prefix + args.results_dataset, args.results_batch_rows
+        )
+
+    @classmethod
+    def get_evaluator(cls, backends: Backends, args: argparse.Namespace) -> Any:
+        """
+        Return evaluator given by --evaluator, evaluators given by repeated --evaluator
+        are combined, so each file is read once for all of them.
+        """
+        names = list(dict.fromkeys(args.evaluator or [args.default_evaluator]))
+        if len(names) == 1:
+            return backends.get_backed_instance(BackendType.EVALUATOR, names[0])
+        from dummy_synth.evaluators import CombinedEvaluator
+
+        return CombinedEvaluator(
+            {
+                name: backends.get_backed_instance(BackendType.EVALUATOR, name)
+                for name in names
+            }
+        )
+
+    @classmethod
+    def get_sampling_kwargs(
+        cls, backends: Backends, args: argparse.Namespace
+    ) -> Dict[str, Any]:
+        """
+        Return --rows, --rows-ratio and --seed given on command line as synthesizer kwargs.
+        """
+        sampling_kwargs = {
+            name: getattr(args, name)
+            for name in ("rows", "rows_ratio", "seed")
+            if getattr(args, name, None) is not None
+        }
+        if sampling_kwargs and not getattr(
+            backends.get_backend_class(BackendType.SYNTHESIZER, args.synthesizer),
+            "sampling",
+            False,
+        ):
+            raise Exception(
+                f"Synthesizer {args.synthesizer} doesn't support --rows, --rows-ratio and --seed."
+            )
+        return sampling_kwargs
+
     @classmethod
     def get_local_dir_processor(
         cls, backends: Backends, args: argparse.Namespace
@@ -94,17 +193,31 @@ class CommandlineArgumentParserFactory:
         processor_kwargs["io_wrappers"] = prepare_processor_dataframe_io_config(
             backends, RECURSIVE_DIR_PROCESSOR_CONFIG
         )
+        processor_kwargs["results_dataset"] = cls.get_results_dataset(args)
         return DirProcessor(**processor_kwargs)
 
     @classmethod
     def get_s3_dir_processor(
         cls, backends: Backends, args: argparse.Namespace
     ) -> DirProcessor:
+        # boto3 takes long to import, local commands don't need it
+        import boto3
+
         s3_endpoint_config = {"endpoint_url": args.s3_endpoint_url}
         s3 = boto3.resource("s3", **s3_endpoint_config)
         processor_kwargs = cls.get_basic_processor_kwargs(backends, args)
         processor_kwargs["storage"] = backends.get_backed_instance(
-            BackendType.STORAGE, "S3Storage", s3, args.s3_bucket
+            BackendType.STORAGE,
+            "S3Storage",
+            s3,
+            args.s3_bucket,
+            args.s3_max_in_flight or None,
+            args.s3_part_size * 1024 * 1024,
+            (
+                DiskCache(args.s3_cache_dir, args.s3_cache_size * 1024 * 1024)
+                if args.s3_cache_dir
+                else None
+            ),
         )
         processor_kwargs["io_wrappers"] = prepare_processor_dataframe_io_config(
             backends,
@@ -114,6 +227,10 @@ class CommandlineArgumentParserFactory:
                 "client_kwargs": s3_endpoint_config,
             },
         )
+        # dataset is stored in the same bucket as data
+        processor_kwargs["results_dataset"] = cls.get_results_dataset(
+            args, f"s3://{args.s3_bucket}/"
+        )
         return DirProcessor(**processor_kwargs)
 
     @classmethod
@@ -125,6 +242,17 @@ class CommandlineArgumentParserFactory:
             help="verbose debugging output",
         )
 
+    @classmethod
+    def add_metrics(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "--metrics-out",
+            help="write JSON lines report with wall time, rows, bytes and peak memory of each stage of each file to this file",
+        )
+        parser.add_argument(
+            "--profile",
+            help="dump cProfile stats of the whole run to this file (worker processes are not profiled)",
+        )
+
     @classmethod
     def add_overwrite(cls, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
@@ -134,6 +262,114 @@ class CommandlineArgumentParserFactory:
             help="overwrite output files if exist (default is not overwrite)",
         )
 
+    @classmethod
+    def add_jobs(cls, parser: argparse.ArgumentParser, default_executor: str) -> None:
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help="number of files processed in parallel (default: 1)",
+        )
+        parser.add_argument(
+            "--executor",
+            choices=DirProcessor.EXECUTORS,
+            default=default_executor,
+            help=f"worker pool used when jobs > 1: process for CPU-bound, thread for I/O-bound work (default: {default_executor})",
+        )
+        parser.add_argument(
+            "--memory-budget",
+            type=int,
+            help="MiB of memory for data of files processed at once (estimated from file size and format), files not fitting in it are processed in chunks",
+        )
+
+    @classmethod
+    def add_manifest(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "--manifest",
+            help="incremental mode: skip files unchanged since recorded in this local manifest file, reprocess new/changed ones and record them",
+        )
+
+    @classmethod
+    def add_queue(
+        cls, parser: argparse.ArgumentParser, supported_backends: Backends
+    ) -> None:
+        parser.add_argument(
+            "--queue",
+            help="distributed mode: process files claimed from this work queue (e.g. SQLite file on shared filesystem), run any number of workers with the same command",
+        )
+        parser.add_argument(
+            "--plan",
+            action="store_true",
+            default=False,
+            help="list dir once and add files to --queue, without processing them",
+        )
+        parser.add_argument(
+            "--queue-backend",
+            choices=supported_backends.get_supported_backends(BackendType.QUEUE),
+            default=DEFAULT_WORK_QUEUE,
+            help=f"work queue name (default: {DEFAULT_WORK_QUEUE})",
+        )
+        parser.add_argument(
+            "--queue-lease",
+            type=float,
+            default=1800,
+            help="seconds a worker may hold a file before other workers retry it, must be more than processing of any file takes (default: 1800)",
+        )
+        parser.add_argument(
+            "--queue-max-attempts",
+            type=int,
+            default=3,
+            help="file is marked failed after this many attempts (default: 3)",
+        )
+
+    @classmethod
+    def add_watch(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "--watch",
+            nargs="?",
+            type=float,
+            const=5.0,
+            metavar="SECONDS",
+            help="after processing dir keep watching it (until Ctrl+C) and process new/changed files once they haven't changed for SECONDS (default: 5), outputs of changed files are overwritten",
+        )
+
+    @classmethod
+    def add_listing_filter(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "--include",
+            action="append",
+            help="process only files with path (relative to dir) matching this glob, may be repeated",
+        )
+        parser.add_argument(
+            "--exclude",
+            action="append",
+            help="skip files with path (relative to dir) matching this glob, may be repeated, directories excluded by 'subdir/*' are not listed at all",
+        )
+        parser.add_argument(
+            "--min-size", type=int, help="skip files smaller than this many bytes"
+        )
+        parser.add_argument(
+            "--max-size", type=int, help="skip files bigger than this many bytes"
+        )
+        parser.add_argument(
+            "--modified-after",
+            type=parse_timestamp,
+            help="skip files last modified before this ISO date/time (e.g. 2024-01-31 or 2024-01-31T12:00:00+00:00)",
+        )
+        parser.add_argument(
+            "--modified-before",
+            type=parse_timestamp,
+            help="skip files last modified at or after this ISO date/time",
+        )
+
+    @classmethod
+    def add_chunk_rows(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "--chunk-rows",
+            type=int,
+            help="read, synthesize and write files in chunks of this many rows to keep memory bounded (default: whole file at once)",
+        )
+
     @classmethod
     def add_synthesize_suffix(cls, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
@@ -146,7 +382,7 @@ class CommandlineArgumentParserFactory:
         cls,
         parser: argparse.ArgumentParser,
         supported_backends: Backends,
-        default_synthesizer: AbstractSynthesizer,
+        default_synthesizer: str,
     ) -> None:
         parser.add_argument(
             "--synthesizer",
@@ -155,6 +391,24 @@ class CommandlineArgumentParserFactory:
             default=default_synthesizer,
         )
 
+    @classmethod
+    def add_sampling(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "--rows",
+            type=int,
+            help="number of synthesized rows of each file, for sampling synthesizers (default: same as original file)",
+        )
+        parser.add_argument(
+            "--rows-ratio",
+            type=float,
+            help="number of synthesized rows of each file relative to original file, for sampling synthesizers (default: 1.0)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            help="random seed of sampling synthesizers, same seed and data give same result (default: 0)",
+        )
+
     @classmethod
     def add_evaluate_suffix(cls, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
@@ -162,19 +416,34 @@ class CommandlineArgumentParserFactory:
             help="use this suffix when writing evaluate file",
         )
 
+    @classmethod
+    def add_results_dataset(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "--results-dataset",
+            help="append evaluation rows of all files to Parquet dataset in this directory (S3 prefix for S3 commands), partitioned by evaluator, instead of writing evaluate files",
+        )
+        parser.add_argument(
+            "--results-batch-rows",
+            type=int,
+            default=100000,
+            help="rows buffered before they're written to --results-dataset as new part file (default: 100000)",
+        )
+
     @classmethod
     def add_evaluator(
         cls,
         parser: argparse.ArgumentParser,
         supported_backends: Backends,
-        default_evaluator: AbstractEvaluator,
+        default_evaluator: str,
     ) -> None:
         parser.add_argument(
             "--evaluator",
+            action="append",
             choices=supported_backends.get_supported_backends(BackendType.EVALUATOR),
-            help=f"evaluator name (default: {default_evaluator})",
-            default=default_evaluator,
+            help=f"evaluator name, repeat to run more evaluators in one pass with results in one file (default: {default_evaluator})",
         )
+        # append action would add given evaluators to default one
+        parser.set_defaults(default_evaluator=default_evaluator)
 
     @classmethod
     def add_dir(cls, parser: argparse.ArgumentParser) -> None:
@@ -187,6 +456,31 @@ class CommandlineArgumentParserFactory:
             help="use this if you want to connect with self-hosted S3 service (localstack, MinIO)",
         )
 
+    @classmethod
+    def add_s3_max_in_flight(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument(
+            "--s3-max-in-flight",
+            type=int,
+            default=16,
+            help="max number of concurrent S3 downloads/uploads, 0 means read/write objects one by one (default: 16)",
+        )
+        parser.add_argument(
+            "--s3-part-size",
+            type=int,
+            default=8,
+            help="outputs are uploaded while being written, in multipart upload parts of this many MiB, at least 5 (default: 8)",
+        )
+        parser.add_argument(
+            "--s3-cache-dir",
+            help="keep downloaded inputs in this local directory, unchanged objects (same ETag) are read from it in later runs",
+        )
+        parser.add_argument(
+            "--s3-cache-size",
+            type=int,
+            default=10240,
+            help="max size of --s3-cache-dir in MiB, least recently used objects are removed first (default: 10240)",
+        )
+
     @classmethod
     def add_s3_bucket(cls, parser: argparse.ArgumentParser) -> None:
         parser.add_argument("s3_bucket", help="S3 bucket")
@@ -195,7 +489,7 @@ class CommandlineArgumentParserFactory:
     def setup_synthezise_parser(
         cls,
         supported_backends: Backends,
-        default_synthesizer: AbstractSynthesizer,
+        default_synthesizer: str,
         subparsers: argparse._SubParsersAction,
     ) -> None:
         parser = subparsers.add_parser(
@@ -209,16 +503,24 @@ class CommandlineArgumentParserFactory:
             get_processor=partial(cls.get_local_dir_processor, supported_backends)
         )
         cls.add_debug(parser)
+        cls.add_metrics(parser)
         cls.add_overwrite(parser)
+        cls.add_manifest(parser)
+        cls.add_listing_filter(parser)
+        cls.add_queue(parser, supported_backends)
+        cls.add_watch(parser)
+        cls.add_jobs(parser, DirProcessor.EXECUTOR_PROCESS)
+        cls.add_chunk_rows(parser)
         cls.add_synthesize_suffix(parser)
         cls.add_synthesizer(parser, supported_backends, default_synthesizer)
+        cls.add_sampling(parser)
         cls.add_dir(parser)
 
     @classmethod
     def setup_synthezise_s3_parser(
         cls,
         supported_backends: Backends,
-        default_synthesizer: AbstractSynthesizer,
+        default_synthesizer: str,
         subparsers: argparse._SubParsersAction,
     ) -> None:
         parser = subparsers.add_parser(
@@ -234,10 +536,19 @@ class CommandlineArgumentParserFactory:
             get_processor=partial(cls.get_s3_dir_processor, supported_backends)
         )
         cls.add_debug(parser)
+        cls.add_metrics(parser)
         cls.add_overwrite(parser)
+        cls.add_manifest(parser)
+        cls.add_listing_filter(parser)
+        cls.add_queue(parser, supported_backends)
+        cls.add_watch(parser)
+        cls.add_jobs(parser, DirProcessor.EXECUTOR_THREAD)
+        cls.add_chunk_rows(parser)
         cls.add_synthesize_suffix(parser)
         cls.add_synthesizer(parser, supported_backends, default_synthesizer)
+        cls.add_sampling(parser)
         cls.add_s3_endpoint_url(parser)
+        cls.add_s3_max_in_flight(parser)
         cls.add_s3_bucket(parser)
         cls.add_dir(parser)
 
@@ -245,7 +556,7 @@ class CommandlineArgumentParserFactory:
     def setup_evaluate_parser(
         cls,
         supported_backends: Backends,
-        default_evaluator: AbstractEvaluator,
+        default_evaluator: str,
         subparsers: argparse._SubParsersAction,
     ) -> None:
         parser = subparsers.add_parser(
@@ -260,8 +571,102 @@ class CommandlineArgumentParserFactory:
             get_processor=partial(cls.get_local_dir_processor, supported_backends)
         )
         cls.add_debug(parser)
+        cls.add_metrics(parser)
         cls.add_overwrite(parser)
+        cls.add_manifest(parser)
+        cls.add_listing_filter(parser)
+        cls.add_queue(parser, supported_backends)
+        cls.add_watch(parser)
+        cls.add_jobs(parser, DirProcessor.EXECUTOR_PROCESS)
         cls.add_synthesize_suffix(parser)
         cls.add_evaluate_suffix(parser)
+        cls.add_results_dataset(parser)
         cls.add_evaluator(parser, supported_backends, default_evaluator)
         cls.add_dir(parser)
+
+    @classmethod
+    def setup_synthesize_evaluate_parser(
+        cls,
+        supported_backends: Backends,
+        default_synthesizer: str,
+        default_evaluator: str,
+        subparsers: argparse._SubParsersAction,
+    ) -> None:
+        parser = subparsers.add_parser(
+            "synthesize-evaluate",
+            description=f"""
+                Run synthesize and evaluate on files in local dir in single pass.
+                Each file is read once and synthesized data is evaluated without reading it back.
+                {cls.output_description}
+                """,
+        )
+        parser.set_defaults(
+            get_processor=partial(cls.get_local_dir_processor, supported_backends)
+        )
+        cls.add_debug(parser)
+        cls.add_metrics(parser)
+        cls.add_overwrite(parser)
+        cls.add_manifest(parser)
+        cls.add_listing_filter(parser)
+        cls.add_queue(parser, supported_backends)
+        cls.add_watch(parser)
+        cls.add_jobs(parser, DirProcessor.EXECUTOR_PROCESS)
+        cls.add_chunk_rows(parser)
+        cls.add_synthesize_suffix(parser)
+        cls.add_synthesizer(parser, supported_backends, default_synthesizer)
+        cls.add_sampling(parser)
+        cls.add_evaluate_suffix(parser)
+        cls.add_results_dataset(parser)
+        cls.add_evaluator(parser, supported_backends, default_evaluator)
+        cls.add_dir(parser)
+
+    @classmethod
+    def setup_synthesize_evaluate_s3_parser(
+        cls,
+        supported_backends: Backends,
+        default_synthesizer: str,
+        default_evaluator: str,
+        subparsers: argparse._SubParsersAction,
+    ) -> None:
+        parser = subparsers.add_parser(
+            "synthesize-evaluate-s3",
+            description=f"""
+                Run synthesize and evaluate on files from S3 bucket in single pass.
+                Each object is read once and synthesized data is evaluated without reading it back.
+                {cls.output_description}
+                For credentials use AWS_SECRET_ACCESS_KEY and AWS_ACCESS_KEY_ID env variables.
+                For AWS region use AWS_DEFAULT_REGION env variable.
+                """,
+        )
+        parser.set_defaults(
+            get_processor=partial(cls.get_s3_dir_processor, supported_backends)
+        )
+        cls.add_debug(parser)
+        cls.add_metrics(parser)
+        cls.add_overwrite(parser)
+        cls.add_manifest(parser)
+        cls.add_listing_filter(parser)
+        cls.add_queue(parser, supported_backends)
+        cls.add_watch(parser)
+        cls.add_jobs(parser, DirProcessor.EXECUTOR_THREAD)
+        cls.add_chunk_rows(parser)
+        cls.add_synthesize_suffix(parser)
+        cls.add_synthesizer(parser, supported_backends, default_synthesizer)
+        cls.add_sampling(parser)
+        cls.add_evaluate_suffix(parser)
+        cls.add_results_dataset(parser)
+        cls.add_evaluator(parser, supported_backends, default_evaluator)
+        cls.add_s3_endpoint_url(parser)
+        cls.add_s3_max_in_flight(parser)
+        cls.add_s3_bucket(parser)
+        cls.add_dir(parser)
+
+
+def parse_timestamp(value: str) -> float:
+    """
+    Return Unix timestamp of ISO date/time (local time if no timezone is given).
+    """
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid ISO date/time {value}.")
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+from typing import Dict, Optional
+
+"""
+Local disk cache of remote input files.
+"""
+
+
+class DiskCache:
+    """
+    Files (bytes) keyed by string, stored in local directory with total size capped
+    at max_bytes, least recently used files are evicted first.
+
+    Last use of entry is its mtime, so cache directory can be shared
+    by parallel workers and by later runs. Keys must change when content changes
+    (e.g. include ETag of S3 object).
+
+    Directory is scanned on first put and then only when size of entries put since
+    makes it exceed max_bytes, eviction then goes down to LOW_WATER of max_bytes,
+    so puts near the cap don't scan it each time. Entries put by other workers are
+    counted when directory is scanned, so cache may exceed max_bytes until then.
+    """
+
+    TMP_SUFFIX = ".tmp"
+    LOW_WATER = 0.9
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # size of entries when directory was last scanned plus size of entries put since
+        self.size: Optional[int] = None
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {"directory": self.directory, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["directory"], state["max_bytes"])
+
+    def get_entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest())
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.get_entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # mark entry as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            # missing, or evicted by other worker meanwhile
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.get_entry_path(key)
+        # entries may be written by parallel workers, so replace them atomically
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}{self.TMP_SUFFIX}"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self.lock:
+            if self.size is not None:
+                self.size += len(data)
+            scan = self.size is None or self.size > self.max_bytes
+        if scan:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Scan directory and if cache doesn't fit in max_bytes,
+        remove least recently used entries until it fits in LOW_WATER of max_bytes.
+        """
+        entries = []
+        with os.scandir(self.directory) as dir_entries:
+            for entry in dir_entries:
+                if entry.name.endswith(self.TMP_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.LOW_WATER if total > self.max_bytes else total
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self.lock:
+                self.evictions += 1
+        with self.lock:
+            self.size = total
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
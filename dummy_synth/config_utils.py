@@ -1,3 +1,4 @@
+import importlib
 from copy import deepcopy
 from enum import Enum
 from typing import Any, Dict, List
@@ -8,16 +9,21 @@ class BackendType(Enum):
     STORAGE = "storage"
     SYNTHESIZER = "synthesizer"
     EVALUATOR = "evaluator"
+    QUEUE = "queue"
 
 
 class Backends:
     """
     Utility class that handles instantiation of backends of different types.
 
+    Backends are given as classes or as dotted import paths of classes,
+    the latter are imported only when backend is instantiated first time
+    (so e.g. boto3 isn't imported unless S3 storage is used).
+
     Here's example of constructor args:
     backends = Backends({
         BackendType.DATAFRAME_IO: {
-            "csv_default": CsvIO,
+            "csv_default": "dummy_synth.dataframe_io.CsvIO",
             "parquet_default": ParquetIO,
         },
         BackendType.STORAGE: {
@@ -42,6 +48,13 @@ class Backends:
     def get_supported_backends(self, backend_type: BackendType) -> List[str]:
         return self.backends[backend_type].keys()
 
+    def get_backend_class(self, backend_type: BackendType, backend_name: str) -> Any:
+        backend_class = self.backends[backend_type][backend_name]
+        if isinstance(backend_class, str):
+            backend_class = import_object(backend_class)
+            self.backends[backend_type][backend_name] = backend_class
+        return backend_class
+
     def get_backed_instance(
         self,
         backend_type: BackendType,
@@ -49,7 +62,7 @@ class Backends:
         *backend_args,
         **backend_kwargs
     ) -> Any:
-        backend_class = self.backends[backend_type][backend_name]
+        backend_class = self.get_backend_class(backend_type, backend_name)
         if backend_class is None:
             return None
         return backend_class(*backend_args, **backend_kwargs)
@@ -58,6 +71,19 @@ class Backends:
         return self.backends[backend_type]
 
 
+def import_object(path: str) -> Any:
+    """
+    Return object (e.g. class) given by dotted import path, like "dummy_synth.dataframe_io.CsvIO".
+    """
+    module_name, _, object_name = path.rpartition(".")
+    if not module_name:
+        raise Exception(f"Expected dotted import path, got {path}.")
+    try:
+        return getattr(importlib.import_module(module_name), object_name)
+    except (ImportError, AttributeError) as e:
+        raise Exception(f"Cannot import {path}: {e}")
+
+
 def prepare_processor_dataframe_io_config(
     backends: Backends,
     config: Dict[str, Dict[str, str]],
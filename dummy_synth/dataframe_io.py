@@ -1,40 +1,621 @@
+import base64
+import hashlib
+import json
+import os
+import queue
+import threading
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Union
 import pandas as pd
+from dummy_synth import frames
+
+# path/URL or file object (e.g. BytesIO with data downloaded by storage)
+Target = Union[str, IO]
+
+
+def open_target(
+    target: Target, mode: str, storage_options: Optional[dict] = None
+) -> IO:
+    """
+    Open local path or remote URL (e.g. s3://bucket/key) as file object.
+    File objects are returned as they are and are not closed on exit.
+    """
+    if not isinstance(target, str):
+        return nullcontext(target)
+    if "://" in target:
+        import fsspec
+
+        return fsspec.open(target, mode, **(storage_options or {})).open()
+    return open(target, mode, **({"newline": ""} if "b" not in mode else {}))
+
+
+def read_ahead(items: Iterable, depth: int = 1) -> Iterator:
+    """
+    Iterate items, while producing up to depth next items in background thread.
+
+    Used to decode next chunk while current one is being processed.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    finished = object()
+    stopped = threading.Event()
+
+    def put(item, error=None) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put((item, error), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except Exception as e:
+            put(finished, e)
+            return
+        put(finished)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is finished:
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+def get_io_kwargs(target: Target, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return pandas IO kwargs suitable for target, storage options apply to paths/URLs only.
+    """
+    if isinstance(target, str):
+        return kwargs
+    return {key: value for key, value in kwargs.items() if key != "storage_options"}
 
 
 class AbstractDataFrameIO(ABC):
+    # if True, DirProcessor always uses read_chunks()/write_chunks() with this backend
+    streaming = False
+    # type of frames returned by read and expected by write, frames.PANDAS or frames.ARROW
+    frame_type = frames.PANDAS
+    # backends with the same file format can read files written by each other
+    file_format: Optional[str] = None
+    # memory of frame read whole relative to file size, see estimate_memory()
+    memory_factor = 1.0
+
     @abstractmethod
-    def read(self, source: str, **kwargs) -> pd.DataFrame:
+    def read(self, source: Target, **kwargs) -> pd.DataFrame:
         """Read source into DataFrame"""
         raise NotImplementedError()
 
     @abstractmethod
-    def write(self, df: pd.DataFrame, target: str, **kwargs) -> None:
+    def write(self, df: pd.DataFrame, target: Target, **kwargs) -> None:
         """Write DataFrame to target"""
         raise NotImplementedError()
 
+    def estimate_memory(self, source: Target, size: int) -> int:
+        """
+        Return estimated memory (bytes) of frame read whole from source of given size.
+        """
+        return int(size * self.memory_factor)
+
+    def read_chunks(
+        self, source: str, chunk_rows: Optional[int]
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Read source as DataFrames of at most chunk_rows rows.
+        If chunk_rows is None, backend picks natural chunk size of the format.
+
+        Default implementation reads whole source at once,
+        override it to keep memory bounded.
+        """
+        yield self.read(source)
+
+    def write_chunks(self, chunks: Iterable[pd.DataFrame], target: Target) -> None:
+        """
+        Write DataFrame chunks to target as single file.
+
+        Default implementation concatenates all chunks in memory,
+        override it to keep memory bounded.
+        """
+        chunks = list(chunks)
+        self.write(pd.concat(chunks) if chunks else pd.DataFrame(), target)
+
 
 class CsvIO(AbstractDataFrameIO):
     """Input/ouput from a csv file."""
 
+    file_format = "csv"
+    # strings become Python objects, several times bigger than their text
+    memory_factor = 5.0
+    # chunk size of read_chunks() when chunk_rows is not given
+    DEFAULT_CHUNK_ROWS = 100_000
+
     def __init__(self, **kwargs):
         self.kwargs = kwargs
 
-    def read(self, source: str) -> pd.DataFrame:
-        return pd.read_csv(source, **self.kwargs)
+    def read(self, source: Target) -> pd.DataFrame:
+        return pd.read_csv(source, **get_io_kwargs(source, self.kwargs))
+
+    def write(self, df: pd.DataFrame, target: Target) -> None:
+        df.to_csv(target, index=False, **get_io_kwargs(target, self.kwargs))
+
+    def read_chunks(
+        self, source: Target, chunk_rows: Optional[int]
+    ) -> Iterator[pd.DataFrame]:
+        with pd.read_csv(
+            source,
+            chunksize=chunk_rows or self.DEFAULT_CHUNK_ROWS,
+            **get_io_kwargs(source, self.kwargs),
+        ) as reader:
+            yield from reader
+
+    def write_chunks(self, chunks: Iterable[pd.DataFrame], target: Target) -> None:
+        """
+        Append chunks to target as they come, header is written with first chunk only.
+        """
+        kwargs = dict(self.kwargs)
+        storage_options = kwargs.pop("storage_options", None)
+        with open_target(target, "wb", storage_options) as f:
+            header = True
+            for chunk in chunks:
+                chunk.to_csv(f, index=False, header=header, **kwargs)
+                header = False
+            if header:
+                # no chunks at all, write empty file same as write() does for empty DataFrame
+                pd.DataFrame().to_csv(f, index=False, **kwargs)
+
+
+class SchemaCache:
+    """
+    Arrow schemas of CSV files stored in local directory, one file per CSV path.
+
+    For local files, size & mtime are stored along with schema
+    and schema is used only if file didn't change since.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def get_entry_path(self, path: str) -> str:
+        return os.path.join(
+            self.directory, hashlib.sha1(path.encode()).hexdigest() + ".json"
+        )
+
+    @staticmethod
+    def get_file_info(path: str) -> Optional[List[int]]:
+        if "://" in path:
+            return None
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def get(self, path: str):
+        import pyarrow as pa
+
+        try:
+            with open(self.get_entry_path(path)) as f:
+                entry = json.load(f)
+            if entry["path"] != path or entry["info"] != self.get_file_info(path):
+                return None
+            return pa.ipc.read_schema(pa.py_buffer(base64.b64decode(entry["schema"])))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, path: str, schema) -> None:
+        entry = {
+            "path": path,
+            "info": self.get_file_info(path),
+            "schema": base64.b64encode(schema.serialize().to_pybytes()).decode(),
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        entry_path = self.get_entry_path(path)
+        # entries may be written by parallel workers, so replace them atomically
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
+
+
+class ArrowCsvIO(CsvIO):
+    """
+    Input/ouput from a csv file, parsed by multithreaded pyarrow CSV reader.
+
+    Column types inferred when file is read (or written) are cached in schema_cache_dir,
+    so later reads of the same file skip type inference.
+    Files are written by pandas, same as by CsvIO.
+
+    Only pandas kwargs with pyarrow reader counterpart are accepted (see READ_OPTIONS).
+    """
+
+    DEFAULT_SCHEMA_CACHE_DIR = os.path.join(
+        os.path.expanduser("~"), ".cache", "dummy_synth", "csv_schemas"
+    )
+    # pandas kwargs -> (pyarrow options class name, option name)
+    READ_OPTIONS = {
+        "sep": ("ParseOptions", "delimiter"),
+        "delimiter": ("ParseOptions", "delimiter"),
+        "quotechar": ("ParseOptions", "quote_char"),
+        "doublequote": ("ParseOptions", "double_quote"),
+        "escapechar": ("ParseOptions", "escape_char"),
+        "encoding": ("ReadOptions", "encoding"),
+        "storage_options": None,
+    }
+
+    def __init__(self, schema_cache_dir: Optional[str] = None, **kwargs):
+        unsupported = sorted(set(kwargs) - set(self.READ_OPTIONS))
+        if unsupported:
+            raise Exception(
+                f"Unsupported arguments of pyarrow CSV reader: {', '.join(unsupported)}."
+            )
+        super().__init__(**kwargs)
+        self.storage_options = kwargs.get("storage_options")
+        self.schema_cache = SchemaCache(schema_cache_dir or self.DEFAULT_SCHEMA_CACHE_DIR)
+
+    def get_reader_options(self, schema=None) -> Dict[str, Any]:
+        """
+        Return pyarrow CSV reader options (kwargs of read_csv/open_csv) given by kwargs.
+        """
+        import pyarrow.csv as pa_csv
+
+        options = {"ParseOptions": {}, "ReadOptions": {}}
+        for key, value in self.kwargs.items():
+            if self.READ_OPTIONS[key] is not None:
+                options_class, option = self.READ_OPTIONS[key]
+                options[options_class][option] = value
+        return {
+            "parse_options": pa_csv.ParseOptions(**options["ParseOptions"]),
+            "read_options": pa_csv.ReadOptions(**options["ReadOptions"]),
+            "convert_options": pa_csv.ConvertOptions(column_types=schema or {}),
+        }
+
+    def read(self, source: Target) -> pd.DataFrame:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+
+        schema = self.schema_cache.get(source) if isinstance(source, str) else None
+        if schema is not None:
+            try:
+                with open_target(source, "rb", self.storage_options) as f:
+                    return pa_csv.read_csv(f, **self.get_reader_options(schema)).to_pandas()
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # file content doesn't match cached schema anymore
+                if not isinstance(source, str):
+                    source.seek(0)
+        with open_target(source, "rb", self.storage_options) as f:
+            table = pa_csv.read_csv(f, **self.get_reader_options())
+        if isinstance(source, str):
+            self.schema_cache.set(source, table.schema)
+        return table.to_pandas()
+
+    def write(self, df: pd.DataFrame, target: Target) -> None:
+        super().write(df, target)
+        self.cache_schema_of(df, target)
+
+    def read_chunks(
+        self, source: Target, chunk_rows: Optional[int]
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Read source batch by batch. Column types are inferred from first batch only
+        (if schema isn't cached), so if later batch doesn't match them
+        (e.g. int column with float value further in file),
+        rest of source is read by pandas, same as by CsvIO.
+        """
+        import pyarrow as pa
+
+        chunks = self.read_arrow_chunks(source, chunk_rows)
+        rows = 0
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                break
+            rows += len(chunk)
+            yield chunk
+        if not isinstance(source, str):
+            source.seek(0)
+        with pd.read_csv(
+            source,
+            chunksize=chunk_rows or self.DEFAULT_CHUNK_ROWS,
+            # header is kept, rows already read are skipped
+            skiprows=lambda i: 0 < i <= rows,
+            **get_io_kwargs(source, self.kwargs),
+        ) as reader:
+            yield from reader
+
+    def read_arrow_chunks(
+        self, source: Target, chunk_rows: Optional[int]
+    ) -> Iterator[pd.DataFrame]:
+        import pyarrow.csv as pa_csv
+
+        schema = self.schema_cache.get(source) if isinstance(source, str) else None
+        with open_target(source, "rb", self.storage_options) as f:
+            for batch in pa_csv.open_csv(f, **self.get_reader_options(schema)):
+                # without chunk_rows batches (block_size of CSV reader) are yielded whole
+                for offset in range(0, batch.num_rows, chunk_rows or batch.num_rows or 1):
+                    yield batch.slice(offset, chunk_rows).to_pandas()
+
+    def write_chunks(self, chunks: Iterable[pd.DataFrame], target: Target) -> None:
+        first_chunk = []
+
+        def remember_first(chunks):
+            for chunk in chunks:
+                if not first_chunk:
+                    first_chunk.append(chunk)
+                yield chunk
+
+        super().write_chunks(remember_first(chunks), target)
+        if first_chunk:
+            self.cache_schema_of(first_chunk[0], target)
 
-    def write(self, df: pd.DataFrame, target: str) -> None:
-        df.to_csv(target, index=False, **self.kwargs)
+    def cache_schema_of(self, df: pd.DataFrame, target: Target) -> None:
+        import pyarrow as pa
+
+        if not isinstance(target, str):
+            return
+        try:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # e.g. mixed types in object column, types will be inferred on read
+            return
+        self.schema_cache.set(target, schema.remove_metadata())
 
 
 class ParquetIO(AbstractDataFrameIO):
-    """Input/ouput from a parquet file."""
+    """
+    Input/ouput from a parquet file.
+
+    Chunks are read one row group (or batch of chunk_rows rows) at a time,
+    next row group is decoded in background while current one is processed.
+    Chunks are written incrementally with schema of the first chunk.
+    """
+
+    file_format = "parquet"
+    # used if footer can't be read cheaply (remote files)
+    memory_factor = 5.0
 
     def __init__(self, **kwargs):
         self.kwargs = kwargs
+        self.storage_options = kwargs.get("storage_options")
+
+    def estimate_memory(self, source: Target, size: int) -> int:
+        """
+        Return memory estimated from row count and column types in footer of local file,
+        string values are Python objects (pointer and object).
+        """
+        metadata = read_parquet_metadata(source)
+        if metadata is None:
+            return super().estimate_memory(source, size)
+        return estimate_frame_memory(metadata, string_bytes=64)
+
+    def read(self, source: Target) -> pd.DataFrame:
+        return pd.read_parquet(source, **get_io_kwargs(source, self.kwargs))
+
+    def write(self, df: pd.DataFrame, target: Target) -> None:
+        df.to_parquet(target, index=False, **get_io_kwargs(target, self.kwargs))
+
+    def read_chunks(
+        self, source: Target, chunk_rows: Optional[int]
+    ) -> Iterator[pd.DataFrame]:
+        import pyarrow.parquet as pq
+
+        with open_target(source, "rb", self.storage_options) as f:
+            parquet_file = pq.ParquetFile(f)
+            if chunk_rows is None:
+                tables = (
+                    parquet_file.read_row_group(i)
+                    for i in range(parquet_file.num_row_groups)
+                )
+            else:
+                tables = parquet_file.iter_batches(batch_size=chunk_rows)
+            for table in read_ahead(tables):
+                yield table.to_pandas()
+
+    def write_chunks(self, chunks: Iterable[pd.DataFrame], target: Target) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        with open_target(target, "wb", self.storage_options) as f:
+            try:
+                for chunk in chunks:
+                    if writer is None:
+                        table = pa.Table.from_pandas(chunk, preserve_index=False)
+                        writer = pq.ParquetWriter(f, table.schema)
+                    else:
+                        table = pa.Table.from_pandas(
+                            chunk, schema=writer.schema, preserve_index=False
+                        )
+                    writer.write_table(table)
+                if writer is None:
+                    pq.write_table(pa.Table.from_pandas(pd.DataFrame()), f)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+
+class ParquetStreamIO(ParquetIO):
+    """
+    Input/ouput from a parquet file, one row group (or batch of chunk_rows rows) at a time,
+    even if chunk_rows isn't set.
+    """
+
+    streaming = True
+
+
+class ArrowParquetIO(AbstractDataFrameIO):
+    """
+    Input/ouput from a parquet file as pyarrow Tables, without conversion to pandas.
+
+    Local files are memory mapped. Synthesizers and evaluators which support
+    Arrow data get tables as they are, others get them converted to DataFrames.
+    """
+
+    frame_type = frames.ARROW
+    file_format = "parquet"
+    memory_factor = 3.0
+
+    def __init__(self, **kwargs):
+        self.storage_options = kwargs.get("storage_options")
+
+    def estimate_memory(self, source: Target, size: int) -> int:
+        metadata = read_parquet_metadata(source)
+        if metadata is None:
+            return super().estimate_memory(source, size)
+        # string values are offsets into data buffer
+        return estimate_frame_memory(metadata, string_bytes=24)
+
+    def read(self, source: Target):
+        import pyarrow.parquet as pq
+
+        if isinstance(source, str) and "://" not in source:
+            return pq.read_table(source, memory_map=True)
+        with open_target(source, "rb", self.storage_options) as f:
+            return pq.read_table(f)
+
+    def write(self, table, target: Target) -> None:
+        import pyarrow.parquet as pq
+
+        with open_target(target, "wb", self.storage_options) as f:
+            pq.write_table(frames.to_arrow(table), f)
+
+    def read_chunks(self, source: Target, chunk_rows: Optional[int]) -> Iterator:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        with open_target(source, "rb", self.storage_options) as f:
+            parquet_file = pq.ParquetFile(f)
+            if chunk_rows is None:
+                tables = (
+                    parquet_file.read_row_group(i)
+                    for i in range(parquet_file.num_row_groups)
+                )
+            else:
+                tables = (
+                    pa.Table.from_batches([batch])
+                    for batch in parquet_file.iter_batches(batch_size=chunk_rows)
+                )
+            yield from read_ahead(tables)
+
+    def write_chunks(self, chunks: Iterable, target: Target) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        with open_target(target, "wb", self.storage_options) as f:
+            try:
+                for chunk in chunks:
+                    table = frames.to_arrow(chunk)
+                    if writer is None:
+                        writer = pq.ParquetWriter(f, table.schema)
+                    writer.write_table(table.cast(writer.schema))
+                if writer is None:
+                    pq.write_table(pa.table({}), f)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+
+class FeatherIO(AbstractDataFrameIO):
+    """
+    Input/ouput from Arrow IPC (Feather v2) file as pyarrow Tables.
+
+    Files are written uncompressed, so local files can be memory mapped on read:
+    table buffers point directly into the mapped file, opening is nearly instant
+    and data is paged in only when it's used.
+    Suitable for intermediate (e.g. synthesize) files, as dtypes are kept exactly.
+    """
+
+    frame_type = frames.ARROW
+    file_format = "arrow"
+
+    def __init__(self, **kwargs):
+        self.storage_options = kwargs.get("storage_options")
+
+    def open_source(self, source: Target) -> IO:
+        import pyarrow as pa
+
+        if isinstance(source, str) and "://" not in source:
+            # mapping is released when last table using it is garbage collected
+            return nullcontext(pa.memory_map(source, "r"))
+        return open_target(source, "rb", self.storage_options)
+
+    def read(self, source: Target):
+        import pyarrow as pa
+
+        with self.open_source(source) as f:
+            return pa.ipc.open_file(f).read_all()
+
+    def write(self, table, target: Target) -> None:
+        self.write_chunks([table], target)
+
+    def read_chunks(self, source: Target, chunk_rows: Optional[int]) -> Iterator:
+        import pyarrow as pa
+
+        with self.open_source(source) as f:
+            reader = pa.ipc.open_file(f)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            if chunk_rows is not None:
+                batches = (
+                    batch.slice(offset, chunk_rows)
+                    for batch in batches
+                    for offset in range(0, batch.num_rows, chunk_rows)
+                )
+            for batch in batches:
+                yield pa.Table.from_batches([batch])
+
+    def write_chunks(self, chunks: Iterable, target: Target) -> None:
+        import pyarrow as pa
+
+        writer = None
+        with open_target(target, "wb", self.storage_options) as f:
+            try:
+                for chunk in chunks:
+                    table = frames.to_arrow(chunk)
+                    if writer is None:
+                        schema = table.schema
+                        writer = pa.ipc.new_file(f, schema)
+                    writer.write_table(table.cast(schema))
+                if writer is None:
+                    writer = pa.ipc.new_file(f, pa.schema([]))
+            finally:
+                if writer is not None:
+                    writer.close()
+
+
+def read_parquet_metadata(source: Target):
+    """
+    Return footer metadata of local parquet file, None for other sources.
+    """
+    if not isinstance(source, str) or "://" in source:
+        return None
+    import pyarrow.parquet as pq
+
+    return pq.read_metadata(source)
+
+
+VARIABLE_SIZE_TYPES = ("BYTE_ARRAY", "FIXED_LEN_BYTE_ARRAY")
 
-    def read(self, source: str) -> pd.DataFrame:
-        return pd.read_parquet(source, **self.kwargs)
 
-    def write(self, df: pd.DataFrame, target) -> None:
-        df.to_parquet(target, index=False, **self.kwargs)
+def estimate_frame_memory(metadata, string_bytes: int) -> int:
+    """
+    Return memory of frame with row count and columns given by parquet metadata,
+    values of fixed-size columns take 8 bytes, values of other columns string_bytes.
+    Sizes in metadata can't be used, as they are sizes of dictionary-encoded data.
+    """
+    row_bytes = sum(
+        8 if metadata.schema.column(i).physical_type not in VARIABLE_SIZE_TYPES
+        else string_bytes
+        for i in range(metadata.num_columns)
+    )
+    return metadata.num_rows * row_bytes
@@ -1,15 +1,85 @@
 import random
+import warnings
 from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import numpy as np
 import pandas as pd
+from dummy_synth import frames
+from dummy_synth.sketches import (
+    ColumnSummary,
+    frequencies_distance,
+    ks_statistic,
+)
 
 
 class AbstractEvaluator(ABC):
+    # if True, evaluator builds mergeable summaries of data chunk by chunk
+    # (create_summary() returns object with update(chunk) method
+    # and evaluate_summaries() is implemented),
+    # so DirProcessor never needs whole files in memory for evaluation
+    streaming = False
+    # columns of evaluation result, None if they depend on data
+    RESULT_COLUMNS: Optional[List[str]] = None
+
     @abstractmethod
     def evaluate(self, ori_df: pd.DataFrame, syn_df: pd.DataFrame) -> pd.DataFrame:
         raise NotImplementedError()
 
+    def evaluate_tables(self, ori_table, syn_table) -> pd.DataFrame:
+        """
+        Evaluate synthetic data given as pyarrow Tables.
+
+        Default implementation converts tables to DataFrames for evaluate(),
+        override it to work on Arrow data without conversion.
+        """
+        return self.evaluate(frames.to_pandas(ori_table), frames.to_pandas(syn_table))
+
+    def evaluate_frames(
+        self, ori_frame: frames.Frame, syn_frame: frames.Frame
+    ) -> pd.DataFrame:
+        """
+        Evaluate synthetic data given as DataFrames or pyarrow Tables.
+        """
+        if frames.is_arrow(ori_frame) and frames.is_arrow(syn_frame):
+            return self.evaluate_tables(ori_frame, syn_frame)
+        return self.evaluate(frames.to_pandas(ori_frame), frames.to_pandas(syn_frame))
+
+    def evaluate_chunks(
+        self, ori_chunks: Iterable[frames.Frame], syn_chunks: Iterable[frames.Frame]
+    ) -> pd.DataFrame:
+        """
+        Evaluate synthetic data given as streams of DataFrame (or pyarrow Table) chunks.
+
+        Default implementation concatenates chunks,
+        streaming evaluators summarize them one by one instead.
+        """
+        return self.evaluate_frames(frames.concat(ori_chunks), frames.concat(syn_chunks))
+
+    def evaluate_stats(self, ori_stats: "FrameStats", syn_stats: "FrameStats"):
+        """
+        Evaluate synthetic data given as FrameStats shared with other evaluators.
+
+        Default implementation evaluates frames of stats, override it
+        to take derived statistics from stats, so they are computed once per frame.
+        """
+        return self.evaluate_frames(ori_stats.frame, syn_stats.frame)
+
+    def get_names(self) -> List[str]:
+        """
+        Return (sorted) names of evaluators whose results this evaluator returns.
+        """
+        return [type(self).__name__]
+
+    def get_result_columns(self) -> Dict[str, Optional[List[str]]]:
+        """
+        Return columns of evaluation result by evaluator name.
+        """
+        return {type(self).__name__: self.RESULT_COLUMNS}
+
 
 class RandomEvaluator(AbstractEvaluator):
+    RESULT_COLUMNS = ["utility score", "privacy score"]
+
     def evaluate(self, ori_df: pd.DataFrame, syn_df: pd.DataFrame) -> pd.DataFrame:
         """Evaluate synthetic data (dummy implementation).
 
@@ -29,8 +99,14 @@ class RandomEvaluator(AbstractEvaluator):
             ]
         )
 
+    def evaluate_tables(self, ori_table, syn_table) -> pd.DataFrame:
+        # data is not looked at, so there's no need to convert it
+        return self.evaluate(ori_table, syn_table)
+
 
 class ConstantEvaluator(AbstractEvaluator):
+    RESULT_COLUMNS = ["utility score", "privacy score"]
+
     def evaluate(self, ori_df: pd.DataFrame, syn_df: pd.DataFrame) -> pd.DataFrame:
         """Evaluate synthetic data (dummy implementation).
 
@@ -49,3 +125,703 @@ class ConstantEvaluator(AbstractEvaluator):
                 }
             ]
         )
+
+    def evaluate_tables(self, ori_table, syn_table) -> pd.DataFrame:
+        # data is not looked at, so there's no need to convert it
+        return self.evaluate(ori_table, syn_table)
+
+
+NUMERIC = "numeric"
+CATEGORICAL = "categorical"
+
+
+class FrameStats:
+    """
+    Derived statistics of one frame (original or synthetic data of one file),
+    shared by all evaluators run on it.
+
+    Statistics are requested by key along with function computing them from frame,
+    each of them is computed by first evaluator asking for it and then taken from cache.
+    Methods below request statistics used by evaluators of this module.
+    """
+
+    def __init__(self, frame: frames.Frame):
+        self.frame = frame
+        self.values: Dict[Hashable, Any] = {}
+
+    def get(self, key: Hashable, compute: Callable[[frames.Frame], Any]) -> Any:
+        if key not in self.values:
+            self.values[key] = compute(self.frame)
+        return self.values[key]
+
+    def num_rows(self) -> int:
+        return self.get("num_rows", get_num_rows)
+
+    def column_kinds(self) -> Dict[str, str]:
+        return self.get("column_kinds", get_column_kinds)
+
+    def value_counts(self, column: str) -> pd.Series:
+        return self.get(
+            ("value_counts", column), lambda frame: get_value_counts(frame, column)
+        )
+
+    def value_frequencies(self, column: str) -> pd.Series:
+        return self.get(
+            ("value_frequencies", column),
+            lambda frame: self.value_counts(column) / max(self.num_rows(), 1),
+        )
+
+    def correlation_matrix(
+        self, columns: List[str], max_rows: Optional[int]
+    ) -> np.ndarray:
+        return self.get(
+            ("correlation_matrix", tuple(columns), max_rows),
+            lambda frame: correlation_matrix(
+                get_numeric_matrix(frame, columns, max_rows)
+            ),
+        )
+
+    def summary(self) -> "FrameSummary":
+        def summarize(frame: frames.Frame) -> FrameSummary:
+            summary = FrameSummary()
+            summary.update(frame, self)
+            return summary
+
+        return self.get("summary", summarize)
+
+
+class StatisticalEvaluator(AbstractEvaluator):
+    """
+    Compare distributions of original and synthetic data column by column.
+
+    Numeric (and datetime) columns get Kolmogorov-Smirnov statistic and histogram distance
+    (total variation distance of histograms over common range), other columns get
+    total variation distance of value frequencies. Numeric columns also get mean
+    absolute difference of their correlations with other numeric columns.
+
+    Numeric columns are processed with NumPy in batches of columns at once,
+    batch has at most batch_size values, so temporary arrays stay bounded.
+    Correlations are computed on at most correlation_rows rows (evenly spaced).
+
+    Result has row per original column ("utility score" is 1 - its distance,
+    0 for columns missing in synthetic data) and last row with column "*",
+    which holds mean of distances and utility score averaging columns
+    and correlation similarity (1 - correlation difference / 2).
+    """
+
+    AGGREGATE_COLUMN = "*"
+    RESULT_COLUMNS = [
+        "column",
+        "type",
+        "ks_statistic",
+        "histogram_distance",
+        "total_variation_distance",
+        "correlation_difference",
+        "utility score",
+    ]
+
+    def __init__(
+        self,
+        bins: int = 20,
+        batch_size: int = 10_000_000,
+        correlation_rows: Optional[int] = 100_000,
+    ):
+        self.bins = bins
+        self.batch_size = batch_size
+        self.correlation_rows = correlation_rows
+
+    def evaluate(self, ori_df: pd.DataFrame, syn_df: pd.DataFrame) -> pd.DataFrame:
+        return self.compare(FrameStats(ori_df), FrameStats(syn_df))
+
+    def evaluate_tables(self, ori_table, syn_table) -> pd.DataFrame:
+        # columns are read from Arrow directly, strings are never converted to Python objects
+        return self.compare(FrameStats(ori_table), FrameStats(syn_table))
+
+    def evaluate_stats(
+        self, ori_stats: FrameStats, syn_stats: FrameStats
+    ) -> pd.DataFrame:
+        return self.compare(ori_stats, syn_stats)
+
+    def compare(self, ori_stats: FrameStats, syn_stats: FrameStats) -> pd.DataFrame:
+        # numeric matrices are not cached, they're as big as frames
+        ori_frame, syn_frame = ori_stats.frame, syn_stats.frame
+        ori_kinds = ori_stats.column_kinds()
+        syn_kinds = syn_stats.column_kinds()
+        numeric_columns = [
+            column
+            for column, kind in ori_kinds.items()
+            if kind == NUMERIC and syn_kinds.get(column) == NUMERIC
+        ]
+        results = {
+            column: {"column": column, "type": kind}
+            for column, kind in ori_kinds.items()
+        }
+
+        num_rows = ori_stats.num_rows() + syn_stats.num_rows()
+        batch_columns = max(1, self.batch_size // max(1, num_rows))
+        for start in range(0, len(numeric_columns), batch_columns):
+            batch = numeric_columns[start : start + batch_columns]
+            ori_values = get_numeric_matrix(ori_frame, batch)
+            syn_values = get_numeric_matrix(syn_frame, batch)
+            ks = ks_statistics(ori_values, syn_values)
+            histogram = histogram_distances(ori_values, syn_values, self.bins)
+            for i, column in enumerate(batch):
+                results[column]["ks_statistic"] = ks[i]
+                results[column]["histogram_distance"] = histogram[i]
+                results[column]["utility score"] = 1 - (ks[i] + histogram[i]) / 2
+
+        correlation_difference = np.nan
+        if len(numeric_columns) > 1:
+            column_differences, correlation_difference = correlation_differences(
+                ori_stats.correlation_matrix(numeric_columns, self.correlation_rows),
+                syn_stats.correlation_matrix(numeric_columns, self.correlation_rows),
+            )
+            for i, column in enumerate(numeric_columns):
+                results[column]["correlation_difference"] = column_differences[i]
+
+        numeric_columns_set = set(numeric_columns)
+        for column in ori_kinds:
+            if column not in syn_kinds:
+                results[column]["utility score"] = 0.0
+            elif column not in numeric_columns_set:
+                distance = total_variation_distance(
+                    ori_stats.value_frequencies(column),
+                    syn_stats.value_frequencies(column),
+                )
+                results[column]["total_variation_distance"] = distance
+                results[column]["utility score"] = 1 - distance
+
+        result = pd.DataFrame(list(results.values()), columns=self.RESULT_COLUMNS)
+        aggregate = result[self.RESULT_COLUMNS[2:]].mean().to_dict()
+        aggregate["column"] = self.AGGREGATE_COLUMN
+        if not np.isnan(correlation_difference):
+            aggregate["correlation_difference"] = correlation_difference
+            aggregate["utility score"] = (
+                aggregate["utility score"] + 1 - correlation_difference / 2
+            ) / 2
+        return pd.DataFrame(
+            list(results.values()) + [aggregate], columns=self.RESULT_COLUMNS
+        )
+
+
+def get_num_rows(frame: frames.Frame) -> int:
+    return frame.num_rows if frames.is_arrow(frame) else len(frame)
+
+
+def get_column_kinds(frame: frames.Frame) -> Dict[str, str]:
+    """
+    Return NUMERIC or CATEGORICAL kind of each column, booleans are categorical.
+
+    Kinds of Arrow columns are kinds of the same columns converted to pandas,
+    so e.g. dates (Python objects in pandas) are categorical and timestamps numeric.
+    """
+    if frames.is_arrow(frame):
+        import pyarrow as pa
+
+        return {
+            field.name: NUMERIC
+            if pa.types.is_integer(field.type)
+            or pa.types.is_floating(field.type)
+            or pa.types.is_timestamp(field.type)
+            else CATEGORICAL
+            for field in frame.schema
+        }
+    return {
+        column: NUMERIC
+        if (
+            pd.api.types.is_numeric_dtype(dtype)
+            and not pd.api.types.is_bool_dtype(dtype)
+        )
+        or pd.api.types.is_datetime64_any_dtype(dtype)
+        else CATEGORICAL
+        for column, dtype in frame.dtypes.items()
+    }
+
+
+def get_numeric_matrix(
+    frame: frames.Frame, columns: List[str], max_rows: Optional[int] = None
+) -> np.ndarray:
+    """
+    Return float64 matrix (rows x columns) of numeric columns, missing values are NaN.
+
+    Timestamps are converted to seconds since epoch.
+    With max_rows, only evenly spaced rows are taken.
+    """
+    num_rows = get_num_rows(frame)
+    step = 1 if max_rows is None else max(1, -(-num_rows // max_rows))
+    # column-major, so each column is contiguous
+    matrix = np.empty((len(range(0, num_rows, step)), len(columns)), order="F")
+    for i, column in enumerate(columns):
+        if frames.is_arrow(frame):
+            matrix[:, i] = arrow_to_float(frame.column(column))[::step]
+        else:
+            series = frame[column]
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                epoch = pd.Timestamp(0, tz=series.dt.tz)
+                series = (series - epoch) / pd.Timedelta(1, "s")
+            matrix[:, i] = series.to_numpy(dtype="float64", na_value=np.nan)[::step]
+    return matrix
+
+
+SECONDS_PER_UNIT = {"s": 1.0, "ms": 1e-3, "us": 1e-6, "ns": 1e-9}
+
+
+def arrow_to_float(column) -> np.ndarray:
+    """
+    Return values of Arrow column as float64 array, date/time values in seconds
+    (since epoch, or since midnight for times), same as pandas datetimes.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not pa.types.is_temporal(column.type):
+        return pc.cast(column, pa.float64()).to_numpy(zero_copy_only=False)
+    if pa.types.is_date32(column.type):
+        seconds = 86400.0
+    elif pa.types.is_date64(column.type):
+        seconds = SECONDS_PER_UNIT["ms"]
+    else:
+        seconds = SECONDS_PER_UNIT[column.type.unit]
+    # timestamps/dates/times are stored as integers in units of their type
+    storage_type = pa.int32() if column.type.bit_width == 32 else pa.int64()
+    values = pc.cast(pc.cast(column, storage_type), pa.float64())
+    return values.to_numpy(zero_copy_only=False) * seconds
+
+
+def get_value_counts(frame: frames.Frame, column: str) -> pd.Series:
+    """
+    Return number of rows of each value of column (missing values included).
+    """
+    if get_num_rows(frame) == 0:
+        return pd.Series(dtype="int64")
+    if frames.is_arrow(frame):
+        import pyarrow.compute as pc
+
+        counts = pc.value_counts(frame.column(column))
+        # values as they'd be in pandas, so they match values counted by pandas
+        return pd.Series(
+            counts.field("counts").to_numpy(),
+            index=pd.Index(counts.field("values").to_pandas()),
+        )
+    return frame[column].value_counts(dropna=False)
+
+
+def get_value_frequencies(frame: frames.Frame, column: str) -> pd.Series:
+    """
+    Return share of rows of each value of column (missing values included).
+    """
+    return get_value_counts(frame, column) / max(get_num_rows(frame), 1)
+
+
+def total_variation_distance(
+    ori_frequencies: pd.Series, syn_frequencies: pd.Series
+) -> float:
+    if ori_frequencies.empty or syn_frequencies.empty:
+        return float(ori_frequencies.empty != syn_frequencies.empty)
+    ori_frequencies = ori_frequencies.groupby(
+        get_value_labels(ori_frequencies.index)
+    ).sum()
+    syn_frequencies = syn_frequencies.groupby(
+        get_value_labels(syn_frequencies.index)
+    ).sum()
+    return float(ori_frequencies.sub(syn_frequencies, fill_value=0).abs().sum() / 2)
+
+
+MISSING_LABEL = "<missing>"
+
+
+def get_value_labels(values: pd.Index) -> pd.Index:
+    """
+    Return values as strings, so e.g. 1 and "1" read by different backends match,
+    missing values (None from Arrow, NaN from pandas) get the same label.
+    """
+    return values.astype(str).where(~values.isna(), MISSING_LABEL)
+
+
+def empty_distance(
+    distances: np.ndarray, ori_counts: np.ndarray, syn_counts: np.ndarray
+) -> np.ndarray:
+    """
+    Set distance of columns without values: 0 if both are empty, 1 if only one is.
+    """
+    empty = (ori_counts == 0) | (syn_counts == 0)
+    return np.where(empty, (ori_counts != syn_counts).astype(float), distances)
+
+
+def ks_statistics(ori_values: np.ndarray, syn_values: np.ndarray) -> np.ndarray:
+    """
+    Return two-sample Kolmogorov-Smirnov statistic of each column (NaN values are ignored).
+
+    Columns are sorted all at once, cumulative distributions are then compared
+    column by column (searchsorted works on single column only).
+    """
+    # NaN values are sorted last
+    ori_sorted = np.sort(ori_values, axis=0)
+    syn_sorted = np.sort(syn_values, axis=0)
+    ori_counts = (~np.isnan(ori_values)).sum(axis=0)
+    syn_counts = (~np.isnan(syn_values)).sum(axis=0)
+    statistics = np.zeros(ori_values.shape[1])
+    for i in np.flatnonzero((ori_counts > 0) & (syn_counts > 0)):
+        statistics[i] = sorted_ks_statistic(
+            ori_sorted[: ori_counts[i], i], syn_sorted[: syn_counts[i], i]
+        )
+    return empty_distance(statistics, ori_counts, syn_counts)
+
+
+def sorted_ks_statistic(ori: np.ndarray, syn: np.ndarray) -> float:
+    """
+    Return Kolmogorov-Smirnov statistic of sorted non-empty samples.
+
+    Cumulative distributions are compared at last occurrence of each value of both samples.
+    """
+    syn_left = np.searchsorted(ori, syn, side="left")
+    syn_right = np.searchsorted(ori, syn, side="right")
+    # at syn values: ori values <= syn[j] vs. j + 1 syn values
+    syn_run_ends = np.append(syn[1:] != syn[:-1], True)
+    syn_differences = np.abs(
+        syn_right / len(ori) - np.arange(1, len(syn) + 1) / len(syn)
+    )[syn_run_ends]
+    # at ori values: i + 1 ori values vs. syn values <= ori[i], i.e. syn values with syn_left <= i
+    syn_counts = np.cumsum(np.bincount(syn_left, minlength=len(ori) + 1))[: len(ori)]
+    ori_run_ends = np.append(ori[1:] != ori[:-1], True)
+    ori_differences = np.abs(
+        np.arange(1, len(ori) + 1) / len(ori) - syn_counts / len(syn)
+    )[ori_run_ends]
+    return float(max(syn_differences.max(), ori_differences.max()))
+
+
+def histogram_distances(
+    ori_values: np.ndarray, syn_values: np.ndarray, bins: int
+) -> np.ndarray:
+    """
+    Return total variation distance of histograms of each column over range common to both samples.
+    """
+    with warnings.catch_warnings():
+        # all-NaN columns
+        warnings.simplefilter("ignore", RuntimeWarning)
+        low = np.fmin(
+            np.nanmin(ori_values, axis=0, initial=np.inf),
+            np.nanmin(syn_values, axis=0, initial=np.inf),
+        )
+        high = np.fmax(
+            np.nanmax(ori_values, axis=0, initial=-np.inf),
+            np.nanmax(syn_values, axis=0, initial=-np.inf),
+        )
+    width = np.where(np.isfinite(high - low) & (high > low), high - low, 1.0)
+    low = np.where(np.isfinite(low), low, 0.0)
+    num_columns = ori_values.shape[1]
+
+    def histograms(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        mask = ~np.isnan(values)
+        # NaN values get invalid bin index, but they're masked out
+        bin_indexes = np.clip(
+            ((values - low) / width * bins).astype(np.int64), 0, bins - 1
+        )
+        # bins of all columns are counted at once, column i uses bins i*bins..(i+1)*bins-1
+        bin_indexes += np.arange(num_columns) * bins
+        counts = np.bincount(bin_indexes[mask], minlength=num_columns * bins)
+        counts = counts.reshape(num_columns, bins)
+        totals = counts.sum(axis=1)
+        return counts / np.maximum(totals, 1)[:, None], totals
+
+    with np.errstate(invalid="ignore"):
+        ori_histograms, ori_counts = histograms(ori_values)
+        syn_histograms, syn_counts = histograms(syn_values)
+    distances = np.abs(ori_histograms - syn_histograms).sum(axis=1) / 2
+    return empty_distance(distances, ori_counts, syn_counts)
+
+
+def correlation_matrix(values: np.ndarray) -> np.ndarray:
+    """
+    Return Pearson correlation matrix of columns, missing values are replaced by column mean,
+    constant columns have zero correlation with others.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means = np.nanmean(values, axis=0)
+    centered = np.nan_to_num(values - means)
+    deviations = np.sqrt((centered**2).sum(axis=0))
+    standardized = centered / np.where(deviations > 0, deviations, np.inf)
+    return standardized.T @ standardized
+
+
+def correlation_differences(
+    ori_correlations: np.ndarray, syn_correlations: np.ndarray
+) -> Tuple[np.ndarray, float]:
+    """
+    Return mean absolute difference of correlations of each column with other columns,
+    and mean over all pairs of columns.
+    """
+    differences = np.abs(ori_correlations - syn_correlations)
+    np.fill_diagonal(differences, 0.0)
+    num_columns = differences.shape[0]
+    column_differences = differences.sum(axis=1) / (num_columns - 1)
+    return column_differences, float(column_differences.mean())
+
+
+class FrameSummary:
+    """
+    Mergeable summary of each column of data, updated chunk by chunk.
+
+    Kind of column (NUMERIC/CATEGORICAL) is given by first chunk,
+    values of later chunks of numeric column are converted to numbers
+    (e.g. CSV chunk with all values missing is read as strings).
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: Dict[str, ColumnSummary] = {}
+
+    def update(self, frame: frames.Frame, stats: Optional[FrameStats] = None) -> None:
+        """
+        Add chunk of data, statistics of frame already computed by other evaluators
+        are taken from its stats (if given).
+        """
+        stats = stats or FrameStats(frame)
+        self.rows += stats.num_rows()
+        for column, kind in stats.column_kinds().items():
+            summary = self.columns.setdefault(column, ColumnSummary(kind))
+            if summary.kind == CATEGORICAL:
+                summary.update_categorical(stats.value_counts(column))
+            elif kind == NUMERIC:
+                summary.update_numeric(get_numeric_matrix(frame, [column])[:, 0])
+            else:
+                values = pd.to_numeric(
+                    frames.to_pandas(frame)[column], errors="coerce"
+                )
+                summary.update_numeric(values.to_numpy(dtype="float64", na_value=np.nan))
+
+    def merge(self, other: "FrameSummary") -> None:
+        self.rows += other.rows
+        for column, other_summary in other.columns.items():
+            if column in self.columns:
+                self.columns[column].merge(other_summary)
+            else:
+                self.columns[column] = other_summary
+
+
+class SketchEvaluator(AbstractEvaluator):
+    """
+    Compare original and synthetic data by mergeable summaries of their columns,
+    so data can be evaluated chunk by chunk with bounded memory.
+
+    Numeric columns get Kolmogorov-Smirnov statistic (from quantile sketches,
+    accurate to 1% of value), difference of means (in original standard deviations)
+    and ratio of standard deviations, categorical columns get total variation distance
+    of value frequencies. All columns get ratio of distinct counts (HyperLogLog)
+    and difference of shares of missing values.
+
+    Result has row per original column ("utility score" is 1 - KS statistic/TVD,
+    0 for columns missing in synthetic data or of other kind)
+    and last row with column "*" holding means.
+    """
+
+    streaming = True
+    AGGREGATE_COLUMN = "*"
+    RESULT_COLUMNS = [
+        "column",
+        "type",
+        "ks_statistic",
+        "total_variation_distance",
+        "mean_difference",
+        "std_ratio",
+        "distinct_ratio",
+        "null_share_difference",
+        "utility score",
+    ]
+
+    def evaluate(self, ori_df: pd.DataFrame, syn_df: pd.DataFrame) -> pd.DataFrame:
+        return self.evaluate_chunks([ori_df], [syn_df])
+
+    def evaluate_tables(self, ori_table, syn_table) -> pd.DataFrame:
+        return self.evaluate_chunks([ori_table], [syn_table])
+
+    def evaluate_chunks(
+        self, ori_chunks: Iterable[frames.Frame], syn_chunks: Iterable[frames.Frame]
+    ) -> pd.DataFrame:
+        return self.evaluate_summaries(
+            self.summarize(ori_chunks), self.summarize(syn_chunks)
+        )
+
+    def evaluate_stats(
+        self, ori_stats: FrameStats, syn_stats: FrameStats
+    ) -> pd.DataFrame:
+        return self.evaluate_summaries(ori_stats.summary(), syn_stats.summary())
+
+    def create_summary(self) -> FrameSummary:
+        return FrameSummary()
+
+    def summarize(self, chunks: Iterable[frames.Frame]) -> FrameSummary:
+        summary = self.create_summary()
+        for chunk in chunks:
+            summary.update(chunk)
+        return summary
+
+    def evaluate_summaries(
+        self, ori_summary: FrameSummary, syn_summary: FrameSummary
+    ) -> pd.DataFrame:
+        results = []
+        for column, ori_column in ori_summary.columns.items():
+            result = {"column": column, "type": ori_column.kind, "utility score": 0.0}
+            syn_column = syn_summary.columns.get(column)
+            if syn_column is not None and syn_column.kind == ori_column.kind:
+                result.update(compare_column_summaries(ori_column, syn_column))
+            results.append(result)
+        aggregate = (
+            pd.DataFrame(results, columns=self.RESULT_COLUMNS)[self.RESULT_COLUMNS[2:]]
+            .mean()
+            .to_dict()
+        )
+        aggregate["column"] = self.AGGREGATE_COLUMN
+        return pd.DataFrame(results + [aggregate], columns=self.RESULT_COLUMNS)
+
+
+def compare_column_summaries(
+    ori_column: ColumnSummary, syn_column: ColumnSummary
+) -> Dict[str, float]:
+    ori_distinct = ori_column.distinct.count()
+    syn_distinct = syn_column.distinct.count()
+    result = {
+        "distinct_ratio": min(ori_distinct, syn_distinct)
+        / max(ori_distinct, syn_distinct, 1),
+        "null_share_difference": abs(
+            ori_column.null_count / max(ori_column.rows, 1)
+            - syn_column.null_count / max(syn_column.rows, 1)
+        ),
+    }
+    if ori_column.kind == NUMERIC:
+        ks = ks_statistic(ori_column.quantiles, syn_column.quantiles)
+        ori_std = ori_column.moments.std
+        syn_std = syn_column.moments.std
+        result["ks_statistic"] = ks
+        result["mean_difference"] = abs(
+            ori_column.moments.mean - syn_column.moments.mean
+        ) / (ori_std if ori_std > 0 else 1)
+        result["std_ratio"] = (
+            min(ori_std, syn_std) / max(ori_std, syn_std)
+            if max(ori_std, syn_std) > 0
+            else 1.0
+        )
+        result["utility score"] = 1 - ks
+    else:
+        distance = frequencies_distance(ori_column.frequencies, syn_column.frequencies)
+        result["total_variation_distance"] = distance
+        result["utility score"] = 1 - distance
+    return result
+
+
+class CombinedSummary:
+    """
+    Summaries of each of combined streaming evaluators, updated with the same chunks.
+    """
+
+    def __init__(self, summaries: Dict[str, Any]):
+        self.summaries = summaries
+
+    def update(self, frame: frames.Frame) -> None:
+        stats = FrameStats(frame)
+        for summary in self.summaries.values():
+            if isinstance(summary, FrameSummary):
+                summary.update(frame, stats)
+            else:
+                summary.update(frame)
+
+
+class CombinedEvaluator(AbstractEvaluator):
+    """
+    Run several evaluators (by name) on the same data, so files are read once.
+
+    Evaluators share FrameStats of original and synthetic data, so statistics
+    requested by more of them are computed once per frame. Results are concatenated
+    into single DataFrame, with evaluator name in first column "evaluator".
+    If all evaluators are streaming, combined evaluator is streaming too.
+    """
+
+    EVALUATOR_COLUMN = "evaluator"
+
+    def __init__(self, evaluators: Dict[str, AbstractEvaluator]):
+        if not evaluators:
+            raise Exception("At least one evaluator is needed.")
+        self.evaluators = evaluators
+        self.streaming = all(evaluator.streaming for evaluator in evaluators.values())
+
+    def evaluate(self, ori_df: pd.DataFrame, syn_df: pd.DataFrame) -> pd.DataFrame:
+        return self.evaluate_stats(FrameStats(ori_df), FrameStats(syn_df))
+
+    def evaluate_frames(
+        self, ori_frame: frames.Frame, syn_frame: frames.Frame
+    ) -> pd.DataFrame:
+        # each evaluator decides itself whether it works on Arrow data,
+        # but both frames must be of the same type (as in evaluate_frames() of others)
+        if frames.is_arrow(ori_frame) != frames.is_arrow(syn_frame):
+            ori_frame = frames.to_pandas(ori_frame)
+            syn_frame = frames.to_pandas(syn_frame)
+        return self.evaluate_stats(FrameStats(ori_frame), FrameStats(syn_frame))
+
+    def evaluate_tables(self, ori_table, syn_table) -> pd.DataFrame:
+        return self.evaluate_frames(ori_table, syn_table)
+
+    def evaluate_stats(
+        self, ori_stats: FrameStats, syn_stats: FrameStats
+    ) -> pd.DataFrame:
+        return self.combine(
+            {
+                name: evaluator.evaluate_stats(ori_stats, syn_stats)
+                for name, evaluator in self.evaluators.items()
+            }
+        )
+
+    def evaluate_chunks(
+        self, ori_chunks: Iterable[frames.Frame], syn_chunks: Iterable[frames.Frame]
+    ) -> pd.DataFrame:
+        if not self.streaming:
+            return super().evaluate_chunks(ori_chunks, syn_chunks)
+        summaries = []
+        for chunks in (ori_chunks, syn_chunks):
+            summary = self.create_summary()
+            for chunk in chunks:
+                summary.update(chunk)
+            summaries.append(summary)
+        return self.evaluate_summaries(*summaries)
+
+    def create_summary(self) -> CombinedSummary:
+        return CombinedSummary(
+            {
+                name: evaluator.create_summary()
+                for name, evaluator in self.evaluators.items()
+            }
+        )
+
+    def evaluate_summaries(
+        self, ori_summary: CombinedSummary, syn_summary: CombinedSummary
+    ) -> pd.DataFrame:
+        return self.combine(
+            {
+                name: evaluator.evaluate_summaries(
+                    ori_summary.summaries[name], syn_summary.summaries[name]
+                )
+                for name, evaluator in self.evaluators.items()
+            }
+        )
+
+    def get_names(self) -> List[str]:
+        return sorted(self.evaluators)
+
+    def get_result_columns(self) -> Dict[str, Optional[List[str]]]:
+        return {
+            name: evaluator.RESULT_COLUMNS for name, evaluator in self.evaluators.items()
+        }
+
+    def combine(self, results: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return results of evaluators as single DataFrame (union of their columns).
+        """
+        return pd.concat(
+            [
+                result.assign(**{self.EVALUATOR_COLUMN: name})[
+                    [self.EVALUATOR_COLUMN, *result.columns]
+                ]
+                for name, result in results.items()
+            ],
+            ignore_index=True,
+        )
@@ -0,0 +1,61 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Iterable, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+"""
+Helpers for data passed between DataFrame IO, synthesizers and evaluators,
+which is either pandas DataFrame or pyarrow Table.
+"""
+
+PANDAS = "pandas"
+ARROW = "arrow"
+
+# pandas DataFrame or pyarrow Table
+Frame = Union["pd.DataFrame", Any]
+
+
+def is_arrow(frame: Frame) -> bool:
+    import pyarrow as pa
+
+    return isinstance(frame, pa.Table)
+
+
+def to_pandas(frame: Frame) -> pd.DataFrame:
+    if is_arrow(frame):
+        return frame.to_pandas()
+    return frame
+
+
+def to_arrow(frame: Frame):
+    import pyarrow as pa
+
+    if is_arrow(frame):
+        return frame
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def convert(frame: Frame, frame_type: str) -> Frame:
+    """
+    Return frame as given frame type (PANDAS or ARROW), frames of that type are returned as they are.
+    """
+    if frame_type == ARROW:
+        return to_arrow(frame)
+    return to_pandas(frame)
+
+
+def concat(chunks: Iterable[Frame]) -> Frame:
+    """
+    Return chunks as single frame, pyarrow Table if all chunks are Tables, DataFrame otherwise.
+    """
+    import pandas as pd
+
+    chunks = list(chunks)
+    if chunks and all(is_arrow(chunk) for chunk in chunks):
+        import pyarrow as pa
+
+        return pa.concat_tables(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat([to_pandas(chunk) for chunk in chunks], ignore_index=True)
@@ -0,0 +1,89 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+from typing import Dict, List, Tuple
+
+"""
+Minimal ctypes binding of Linux inotify, used to watch local directories.
+"""
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """
+    Inotify instance watching directories (not recursively, add each subdirectory)
+    for files written (closed after writing) or moved into them and for new subdirectories.
+    """
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_ONLYDIR
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is available on Linux only")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories: Dict[int, str] = {}
+
+    def add_watch(self, directory: str) -> None:
+        """
+        Watch directory, raises OSError e.g. when limit of watches is reached (ENOSPC).
+        """
+        watch = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), self.MASK
+        )
+        if watch < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Cannot watch {directory}: {os.strerror(errno)}")
+        self.directories[watch] = directory
+
+    def read_events(self, timeout: float) -> Tuple[List[Tuple[str, bool]], bool]:
+        """
+        Wait up to timeout seconds for events and return paths of written files
+        and new directories (path, is_directory), along with flag set
+        if events were lost due to queue overflow.
+        """
+        events = []
+        overflow = False
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return events, overflow
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events, overflow
+            offset = 0
+            while offset < len(data):
+                watch, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + name_length].rstrip(b"\0"))
+                offset += name_length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & IN_IGNORED:
+                    # directory was removed
+                    self.directories.pop(watch, None)
+                elif watch in self.directories and name:
+                    is_directory = bool(mask & IN_ISDIR)
+                    if is_directory or not mask & IN_CREATE:
+                        # files are reported when written, not when created
+                        events.append(
+                            (os.path.join(self.directories[watch], name), is_directory)
+                        )
+
+    def close(self) -> None:
+        os.close(self.fd)
@@ -0,0 +1,68 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+
+class Manifest:
+    """
+    Record of processed input files, used to skip unchanged inputs in later runs.
+
+    Each entry holds input file info (size, mtime/ETag), content hash
+    (None until file info of the path changes, see DirProcessor.record_processed())
+    and config of backends that processed the file.
+    Entries are appended to JSON lines file as soon as file is processed,
+    so interrupted run can be resumed. Last entry for a path wins.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        lines_count = 0
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # last line may be truncated if previous run was killed
+                    continue
+                self.entries[entry["path"]] = entry
+                lines_count += 1
+        if lines_count > 2 * len(self.entries):
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Rewrite manifest file with single entry per path.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(path)
+
+    def record(
+        self,
+        path: str,
+        file_info: Dict[str, Any],
+        content_hash: Optional[str],
+        config: Dict[str, Any],
+    ) -> None:
+        entry = {
+            "path": path,
+            "info": file_info,
+            "hash": content_hash,
+            "config": config,
+        }
+        self.entries[path] = entry
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
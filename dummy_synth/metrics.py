@@ -0,0 +1,240 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+
+def get_max_rss_bytes() -> Optional[int]:
+    """
+    Return peak resident memory of this process so far (None if unknown).
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageTimings:
+    """
+    Wall time spent in stages of file processing (read, synthesize, ...), summed over files.
+
+    Stages may be nested (e.g. write pulls chunks from synthesize, which pulls them from read),
+    time is always attributed to the innermost stage only.
+
+    Stages may also count rows and bytes read/written. With record_files set,
+    stages measured within file() are also recorded per file in self.files,
+    along with peak memory of the process at the end of each stage.
+    Peak memory of process pool workers is kept in worker_max_rss_bytes.
+    """
+
+    def __init__(self, record_files: bool = False):
+        self.seconds: Dict[str, float] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.record_files = record_files
+        self.files: List[Dict[str, Any]] = []
+        self.worker_max_rss_bytes: Optional[int] = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def __getstate__(self) -> dict:
+        return {
+            "seconds": self.seconds,
+            "counters": self.counters,
+            "record_files": self.record_files,
+            "files": self.files,
+            "worker_max_rss_bytes": self.worker_max_rss_bytes,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["record_files"])
+        self.seconds = state["seconds"]
+        self.counters = state["counters"]
+        self.files = state["files"]
+        self.worker_max_rss_bytes = state["worker_max_rss_bytes"]
+
+    def add(self, seconds: Dict[str, float]) -> None:
+        with self.lock:
+            for stage, stage_seconds in seconds.items():
+                self.seconds[stage] = self.seconds.get(stage, 0.0) + stage_seconds
+
+    def merge(self, other: "StageTimings") -> None:
+        """
+        Add timings, counters and file records of other (e.g. worker's) timings.
+        """
+        self.add(other.seconds)
+        for stage, counters in other.counters.items():
+            self.count(stage, **counters)
+        with self.lock:
+            self.files.extend(other.files)
+            if other.worker_max_rss_bytes is not None:
+                self.worker_max_rss_bytes = max(
+                    self.worker_max_rss_bytes or 0, other.worker_max_rss_bytes
+                )
+
+    def get_file_record(self) -> Optional[Dict[str, Any]]:
+        return getattr(self.local, "file_record", None)
+
+    def get_stage_record(self, stage: str) -> Optional[Dict[str, Any]]:
+        file_record = self.get_file_record()
+        if file_record is None:
+            return None
+        return file_record["stages"].setdefault(stage, {"seconds": 0.0})
+
+    def count(self, stage: str, **counters: Optional[int]) -> None:
+        """
+        Add counters (rows, bytes_read, bytes_written) to stage, None values are ignored.
+        """
+        counters = {name: value for name, value in counters.items() if value is not None}
+        with self.lock:
+            stage_counters = self.counters.setdefault(stage, {})
+            for name, value in counters.items():
+                stage_counters[name] = stage_counters.get(name, 0) + value
+        stage_record = self.get_stage_record(stage)
+        if stage_record is not None:
+            for name, value in counters.items():
+                stage_record[name] = stage_record.get(name, 0) + value
+
+    @contextmanager
+    def file(self, path: str):
+        """
+        Record stages measured within this context as stages of file path (if record_files is set).
+        """
+        if not self.record_files:
+            yield
+            return
+        file_record = {"path": path, "stages": {}}
+        self.local.file_record = file_record
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.local.file_record = None
+            file_record["seconds"] = time.perf_counter() - start
+            file_record["max_rss_bytes"] = get_max_rss_bytes()
+            with self.lock:
+                self.files.append(file_record)
+
+    def pop_files(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            files, self.files = self.files, []
+        return files
+
+    @contextmanager
+    def measure(self, stage: str):
+        stack = self.local.__dict__.setdefault("stack", [])
+        # time spent in nested stages is collected in stack item
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            self.add({stage: elapsed - nested})
+            if stack:
+                stack[-1] += elapsed
+            stage_record = self.get_stage_record(stage)
+            if stage_record is not None:
+                stage_record["seconds"] += elapsed - nested
+                stage_record["max_rss_bytes"] = get_max_rss_bytes()
+
+    def measure_iter(
+        self, stage: str, items: Iterable, count_rows: bool = False
+    ) -> Iterator:
+        """
+        Iterate items, measuring time spent in producing them as stage.
+        With count_rows set, items (DataFrames, Tables) are counted as stage rows.
+        """
+        iterator = iter(items)
+        while True:
+            with self.measure(stage):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            if count_rows:
+                self.count(stage, rows=len(item))
+            yield item
+
+    def format_summary(self) -> str:
+        total = sum(self.seconds.values())
+        lines = [
+            f"{'stage':>12}  {'seconds':>10} {'share':>7} {'rows':>12} {'MB read':>10} {'MB written':>10}"
+        ]
+        for stage, seconds in self.seconds.items():
+            counters = self.counters.get(stage, {})
+            lines.append(
+                f"{stage:>12}: {seconds:9.3f}s ({seconds / total if total else 0:6.1%})"
+                f" {format_counter(counters.get('rows')):>12}"
+                f" {format_counter(counters.get('bytes_read'), 1024 * 1024):>10}"
+                f" {format_counter(counters.get('bytes_written'), 1024 * 1024):>10}"
+            )
+        for stage, counters in self.counters.items():
+            if stage not in self.seconds:
+                # stages with counters only, e.g. cache hits/misses
+                lines.append(
+                    f"{stage:>12}: "
+                    + ", ".join(f"{value} {name}" for name, value in counters.items())
+                )
+        peak_memory = get_max_rss_bytes()
+        if peak_memory is not None:
+            line = f"Peak memory: {peak_memory / (1024 * 1024):.1f} MB"
+            if self.worker_max_rss_bytes is not None:
+                line += f" (largest worker: {self.worker_max_rss_bytes / (1024 * 1024):.1f} MB)"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def format_counter(value: Optional[int], unit: int = 1) -> str:
+    if value is None:
+        return "-"
+    if unit == 1:
+        return str(value)
+    return f"{value / unit:.1f}"
+
+
+class MetricsReport:
+    """
+    JSON lines report with a record for each processed file
+    (wall time, rows, bytes and peak memory of each of its stages)
+    and a record with totals of the whole run.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # start new report on each run
+        open(self.path, "w").close()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def write_files(self, file_records: List[Dict[str, Any]]) -> None:
+        with open(self.path, "a") as f:
+            for record in file_records:
+                f.write(json.dumps({"type": "file", **record}) + "\n")
+
+    def write_run(self, timings: StageTimings, files_count: int, seconds: float) -> None:
+        self.write(
+            {
+                "type": "run",
+                "files": files_count,
+                "seconds": seconds,
+                "max_rss_bytes": get_max_rss_bytes(),
+                "worker_max_rss_bytes": timings.worker_max_rss_bytes,
+                "stages": {
+                    stage: {
+                        "seconds": timings.seconds.get(stage, 0.0),
+                        **timings.counters.get(stage, {}),
+                    }
+                    for stage in {**timings.seconds, **timings.counters}
+                },
+            }
+        )
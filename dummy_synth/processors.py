@@ -1,11 +1,44 @@
+from __future__ import annotations
+import itertools
+import json
 import logging
 import os
-from typing import Dict, Optional
-import pandas as pd
-from dummy_synth.dataframe_io import AbstractDataFrameIO
-from dummy_synth.storages import AbstractFileStorage
-from dummy_synth.evaluators import AbstractEvaluator
-from dummy_synth.synthesizers import AbstractSynthesizer
+import pickle
+import time
+from contextlib import nullcontext, suppress
+from io import BytesIO
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+from dummy_synth import frames
+from dummy_synth.manifests import Manifest
+from dummy_synth.metrics import MetricsReport, StageTimings, get_max_rss_bytes
+from dummy_synth.queues import AbstractWorkQueue, get_worker_id
+from dummy_synth.results import ResultsDataset
+from dummy_synth.scheduling import MemoryBudget
+from dummy_synth.storages import AbstractFileStorage, ListingFilter
+
+if TYPE_CHECKING:
+    # backends (and pandas) are imported by config when used, keeps CLI startup fast
+    import pandas as pd
+    from dummy_synth.dataframe_io import AbstractDataFrameIO, Target
+    from dummy_synth.evaluators import AbstractEvaluator
+    from dummy_synth.synthesizers import AbstractSynthesizer
 
 
 class DirProcessor:
@@ -34,13 +67,52 @@ class DirProcessor:
         DummySynthesizer(),
         '.syn',
         RandomEvaluator(),
-        '.eval'
+        '.eval',
+        4,
+        DirProcessor.EXECUTOR_PROCESS,
     )
+
+    With jobs > 1 files are processed in a pool of workers.
+    Process pool suits CPU-bound synthesizers/evaluators,
+    thread pool suits I/O-bound storages (e.g. S3).
+
+    With chunk_rows set (or with streaming IO backend), input is read,
+    synthesized and written in chunks, so memory doesn't grow with file size.
+
+    With manifest set, files not changed since they were processed
+    by the same backends are skipped, and outputs of changed files are overwritten.
+
+    Files are filtered by listing_filter while storage lists them,
+    files with extensions missing in io_wrappers are always filtered out.
+
+    With work_queue set, files are claimed from the queue instead of listed,
+    so any number of processors (on any number of hosts) can share one run.
+    Queue is filled by processor with plan set, which lists directory once
+    and doesn't process files. Failed files are recorded in the queue
+    and retried by any worker, instead of stopping the run.
+
+    With memory_budget set, files processed at once are admitted while sum of their
+    estimated memory (see estimate_memory()) fits in the budget, files not fitting
+    in the budget even alone are processed in chunks.
+
+    With watch_seconds set, processor keeps watching self.directory after processing it
+    and processes files created or changed in it, until interrupted.
+    Errors of single files are logged instead of stopping the run.
+
+    With results_dataset set, evaluation rows of all files are appended to the dataset
+    (in batches, see ResultsDataset) instead of being written to evaluate files.
+
+    Time spent in stages (list, check, read, synthesize, ...) is summed in self.timings,
+    with metrics_report set, stages of each file are also written to the report.
     """
 
     IO_WRAPPERS_READ_KEY = "read"
     IO_WRAPPERS_WRITE_KEY = "write"
 
+    EXECUTOR_PROCESS = "process"
+    EXECUTOR_THREAD = "thread"
+    EXECUTORS = (EXECUTOR_PROCESS, EXECUTOR_THREAD)
+
     def __init__(
         self,
         directory: str,
@@ -51,7 +123,32 @@ class DirProcessor:
         synthesize_suffix: Optional[str] = None,
         evaluator: Optional[AbstractEvaluator] = None,
         evaluate_suffix: Optional[str] = None,
+        jobs: int = 1,
+        executor: str = EXECUTOR_PROCESS,
+        chunk_rows: Optional[int] = None,
+        manifest: Optional[Manifest] = None,
+        metrics_report: Optional[MetricsReport] = None,
+        listing_filter: Optional[ListingFilter] = None,
+        work_queue: Optional[AbstractWorkQueue] = None,
+        plan: bool = False,
+        watch_seconds: Optional[float] = None,
+        memory_budget: Optional[MemoryBudget] = None,
+        results_dataset: Optional[ResultsDataset] = None,
     ):
+        if jobs < 1:
+            raise Exception(f"Number of jobs must be at least 1, got {jobs}.")
+        if executor not in self.EXECUTORS:
+            raise Exception(f"Unsupported executor {executor}.")
+        if chunk_rows is not None and chunk_rows < 1:
+            raise Exception(f"Chunk rows must be at least 1, got {chunk_rows}.")
+        if plan and work_queue is None:
+            raise Exception("Work queue is needed to plan the run.")
+        if watch_seconds is not None and work_queue is not None:
+            raise Exception("Watch mode doesn't support work queue.")
+        if watch_seconds is not None and watch_seconds <= 0:
+            raise Exception(f"Watch seconds must be positive, got {watch_seconds}.")
+        if results_dataset is not None and evaluator is None:
+            raise Exception("Results dataset needs evaluator.")
         self.directory = directory
         self.storage = storage
         self.io_wrappers = io_wrappers
@@ -60,18 +157,538 @@ class DirProcessor:
         self.synthesize_suffix = synthesize_suffix
         self.evaluator = evaluator
         self.evaluate_suffix = evaluate_suffix
+        self.jobs = jobs
+        self.executor = executor
+        self.chunk_rows = chunk_rows
+        self.manifest = manifest
+        self.metrics_report = metrics_report
+        self.listing_filter = listing_filter or ListingFilter()
+        self.work_queue = work_queue
+        self.plan = plan
+        self.worker_id = get_worker_id()
+        self.watch_seconds = watch_seconds
+        self.memory_budget = memory_budget
+        self.results_dataset = results_dataset
+        # (memory charged, whether to process in chunks) of files being listed/prefetched
+        self.memory_plans: Dict[str, Tuple[int, bool]] = {}
+        self.timings = StageTimings(record_files=metrics_report is not None)
 
     def process(self) -> int:
         """
         Process each supported file in self.directory and return number of files processed.
         """
+        start = time.perf_counter()
+        try:
+            if self.plan:
+                count = self.plan_queue()
+            elif self.work_queue is not None:
+                count = self.process_queue()
+            elif self.watch_seconds is not None:
+                count = self.process_watched()
+            elif self.jobs > 1:
+                count = self.process_parallel()
+            else:
+                count = self.process_serial()
+        finally:
+            # rows of files evaluated before error/interrupt
+            self.write_results()
+        if self.work_queue is not None:
+            self.timings.count("queue", **self.work_queue.get_counts())
+        cache_stats = self.storage.get_cache_stats()
+        if cache_stats:
+            self.timings.count("cache", **cache_stats)
+        if self.metrics_report is not None:
+            self.metrics_report.write_run(
+                self.timings, count, time.perf_counter() - start
+            )
+        return count
+
+    def process_serial(self, file_paths: Optional[Iterable[str]] = None) -> int:
         count = 0
-        for file_path in self.storage.get_files(self.directory):
-            if self.process_file(file_path):
+        for file_path, content in self.get_inputs(file_paths):
+            _, chunked = self.pop_memory_plan(file_path)
+            try:
+                processed = self.process_file(file_path, content, chunked)
+            except Exception as e:
+                self.fail_file(file_path, e)
+                continue
+            if processed:
                 count += 1
+                self.record_processed(file_path)
+            self.complete_task(file_path)
+            self.write_file_metrics()
+        if self.storage.supports_upload():
+            with self.timings.measure("write"):
+                self.storage.wait_for_uploads()
+        self.write_results()
         return count
 
-    def process_file(self, file_path: str) -> bool:
+    def write_file_metrics(self) -> None:
+        """
+        Write records of files processed since last call to metrics report.
+        """
+        if self.metrics_report is not None:
+            self.metrics_report.write_files(self.timings.pop_files())
+
+    def get_inputs(
+        self, file_paths: Optional[Iterable[str]] = None
+    ) -> Generator[Tuple[str, Optional[bytes]], None, None]:
+        """
+        Yield supported files from self.directory (or given file paths) along with their content,
+        if storage downloads them ahead (otherwise content is None).
+        """
+        if file_paths is not None:
+            supported_files = file_paths
+        elif self.work_queue is not None:
+            supported_files = self.get_queued_files()
+        else:
+            supported_files = self.get_listed_files()
+        if self.memory_budget is not None:
+            supported_files = self.plan_memory(supported_files)
+        if self.evaluator is None and self.is_passthrough():
+            # files will be (mostly) just copied, don't download them
+            for file_path in supported_files:
+                yield file_path, None
+            return
+        for file_path, content in self.storage.prefetch(
+            supported_files, self.is_read_in_chunks
+        ):
+            if content is not None:
+                with self.timings.measure("read"):
+                    content = content.result()
+            yield file_path, content
+
+    def is_read_in_chunks(self, file_path: str) -> bool:
+        """
+        Return True if file is read in chunks by DataFrame IO,
+        so storage mustn't download it whole ahead.
+        """
+        io_for_read = self.get_dataframe_io(file_path, self.IO_WRAPPERS_READ_KEY)
+        return (
+            self.chunk_rows is not None
+            or io_for_read.streaming
+            or (self.memory_budget is not None and self.memory_plans[file_path][1])
+        )
+
+    def plan_memory(self, file_paths: Iterable[str]) -> Generator[str, None, None]:
+        """
+        Yield file paths, planning memory of each file as it passes.
+
+        File not fitting in memory budget is processed in chunks,
+        which bounds its memory to a fair share of the budget (budget / jobs).
+        Non-streaming evaluator reads whole files even in chunked mode,
+        then file is charged its full estimate (and it's processed alone if it's over budget).
+        """
+        bounded = self.is_chunk_memory_bounded()
+        for file_path in file_paths:
+            io_for_read = self.get_dataframe_io(file_path, self.IO_WRAPPERS_READ_KEY)
+            estimate = self.estimate_memory(file_path)
+            chunked = estimate > self.memory_budget.budget
+            if chunked and not bounded:
+                logging.warning(
+                    f"File {file_path} doesn't fit in memory budget and evaluator"
+                    " doesn't support chunks, it's processed alone."
+                )
+                chunked = False
+            elif chunked or self.chunk_rows is not None or io_for_read.streaming:
+                estimate = min(estimate, self.memory_budget.budget // self.jobs)
+            self.memory_plans[file_path] = (estimate, chunked)
+            if chunked:
+                self.timings.count("memory", chunked_files=1)
+            yield file_path
+
+    def is_chunk_memory_bounded(self) -> bool:
+        """
+        Return True if memory of file processed in chunks doesn't grow with file size,
+        i.e. evaluator (if any) evaluates chunks too.
+        """
+        return self.evaluator is None or self.evaluator.streaming
+
+    def pop_memory_plan(self, file_path: str) -> Tuple[int, bool]:
+        return self.memory_plans.pop(file_path, (0, False))
+
+    def estimate_memory(self, file_path: str) -> int:
+        """
+        Return estimated memory of processing file whole: its content
+        and original and synthesized frames (synthesized one assumed to be of the same size).
+        Estimates are based on storage metadata and on DataFrame IO of the file format.
+
+        File which can't be estimated (e.g. corrupt or deleted) doesn't stop planning,
+        it gets default estimate of its size (or none) and fails when it's processed.
+        """
+        io_for_read = self.get_dataframe_io(file_path, self.IO_WRAPPERS_READ_KEY)
+        io_for_write = self.get_dataframe_io(file_path, self.IO_WRAPPERS_WRITE_KEY)
+        if self.evaluator is None and self.is_copied(io_for_read, io_for_write):
+            return 0
+        try:
+            size = self.storage.get_file_info(file_path)["size"]
+        except Exception as e:
+            logging.warning(f"Cannot get size of {file_path}: {e}")
+            return 0
+        try:
+            frame_memory = io_for_read.estimate_memory(file_path, size)
+        except Exception as e:
+            logging.warning(f"Cannot estimate memory of {file_path}: {e}")
+            frame_memory = int(size * io_for_read.memory_factor)
+        return size + 2 * frame_memory
+
+    def get_listed_files(self) -> Generator[str, None, None]:
+        """
+        Yield supported files from self.directory which aren't up to date.
+        """
+        return (
+            file_path
+            for file_path in self.timings.measure_iter(
+                "list", self.storage.get_files(self.directory, self.get_listing_filter())
+            )
+            if self.is_supported(file_path) and not self.is_up_to_date(file_path)
+        )
+
+    def get_queued_files(self) -> Generator[str, None, None]:
+        """
+        Yield files claimed from work queue, until no more files can be claimed.
+        """
+        while True:
+            with self.timings.measure("claim"):
+                file_path = self.work_queue.claim(self.worker_id)
+            if file_path is None:
+                return
+            yield file_path
+
+    def get_queue_config(self) -> Dict[str, Any]:
+        """
+        Return description of run, all workers of the queue must have the same.
+        """
+        return {
+            "storage": type(self.storage).__name__,
+            "directory": self.directory,
+            **self.get_backends_config(),
+        }
+
+    def plan_queue(self) -> int:
+        """
+        List self.directory once and add files to be processed to work queue,
+        return number of files added. Files done in queue already are added
+        again if they changed since they were planned (their outputs are then
+        overwritten only with overwrite set, same as in runs without queue).
+        """
+        self.work_queue.set_config(self.get_queue_config())
+        return self.work_queue.put(self.get_listed_files(), self.get_file_version)
+
+    def get_file_version(self, file_path: str) -> str:
+        return json.dumps(self.storage.get_file_info(file_path), sort_keys=True)
+
+    def process_queue(self) -> int:
+        """
+        Process files claimed from work queue until it's drained, return number of files processed.
+
+        If remaining files are claimed by other workers, wait for them,
+        as their leases may expire (e.g. other worker was killed) and files be retried.
+        """
+        config = self.work_queue.get_config()
+        if config is None:
+            raise Exception("No run was planned into work queue, plan it first.")
+        if config != self.get_queue_config():
+            raise Exception(
+                f"Work queue was planned with {config}, worker has {self.get_queue_config()}."
+            )
+        count = 0
+        try:
+            while True:
+                if self.jobs > 1:
+                    round_count = self.process_parallel()
+                else:
+                    round_count = self.process_serial()
+                count += round_count
+                if self.work_queue.is_drained():
+                    return count
+                if not round_count:
+                    time.sleep(self.work_queue.poll_seconds)
+        finally:
+            # e.g. on KeyboardInterrupt, let other workers take over files downloaded ahead
+            self.work_queue.release(self.worker_id)
+
+    def complete_task(self, file_path: str) -> None:
+        if self.work_queue is not None:
+            self.work_queue.complete(file_path, self.worker_id)
+
+    def fail_file(self, file_path: str, error: Exception) -> None:
+        """
+        Handle error of single file, which stops the run unless files come from
+        work queue (file is recorded failed there) or from watch.
+        """
+        if self.work_queue is None and self.watch_seconds is None:
+            raise error
+        logging.error(f"Processing of {file_path} failed: {error}")
+        if self.work_queue is not None:
+            self.work_queue.fail(
+                file_path, self.worker_id, f"{type(error).__name__}: {error}"
+            )
+
+    def process_watched(self) -> int:
+        """
+        Process files in self.directory, then keep processing files created or changed
+        in it until interrupted, return number of files processed.
+
+        File is processed once it hasn't changed for self.watch_seconds,
+        files ready at once are processed as one batch (in parallel with jobs > 1,
+        by the same pool of workers). Outputs of files changed while watching are overwritten.
+        """
+        changes = self.storage.watch(
+            self.directory, self.get_listing_filter(), self.watch_seconds / 2
+        )
+        executor = None
+        count = 0
+        try:
+            # watch is set up first, so files changed during first pass aren't missed
+            next(changes)
+            count += self.process_parallel() if self.jobs > 1 else self.process_serial()
+            logging.info(f"Processed {count} files, watching {self.directory}.")
+            # outputs of changed files are outdated, same as in manifest mode
+            self.overwrite = True
+            if self.jobs > 1:
+                executor = self.create_executor()
+            changed: Dict[str, float] = {}
+            for file_paths in changes:
+                now = time.monotonic()
+                changed.update((file_path, now) for file_path in file_paths)
+                ready = [
+                    file_path
+                    for file_path, changed_at in changed.items()
+                    if now - changed_at >= self.watch_seconds
+                ]
+                if not ready:
+                    continue
+                for file_path in ready:
+                    del changed[file_path]
+                batch = [
+                    file_path
+                    for file_path in ready
+                    if self.is_supported(file_path) and not self.is_up_to_date(file_path)
+                ]
+                if self.jobs > 1:
+                    batch_count = self.process_parallel(batch, executor)
+                else:
+                    batch_count = self.process_serial(batch)
+                logging.info(f"Processed {batch_count} of {len(ready)} changed files.")
+                count += batch_count
+        except KeyboardInterrupt:
+            logging.info(f"Stopped watching {self.directory}.")
+        finally:
+            changes.close()
+            if executor is not None:
+                # pending files were cancelled by process_parallel() (on interrupt too)
+                executor.shutdown()
+        return count
+
+    def get_listing_filter(self) -> ListingFilter:
+        """
+        Return listing filter, which also rejects files with unsupported extensions
+        (e.g. outputs of previous runs) unless it has its own extensions allowlist.
+        """
+        listing_filter = self.listing_filter.with_extensions(self.io_wrappers)
+        if self.results_dataset is not None:
+            listing_filter = listing_filter.with_exclude(
+                self.results_dataset.get_exclude_patterns()
+            )
+        return listing_filter
+
+    def is_supported(self, file_path: str) -> bool:
+        return (
+            self.get_dataframe_io(file_path, self.IO_WRAPPERS_READ_KEY) is not None
+            and self.get_dataframe_io(file_path, self.IO_WRAPPERS_WRITE_KEY)
+            is not None
+        )
+
+    def get_backends_config(self) -> Dict[str, Any]:
+        """
+        Return description of backends, outputs made with different config are outdated.
+        """
+        evaluator = None
+        if self.evaluator is not None:
+            # combined evaluator is recorded by names of evaluators it runs
+            names = self.evaluator.get_names()
+            evaluator = names[0] if len(names) == 1 else names
+        config = {
+            "synthesizer": self.synthesizer and type(self.synthesizer).__name__,
+            "synthesize_suffix": self.synthesize_suffix,
+            "evaluator": evaluator,
+            "evaluate_suffix": self.evaluate_suffix,
+        }
+        if self.synthesizer is not None and self.synthesizer.get_config():
+            # e.g. number of sampled rows or seed
+            config["synthesizer_config"] = self.synthesizer.get_config()
+        if self.results_dataset is not None:
+            config["results_dataset"] = self.results_dataset.root
+        return config
+
+    def is_up_to_date(self, file_path: str) -> bool:
+        """
+        Return True if manifest says file was processed already and it hasn't changed since.
+        """
+        if self.manifest is None:
+            return False
+        with self.timings.measure("check"):
+            return self.is_recorded_in_manifest(file_path)
+
+    def is_recorded_in_manifest(self, file_path: str) -> bool:
+        entry = self.manifest.get(file_path)
+        if entry is None or entry["config"] != self.get_backends_config():
+            return False
+        if not all(
+            self.storage.exists(output_path)
+            for output_path in self.get_output_paths(file_path)
+        ):
+            return False
+        file_info = self.storage.get_file_info(file_path)
+        if file_info != entry["info"]:
+            if entry["hash"] is None:
+                return False
+            # metadata changed (e.g. file was touched), but content may be the same
+            content_hash = self.storage.get_content_hash(file_path)
+            if content_hash != entry["hash"]:
+                return False
+            self.manifest.record(
+                file_path, file_info, content_hash, self.get_backends_config()
+            )
+        logging.debug(f"Skipping file {file_path}, unchanged since last run.")
+        return True
+
+    def record_processed(self, file_path: str) -> None:
+        """
+        Record file in manifest. Files are keyed by file info (size and mtime/ETag),
+        content is hashed only if file info changed since file was recorded last,
+        so files which are touched without change aren't processed again next time.
+        """
+        if self.manifest is None:
+            return
+        file_info = self.storage.get_file_info(file_path)
+        entry = self.manifest.get(file_path)
+        content_hash = None
+        if entry is not None and entry["info"] == file_info:
+            content_hash = entry["hash"]
+        elif entry is not None:
+            content_hash = self.storage.get_content_hash(file_path)
+        self.manifest.record(
+            file_path, file_info, content_hash, self.get_backends_config()
+        )
+
+    def process_parallel(
+        self,
+        file_paths: Optional[Iterable[str]] = None,
+        executor: Optional[Executor] = None,
+    ) -> int:
+        """
+        Same as process(), but files are distributed among self.jobs workers
+        (of given executor, or of new one).
+
+        At most 2 * self.jobs files are queued at once, so listing huge
+        directories doesn't pile up pending tasks.
+        Errors are handled by fail_file(), same as in serial mode.
+        """
+        count = 0
+        pending = {}
+        inputs = self.get_inputs(file_paths)
+        first_input = next(inputs, None)
+        if first_input is None:
+            self.storage.wait_for_uploads()
+            return 0
+        # storage has listed directory by now, so workers get copy of its index
+        with nullcontext(executor) if executor else self.create_executor() as executor:
+            try:
+                for file_path, content in itertools.chain([first_input], inputs):
+                    cost, chunked = self.pop_memory_plan(file_path)
+                    while len(pending) >= 2 * self.jobs or (
+                        self.memory_budget is not None
+                        and not self.memory_budget.fits(cost)
+                    ):
+                        count += self.collect_done(pending)
+                    if self.memory_budget is not None:
+                        self.memory_budget.charge(file_path, cost)
+                    pending[
+                        self.submit_file(executor, file_path, content, chunked)
+                    ] = file_path
+                while pending:
+                    count += self.collect_done(pending)
+            except BaseException:
+                for future, file_path in pending.items():
+                    future.cancel()
+                    if self.memory_budget is not None:
+                        self.memory_budget.release(file_path)
+                raise
+        self.storage.wait_for_uploads()
+        self.write_results()
+        return count
+
+    def create_executor(self) -> Executor:
+        if self.executor == self.EXECUTOR_THREAD:
+            return ThreadPoolExecutor(max_workers=self.jobs)
+        # each worker process gets its own copy of this processor (and its backends),
+        # pickled explicitly so backends are re-created even with fork start method
+        return ProcessPoolExecutor(
+            max_workers=self.jobs,
+            initializer=_init_worker,
+            initargs=(pickle.dumps(self), logging.getLogger().level),
+        )
+
+    def submit_file(
+        self,
+        executor: Executor,
+        file_path: str,
+        content: Optional[bytes],
+        chunked: bool = False,
+    ):
+        if self.executor == self.EXECUTOR_THREAD:
+            return executor.submit(self.process_file, file_path, content, chunked)
+        return executor.submit(_process_file_in_worker, file_path, content, chunked)
+
+    def collect_done(self, pending: dict) -> int:
+        """
+        Wait for at least one pending future (mapped to its file path),
+        remove finished ones from pending and return number of processed files among them.
+        """
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        count = 0
+        for future in done:
+            file_path = pending.pop(future)
+            if self.memory_budget is not None:
+                self.memory_budget.release(file_path)
+            try:
+                processed = future.result()
+            except Exception as e:
+                self.fail_file(file_path, e)
+                continue
+            if self.executor == self.EXECUTOR_PROCESS:
+                processed, timings, results = processed
+                self.timings.merge(timings)
+                if self.results_dataset is not None:
+                    self.results_dataset.extend(results)
+            if processed:
+                count += 1
+                self.record_processed(file_path)
+                if self.executor == self.EXECUTOR_PROCESS:
+                    # outputs were written by worker's storage copy
+                    for output_path in self.get_output_paths(file_path):
+                        self.storage.add_to_index(output_path)
+            self.complete_task(file_path)
+        self.write_file_metrics()
+        return count
+
+    def get_output_paths(self, file_path: str) -> List[str]:
+        output_paths = []
+        if self.synthesizer is not None:
+            output_paths.append(file_path + self.synthesize_suffix)
+        if self.evaluator is not None and self.results_dataset is None:
+            output_paths.append(file_path + self.evaluate_suffix)
+        return output_paths
+
+    def process_file(
+        self, file_path: str, content: Optional[bytes] = None, chunked: bool = False
+    ) -> bool:
+        """
+        Process single file, content is file data already downloaded by storage (if any).
+        With chunked set, file is processed in chunks even if chunk_rows isn't set.
+        """
         io_for_read = self.get_dataframe_io(file_path, self.IO_WRAPPERS_READ_KEY)
         io_for_write = self.get_dataframe_io(file_path, self.IO_WRAPPERS_WRITE_KEY)
         if io_for_read is None or io_for_write is None:
@@ -80,8 +697,46 @@ class DirProcessor:
             return False
 
         logging.debug(f"Processing file {file_path}.")
+        with self.timings.file(file_path):
+            try:
+                self.process_file_data(
+                    file_path, content, io_for_read, io_for_write, chunked
+                )
+            except BaseException:
+                # uploads of failed file mustn't fail the run later
+                with suppress(Exception):
+                    self.wait_for_output_uploads(file_path)
+                raise
+            self.wait_for_output_uploads(file_path)
+        logging.debug(f"Successfully processed file {file_path}.")
+        return True
 
-        ori_df = io_for_read.read(file_path)
+    def wait_for_output_uploads(self, file_path: str) -> None:
+        """
+        Wait for outputs of file uploaded in background, so file is completed
+        (and recorded in manifest) only once they're stored, and their errors are file errors.
+        """
+        if self.storage.supports_upload():
+            with self.timings.measure("write"):
+                self.storage.wait_for_uploads(self.get_output_paths(file_path))
+
+    def process_file_data(
+        self,
+        file_path: str,
+        content: Optional[bytes],
+        io_for_read: AbstractDataFrameIO,
+        io_for_write: AbstractDataFrameIO,
+        chunked: bool = False,
+    ) -> None:
+        if self.is_copied(io_for_read, io_for_write):
+            self.copy_to_file(file_path, content, io_for_read, io_for_write, chunked)
+            return
+
+        if chunked or self.chunk_rows is not None or io_for_read.streaming:
+            self.process_file_in_chunks(file_path, content, io_for_read, io_for_write)
+            return
+
+        ori_df = self.read_original(file_path, content, io_for_read)
         syn_df = None
 
         if self.synthesizer is not None:
@@ -89,16 +744,247 @@ class DirProcessor:
 
         if self.evaluator is not None:
             if syn_df is None:
-                try:
-                    syn_df = io_for_read.read(file_path + self.synthesize_suffix)
-                except Exception as e:
-                    raise Exception(
-                        f"Expected file {file_path + self.synthesize_suffix} cannot be read. Evaluation impossible.",
-                        e,
-                    )
+                syn_df = self.read_synthesized(file_path, io_for_write)
             self.evaluate_to_file(file_path, io_for_write, ori_df, syn_df)
-        logging.debug(f"Successfully processed file {file_path}.")
-        return True
+
+    def is_passthrough(self) -> bool:
+        """
+        Return True if synthesized files can be made by copying original files.
+        """
+        return (
+            self.synthesizer is not None
+            and self.synthesizer.passthrough
+            and self.storage.supports_copy()
+        )
+
+    def is_copied(
+        self, io_for_read: AbstractDataFrameIO, io_for_write: AbstractDataFrameIO
+    ) -> bool:
+        """
+        Return True if synthesized file is made by copying original file.
+        """
+        return (
+            self.is_passthrough()
+            and io_for_read.file_format is not None
+            and io_for_read.file_format == io_for_write.file_format
+        )
+
+    def copy_to_file(
+        self,
+        file_path: str,
+        content: Optional[bytes],
+        io_for_read: AbstractDataFrameIO,
+        io_for_write: AbstractDataFrameIO,
+        chunked: bool = False,
+    ) -> None:
+        """
+        Make synthesize file by copying original file within storage (no parsing needed),
+        evaluate original data against itself if needed.
+        """
+        output_path = file_path + self.synthesize_suffix
+        self.check_overwrite(output_path)
+        logging.debug(f"Copying {file_path} to {output_path} (passthrough synthesizer).")
+        with self.timings.measure("copy"):
+            self.storage.copy(file_path, output_path)
+        self.storage.add_to_index(output_path)
+        self.timings.count(
+            "copy", bytes_written=self.storage.get_file_info(file_path)["size"]
+        )
+
+        if self.evaluator is None:
+            return
+        if self.evaluator.streaming and (
+            chunked or self.chunk_rows is not None or io_for_read.streaming
+        ):
+            self.check_evaluation_overwrite(file_path)
+            summary = self.evaluator.create_summary()
+            ori_chunks = self.read_original_chunks(file_path, content, io_for_read)
+            for _ in self.summarize_chunks(ori_chunks, summary):
+                pass
+            self.evaluate_summaries_to_file(file_path, io_for_write, summary, summary)
+        else:
+            ori_df = self.read_original(file_path, content, io_for_read)
+            self.evaluate_to_file(file_path, io_for_write, ori_df, ori_df)
+
+    def process_file_in_chunks(
+        self,
+        file_path: str,
+        content: Optional[bytes],
+        io_for_read: AbstractDataFrameIO,
+        io_for_write: AbstractDataFrameIO,
+    ) -> None:
+        """
+        Stream file through synthesizer chunk by chunk.
+
+        Streaming evaluators summarize original and synthesized chunks
+        as they pass through synthesizer (or read both files chunk by chunk),
+        other evaluators still get original and synthesized data at once
+        (synthesized chunks are kept, same as whole synthesized frame is).
+        """
+        streaming_evaluator = self.evaluator is not None and self.evaluator.streaming
+        syn_df = None
+        if self.synthesizer is not None:
+            output_path = file_path + self.synthesize_suffix
+            self.check_overwrite(output_path)
+            if streaming_evaluator:
+                self.check_evaluation_overwrite(file_path)
+                ori_summary = self.evaluator.create_summary()
+                syn_summary = self.evaluator.create_summary()
+            logging.debug(f"Writing synthesize result to {output_path} in chunks.")
+            ori_chunks = self.read_original_chunks(file_path, content, io_for_read)
+            if streaming_evaluator:
+                ori_chunks = self.summarize_chunks(ori_chunks, ori_summary)
+            syn_chunks = self.timings.measure_iter(
+                "synthesize",
+                self.synthesizer.synthesize_chunks(ori_chunks),
+                count_rows=True,
+            )
+            if streaming_evaluator:
+                syn_chunks = self.summarize_chunks(syn_chunks, syn_summary)
+            elif self.evaluator is not None:
+                # output may still be uploading in background, so it isn't read back
+                kept_chunks = []
+                syn_chunks = self.keep_chunks(syn_chunks, kept_chunks)
+            self.write_output(
+                io_for_write.write_chunks,
+                (frames.convert(chunk, io_for_write.frame_type) for chunk in syn_chunks),
+                output_path,
+            )
+            if streaming_evaluator:
+                self.evaluate_summaries_to_file(
+                    file_path, io_for_write, ori_summary, syn_summary
+                )
+                return
+            if self.evaluator is not None:
+                syn_df = frames.concat(kept_chunks)
+
+        if streaming_evaluator:
+            self.check_evaluation_overwrite(file_path)
+            with self.timings.measure("evaluate"):
+                eval_df = self.evaluator.evaluate_chunks(
+                    self.read_original_chunks(file_path, content, io_for_read),
+                    self.read_synthesized_chunks(file_path, io_for_write),
+                )
+            self.timings.count("evaluate", rows=len(eval_df))
+            self.write_evaluation(file_path, io_for_write, eval_df)
+        elif self.evaluator is not None:
+            ori_df = self.read_original(file_path, content, io_for_read)
+            if syn_df is None:
+                syn_df = self.read_synthesized(file_path, io_for_write)
+            self.evaluate_to_file(file_path, io_for_write, ori_df, syn_df)
+
+    @staticmethod
+    def keep_chunks(
+        chunks: Iterable[frames.Frame], kept_chunks: List[frames.Frame]
+    ) -> Iterator[frames.Frame]:
+        """
+        Pass chunks through, appending each of them to kept_chunks.
+        """
+        for chunk in chunks:
+            kept_chunks.append(chunk)
+            yield chunk
+
+    def summarize_chunks(
+        self, chunks: Iterable[frames.Frame], summary: Any
+    ) -> Iterator[frames.Frame]:
+        """
+        Pass chunks through, updating evaluator summary with each of them.
+        """
+        for chunk in chunks:
+            with self.timings.measure("evaluate"):
+                summary.update(chunk)
+            yield chunk
+
+    def read_original_chunks(
+        self,
+        file_path: str,
+        content: Optional[bytes],
+        io_for_read: AbstractDataFrameIO,
+    ) -> Iterator[frames.Frame]:
+        return self.timings.measure_iter(
+            "read",
+            io_for_read.read_chunks(self.get_source(file_path, content), self.chunk_rows),
+            count_rows=True,
+        )
+
+    def read_synthesized_chunks(
+        self, ori_data_file_path: str, io_for_write: AbstractDataFrameIO
+    ) -> Iterator[frames.Frame]:
+        """
+        Read synthesize file chunk by chunk, using the same IO backend that wrote it.
+        """
+        syn_path = ori_data_file_path + self.synthesize_suffix
+        chunks = self.timings.measure_iter(
+            "read", io_for_write.read_chunks(syn_path, self.chunk_rows), count_rows=True
+        )
+        try:
+            first_chunk = next(chunks, None)
+        except Exception as e:
+            raise Exception(
+                f"Expected file {syn_path} cannot be read. Evaluation impossible.", e
+            )
+        if first_chunk is not None:
+            yield first_chunk
+            yield from chunks
+
+    def read_synthesized(
+        self, ori_data_file_path: str, io_for_write: AbstractDataFrameIO
+    ) -> frames.Frame:
+        """
+        Read synthesize file, using the same IO backend that wrote it.
+        """
+        try:
+            with self.timings.measure("read"):
+                syn_df = io_for_write.read(ori_data_file_path + self.synthesize_suffix)
+        except Exception as e:
+            raise Exception(
+                f"Expected file {ori_data_file_path + self.synthesize_suffix} cannot be read. Evaluation impossible.",
+                e,
+            )
+        self.timings.count("read", rows=len(syn_df))
+        return syn_df
+
+    def read_original(
+        self,
+        file_path: str,
+        content: Optional[bytes],
+        io_for_read: AbstractDataFrameIO,
+    ) -> frames.Frame:
+        with self.timings.measure("read"):
+            ori_df = io_for_read.read(self.get_source(file_path, content))
+        self.timings.count("read", rows=len(ori_df))
+        return ori_df
+
+    def get_source(self, file_path: str, content: Optional[bytes]) -> Target:
+        if content is None:
+            # file info of listed files is cheap (local stat, S3 listing)
+            self.timings.count(
+                "read", bytes_read=self.storage.get_file_info(file_path)["size"]
+            )
+            return file_path
+        self.timings.count("read", bytes_read=len(content))
+        return BytesIO(content)
+
+    def write_output(self, write, data, output_path: str) -> None:
+        """
+        Write data with DataFrame IO write method (write or write_chunks),
+        either directly to output_path or through storage upload.
+        """
+        with self.timings.measure("write"):
+            if not self.storage.supports_upload():
+                write(data, output_path)
+                bytes_written = self.storage.get_file_info(output_path)["size"]
+            else:
+                # data is uploaded in parts while it's being serialized
+                with self.storage.open_upload(output_path) as f:
+                    write(data, f)
+                bytes_written = f.size
+        self.storage.add_to_index(output_path)
+        self.timings.count(
+            "write",
+            rows=len(data) if hasattr(data, "__len__") else None,
+            bytes_written=bytes_written,
+        )
 
     def get_dataframe_io(self, file_path: str, in_or_out: str) -> AbstractDataFrameIO:
         try:
@@ -108,23 +994,46 @@ class DirProcessor:
             return None
 
     def check_overwrite(self, path: str):
-        if not self.overwrite and self.storage.exists(path):
+        if self.overwrite:
+            return
+        with self.timings.measure("check"):
+            exists = self.storage.exists(path) and not self.is_manifest_output(path)
+        if exists:
             raise Exception(
                 f"Flag overwrite={self.overwrite} and target file {path} already exists."
             )
 
+    def check_evaluation_overwrite(self, ori_data_file_path: str) -> None:
+        if self.results_dataset is None:
+            # rows appended to results dataset never overwrite anything
+            self.check_overwrite(ori_data_file_path + self.evaluate_suffix)
+
+    def is_manifest_output(self, path: str) -> bool:
+        """
+        Return True if path is output of file recorded in manifest (so it was written by us).
+        """
+        if self.manifest is None:
+            return False
+        return any(
+            suffix and path.endswith(suffix) and self.manifest.get(path[: -len(suffix)])
+            for suffix in (self.synthesize_suffix, self.evaluate_suffix)
+        )
+
     def synthesize_to_file(
         self,
         ori_data_file_path: str,
         io_for_write: AbstractDataFrameIO,
-        ori_df: pd.DataFrame,
-    ) -> pd.DataFrame:
+        ori_df: frames.Frame,
+    ) -> frames.Frame:
         output_path = ori_data_file_path + self.synthesize_suffix
         self.check_overwrite(output_path)
-        syn_df = self.synthesizer.synthesize(ori_df)
+        with self.timings.measure("synthesize"):
+            syn_df = self.synthesizer.synthesize_frame(ori_df)
+        self.timings.count("synthesize", rows=len(syn_df))
         logging.debug(f"Writing synthesize result to {output_path}.")
-        io_for_write.write(
-            syn_df,
+        self.write_output(
+            io_for_write.write,
+            frames.convert(syn_df, io_for_write.frame_type),
             output_path,
         )
         return syn_df
@@ -133,15 +1042,93 @@ class DirProcessor:
         self,
         ori_data_file_path: str,
         io_for_write: AbstractDataFrameIO,
-        ori_df: pd.DataFrame,
-        syn_df: Optional[pd.DataFrame],
+        ori_df: frames.Frame,
+        syn_df: Optional[frames.Frame],
     ) -> pd.DataFrame:
+        self.check_evaluation_overwrite(ori_data_file_path)
+        with self.timings.measure("evaluate"):
+            eval_df = self.evaluator.evaluate_frames(ori_df, syn_df)
+        self.timings.count("evaluate", rows=len(eval_df))
+        self.write_evaluation(ori_data_file_path, io_for_write, eval_df)
+        return eval_df
+
+    def evaluate_summaries_to_file(
+        self,
+        ori_data_file_path: str,
+        io_for_write: AbstractDataFrameIO,
+        ori_summary: Any,
+        syn_summary: Any,
+    ) -> pd.DataFrame:
+        """
+        Evaluate summaries built by streaming evaluator (overwrite is checked by caller,
+        before data is read).
+        """
+        with self.timings.measure("evaluate"):
+            eval_df = self.evaluator.evaluate_summaries(ori_summary, syn_summary)
+        self.timings.count("evaluate", rows=len(eval_df))
+        self.write_evaluation(ori_data_file_path, io_for_write, eval_df)
+        return eval_df
+
+    def write_evaluation(
+        self,
+        ori_data_file_path: str,
+        io_for_write: AbstractDataFrameIO,
+        eval_df: pd.DataFrame,
+    ) -> None:
+        if self.results_dataset is not None:
+            self.results_dataset.add(
+                ori_data_file_path, eval_df, self.evaluator.get_result_columns()
+            )
+            if self.results_dataset.is_full():
+                self.write_results()
+            return
         output_path = ori_data_file_path + self.evaluate_suffix
-        self.check_overwrite(output_path)
-        eval_df = self.evaluator.evaluate(ori_df, syn_df)
         logging.debug(f"Writing evaluate result to {output_path}.")
-        io_for_write.write(
-            eval_df,
+        self.write_output(
+            io_for_write.write,
+            frames.convert(eval_df, io_for_write.frame_type),
             output_path,
         )
-        return eval_df
+
+    def write_results(self) -> None:
+        """
+        Write rows buffered in results dataset (if any) as its new part files.
+        """
+        if self.results_dataset is None or not self.results_dataset.rows:
+            return
+        with self.timings.measure("write"):
+            for part_path, data in self.results_dataset.pop_parts():
+                logging.debug(f"Writing evaluate results to {part_path}.")
+                self.storage.write_atomically(part_path, data)
+                self.timings.count("write", bytes_written=len(data))
+
+
+# DirProcessor copy used by process pool worker, set by _init_worker()
+_worker_processor: Optional[DirProcessor] = None
+
+
+def _init_worker(pickled_processor: bytes, log_level: int) -> None:
+    global _worker_processor
+    _worker_processor = pickle.loads(pickled_processor)
+    logging.basicConfig(level=log_level)
+
+
+def _process_file_in_worker(
+    file_path: str, content: Optional[bytes], chunked: bool = False
+) -> Tuple[bool, StageTimings, Dict[str, List[pd.DataFrame]]]:
+    """
+    Process file and return whether it was processed along with its stage timings
+    and evaluation rows buffered for results dataset (written by main process).
+    """
+    _worker_processor.timings = StageTimings(
+        record_files=_worker_processor.timings.record_files
+    )
+    processed = _worker_processor.process_file(file_path, content, chunked)
+    # uploads are done by this worker's storage copy, so they must finish here
+    with _worker_processor.timings.measure("write"):
+        _worker_processor.storage.wait_for_uploads()
+    _worker_processor.timings.worker_max_rss_bytes = get_max_rss_bytes()
+    results = {}
+    if _worker_processor.results_dataset is not None:
+        results = _worker_processor.results_dataset.pop_frames()
+    return processed, _worker_processor.timings, results
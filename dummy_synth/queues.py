@@ -0,0 +1,319 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+"""
+Durable queues of files to be processed, shared by workers of one run.
+"""
+
+
+class AbstractWorkQueue(ABC):
+    """
+    Queue of tasks (input file paths) to be processed by any number of workers.
+
+    Worker claims task with lease of lease_seconds, claimed task is either
+    completed or failed by the worker. Failed tasks and tasks with expired lease
+    (e.g. worker was killed) are claimed again, up to max_attempts times,
+    then they're marked failed.
+    Task statuses are STATUS_PENDING, STATUS_CLAIMED, STATUS_DONE and STATUS_FAILED.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_CLAIMED = "claimed"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    def __init__(
+        self, lease_seconds: float = 1800, max_attempts: int = 3, poll_seconds: float = 5
+    ):
+        if lease_seconds <= 0:
+            raise Exception(f"Lease must be positive, got {lease_seconds}.")
+        if max_attempts < 1:
+            raise Exception(f"Max attempts must be at least 1, got {max_attempts}.")
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+
+    @abstractmethod
+    def set_config(self, config: Dict[str, Any]) -> None:
+        """
+        Store config of the run planned into queue, workers should check it's theirs.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_config(self) -> Optional[Dict[str, Any]]:
+        """
+        Return config of planned run, None if nothing was planned yet.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def put(
+        self,
+        paths: Iterable[str],
+        get_version: Optional[Callable[[str], Optional[str]]] = None,
+    ) -> int:
+        """
+        Add tasks for paths not queued yet (failed ones are retried from scratch),
+        return number of tasks added.
+
+        With get_version, version of file (e.g. its mtime/ETag) is stored with its task
+        and done tasks of files whose version changed since are queued again,
+        so queue can be planned again for later run.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def claim(self, worker: str) -> Optional[str]:
+        """
+        Return path of task claimed by worker, None if no task can be claimed now.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def complete(self, path: str, worker: str) -> None:
+        """
+        Mark task done, leases of other tasks claimed by worker are extended.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def fail(self, path: str, worker: str, error: str) -> None:
+        """
+        Return task to queue to be retried or mark it failed after max_attempts,
+        leases of other tasks claimed by worker are extended.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def release(self, worker: str) -> None:
+        """
+        Return all tasks claimed by worker to queue (e.g. when worker is stopped).
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_counts(self) -> Dict[str, int]:
+        """
+        Return number of tasks in each status.
+        """
+        raise NotImplementedError()
+
+    def is_drained(self) -> bool:
+        """
+        Return True if there are no tasks left to be processed.
+        """
+        counts = self.get_counts()
+        return not counts.get(self.STATUS_PENDING) and not counts.get(
+            self.STATUS_CLAIMED
+        )
+
+
+class SqliteWorkQueue(AbstractWorkQueue):
+    """
+    Work queue in SQLite database file, claims are serialized by database write lock.
+
+    Workers on other hosts can use database on shared filesystem,
+    as long as filesystem supports POSIX locks (NFS locking may be unreliable).
+    Every operation opens its own connection, so queue can be used
+    by threads and pickled to worker processes.
+    """
+
+    PUT_BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = 1800,
+        max_attempts: int = 3,
+        poll_seconds: float = 5,
+    ):
+        super().__init__(lease_seconds, max_attempts, poll_seconds)
+        self.path = path
+        with self.transaction() as db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    path TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_until REAL,
+                    error TEXT,
+                    version TEXT
+                )
+                """
+            )
+            columns = [row[1] for row in db.execute("PRAGMA table_info(tasks)")]
+            if "version" not in columns:
+                # queue file planned before versions were stored
+                db.execute("ALTER TABLE tasks ADD COLUMN version TEXT")
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_until)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS config (id INTEGER PRIMARY KEY, config TEXT)"
+            )
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Yield connection in transaction holding write lock, committed on exit.
+        """
+        # isolation_level=None, so transaction is started explicitly below
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def set_config(self, config: Dict[str, Any]) -> None:
+        with self.transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO config (id, config) VALUES (1, ?)",
+                (json.dumps(config),),
+            )
+
+    def get_config(self) -> Optional[Dict[str, Any]]:
+        with self.transaction() as db:
+            row = db.execute("SELECT config FROM config WHERE id = 1").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(
+        self,
+        paths: Iterable[str],
+        get_version: Optional[Callable[[str], Optional[str]]] = None,
+    ) -> int:
+        count = 0
+        paths = iter(paths)
+        # batches keep write lock short, so workers can claim tasks while planning
+        while batch := list(islice(paths, self.PUT_BATCH_SIZE)):
+            with self.transaction() as db:
+                for path in batch:
+                    version = get_version(path) if get_version is not None else None
+                    count += db.execute(
+                        """
+                        INSERT INTO tasks (path, status, version) VALUES (?, ?, ?)
+                        ON CONFLICT (path) DO UPDATE
+                        SET status = excluded.status, attempts = 0, worker = NULL,
+                            lease_until = NULL, error = NULL, version = excluded.version
+                        WHERE status = ? OR (
+                            status = ? AND excluded.version IS NOT NULL
+                            AND version IS NOT excluded.version
+                        )
+                        """,
+                        (
+                            path,
+                            self.STATUS_PENDING,
+                            version,
+                            self.STATUS_FAILED,
+                            self.STATUS_DONE,
+                        ),
+                    ).rowcount
+        return count
+
+    def claim(self, worker: str) -> Optional[str]:
+        now = time.time()
+        with self.transaction() as db:
+            db.execute(
+                """
+                UPDATE tasks SET status = ?, error = 'lease expired'
+                WHERE status = ? AND lease_until < ? AND attempts >= ?
+                """,
+                (self.STATUS_FAILED, self.STATUS_CLAIMED, now, self.max_attempts),
+            )
+            row = db.execute(
+                """
+                SELECT path FROM tasks
+                WHERE status = ? OR (status = ? AND lease_until < ?)
+                ORDER BY rowid LIMIT 1
+                """,
+                (self.STATUS_PENDING, self.STATUS_CLAIMED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                """
+                UPDATE tasks
+                SET status = ?, attempts = attempts + 1, worker = ?, lease_until = ?
+                WHERE path = ?
+                """,
+                (self.STATUS_CLAIMED, worker, now + self.lease_seconds, row[0]),
+            )
+        return row[0]
+
+    def complete(self, path: str, worker: str) -> None:
+        with self.transaction() as db:
+            db.execute(
+                """
+                UPDATE tasks SET status = ?, lease_until = NULL, error = NULL
+                WHERE path = ? AND status = ? AND worker = ?
+                """,
+                (self.STATUS_DONE, path, self.STATUS_CLAIMED, worker),
+            )
+            self.extend_leases(db, worker)
+
+    def fail(self, path: str, worker: str, error: str) -> None:
+        with self.transaction() as db:
+            db.execute(
+                """
+                UPDATE tasks
+                SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                    lease_until = NULL, error = ?
+                WHERE path = ? AND status = ? AND worker = ?
+                """,
+                (
+                    self.max_attempts,
+                    self.STATUS_FAILED,
+                    self.STATUS_PENDING,
+                    error,
+                    path,
+                    self.STATUS_CLAIMED,
+                    worker,
+                ),
+            )
+            self.extend_leases(db, worker)
+
+    def extend_leases(self, db: sqlite3.Connection, worker: str) -> None:
+        # worker is alive, so tasks it downloads ahead shouldn't be taken over
+        db.execute(
+            "UPDATE tasks SET lease_until = ? WHERE status = ? AND worker = ?",
+            (time.time() + self.lease_seconds, self.STATUS_CLAIMED, worker),
+        )
+
+    def release(self, worker: str) -> None:
+        with self.transaction() as db:
+            db.execute(
+                """
+                UPDATE tasks SET status = ?, lease_until = NULL
+                WHERE status = ? AND worker = ?
+                """,
+                (self.STATUS_PENDING, self.STATUS_CLAIMED, worker),
+            )
+
+    def get_counts(self) -> Dict[str, int]:
+        with self.transaction() as db:
+            return dict(
+                db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status")
+            )
+
+
+def get_worker_id() -> str:
+    """
+    Return ID unique among workers of all hosts.
+    """
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
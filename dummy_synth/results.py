@@ -0,0 +1,139 @@
+from __future__ import annotations
+import threading
+import time
+import uuid
+from io import BytesIO
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+"""
+Parquet dataset of evaluation results, shared by all runs writing to it.
+"""
+
+
+class ResultsDataset:
+    """
+    Evaluation rows of all evaluated files in one Parquet dataset under root
+    (local directory or storage path, e.g. s3://bucket/prefix), partitioned
+    by evaluator name: root/evaluator=<name>/part-<time>-<unique id>.parquet.
+
+    Rows are tagged with source path, evaluator name and evaluation time
+    and buffered, pop_parts() turns buffered rows into part files, which are
+    written by storage atomically. Part files are never rewritten and their names
+    are unique, so later or parallel runs (or workers) can append to the same dataset.
+    Dataset can be read e.g. by pandas.read_parquet(root).
+    """
+
+    PARTITION_COLUMN = "evaluator"
+    SOURCE_COLUMN = "source_path"
+    TIME_COLUMN = "evaluated_at"
+
+    def __init__(self, root: str, batch_rows: int = 100000):
+        if batch_rows < 1:
+            raise Exception(f"Batch rows must be at least 1, got {batch_rows}.")
+        self.root = root.rstrip("/")
+        self.batch_rows = batch_rows
+        # buffered rows of each evaluator (without evaluator column)
+        self.frames: Dict[str, List[pd.DataFrame]] = {}
+        self.rows = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # process pool workers start with empty buffer
+        return {"root": self.root, "batch_rows": self.batch_rows}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["root"], state["batch_rows"])
+
+    def get_exclude_patterns(self) -> List[str]:
+        """
+        Return listing filter patterns excluding partitions of dataset,
+        so dataset stored within processed directory isn't taken for input.
+        """
+        return [f"{self.PARTITION_COLUMN}=*/*", f"*/{self.PARTITION_COLUMN}=*/*"]
+
+    def add(
+        self,
+        source_path: str,
+        eval_df: pd.DataFrame,
+        result_columns: Dict[str, Optional[List[str]]],
+    ) -> None:
+        """
+        Buffer evaluation rows of source file. Result columns of evaluators are
+        given by evaluator name (see AbstractEvaluator.get_result_columns()),
+        name of rows without evaluator column (i.e. of single evaluator) is the only key.
+
+        Rows of each evaluator always have the same columns (its result columns,
+        or all columns of rows if they aren't fixed), so all part files
+        of a partition have the same schema.
+        """
+        import pandas as pd
+
+        frame = eval_df.reset_index(drop=True)
+        frame.insert(0, self.SOURCE_COLUMN, source_path)
+        frame.insert(1, self.TIME_COLUMN, pd.Timestamp.now(tz="UTC"))
+        if self.PARTITION_COLUMN in frame.columns:
+            groups = frame.groupby(self.PARTITION_COLUMN, sort=False)
+        else:
+            (evaluator,) = result_columns
+            groups = [(evaluator, frame)]
+        self.extend(
+            {
+                evaluator: [self.conform(rows, result_columns.get(evaluator))]
+                for evaluator, rows in groups
+            }
+        )
+
+    def conform(
+        self, rows: pd.DataFrame, columns: Optional[List[str]]
+    ) -> pd.DataFrame:
+        """
+        Return rows with given columns (missing ones empty) after source path and time.
+        """
+        rows = rows.drop(columns=self.PARTITION_COLUMN, errors="ignore")
+        if columns is not None:
+            # e.g. combined evaluators share columns of all of them
+            rows = rows.reindex(columns=[self.SOURCE_COLUMN, self.TIME_COLUMN, *columns])
+        for column in rows.columns:
+            if rows[column].isna().all():
+                # type of empty column mustn't depend on data (e.g. null instead of double)
+                rows[column] = rows[column].astype("float64")
+        return rows
+
+    def extend(self, frames: Dict[str, List[pd.DataFrame]]) -> None:
+        """
+        Buffer rows of each evaluator (e.g. popped from worker's copy of dataset).
+        """
+        with self.lock:
+            for evaluator, evaluator_frames in frames.items():
+                self.frames.setdefault(evaluator, []).extend(evaluator_frames)
+                self.rows += sum(len(frame) for frame in evaluator_frames)
+
+    def is_full(self) -> bool:
+        return self.rows >= self.batch_rows
+
+    def pop_frames(self) -> Dict[str, List[pd.DataFrame]]:
+        with self.lock:
+            frames, self.frames, self.rows = self.frames, {}, 0
+        return frames
+
+    def pop_parts(self) -> List[Tuple[str, bytes]]:
+        """
+        Empty buffer and return part files (path and Parquet data) with its rows,
+        one part per evaluator.
+        """
+        import pandas as pd
+
+        parts = []
+        for evaluator, frames in self.pop_frames().items():
+            data = BytesIO()
+            pd.concat(frames, ignore_index=True).to_parquet(data, index=False)
+            parts.append((self.get_part_path(evaluator), data.getvalue()))
+        return parts
+
+    def get_part_path(self, evaluator: str) -> str:
+        # time first, so part files are listed in order they were written
+        name = f"part-{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex}.parquet"
+        return f"{self.root}/{self.PARTITION_COLUMN}={evaluator}/{name}"
@@ -0,0 +1,33 @@
+from typing import Dict
+
+"""
+Admission of files to be processed at once, by their estimated memory.
+"""
+
+
+class MemoryBudget:
+    """
+    Memory (bytes) shared by files processed at once,
+    each file is charged its estimated memory until it's processed.
+
+    File which doesn't fit in remaining budget waits for other files to finish,
+    file bigger than whole budget is admitted when nothing else is charged.
+    """
+
+    def __init__(self, budget: int):
+        if budget < 1:
+            raise Exception(f"Memory budget must be positive, got {budget}.")
+        self.budget = budget
+        self.charged: Dict[str, int] = {}
+
+    def get_used(self) -> int:
+        return sum(self.charged.values())
+
+    def fits(self, cost: int) -> bool:
+        return not self.charged or self.get_used() + cost <= self.budget
+
+    def charge(self, path: str, cost: int) -> None:
+        self.charged[path] = cost
+
+    def release(self, path: str) -> None:
+        self.charged.pop(path, None)
@@ -0,0 +1,349 @@
+import copy
+import math
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+"""
+Mergeable summaries of column values, used to evaluate data chunk by chunk.
+
+Each summary is updated with arrays of values (no loops over rows)
+and merged with summary of the same type built from other chunks,
+possibly in other process (summaries are plain picklable objects).
+"""
+
+
+class RunningMoments:
+    """
+    Count, mean, variance, min and max of values, merged with Chan's parallel algorithm.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        # sum of squared differences from mean
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        if not len(values):
+            return
+        chunk = RunningMoments()
+        chunk.count = len(values)
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        self.merge(chunk)
+
+    def merge(self, other: "RunningMoments") -> None:
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else math.nan
+
+
+class QuantileSketch:
+    """
+    Quantiles/CDF of values with given relative accuracy (DDSketch).
+
+    Values are counted in buckets with logarithmically growing width,
+    bucket i of positive values holds values in (gamma^(i-1), gamma^i],
+    negative values are bucketed by absolute value. Merging adds bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.min_value = min_value
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        # values with absolute value below min_value
+        self.zero_count = 0
+
+    @property
+    def count(self) -> int:
+        return (
+            sum(self.positive.values()) + sum(self.negative.values()) + self.zero_count
+        )
+
+    def update(self, values: np.ndarray) -> None:
+        magnitudes = np.abs(values)
+        is_zero = magnitudes < self.min_value
+        self.zero_count += int(is_zero.sum())
+        for buckets, selected in (
+            (self.positive, (values > 0) & ~is_zero),
+            (self.negative, (values < 0) & ~is_zero),
+        ):
+            indexes = np.ceil(np.log(magnitudes[selected]) / math.log(self.gamma))
+            unique_indexes, counts = np.unique(
+                indexes.astype(np.int64), return_counts=True
+            )
+            # loop over buckets (at most few thousands), not values
+            for index, count in zip(unique_indexes.tolist(), counts.tolist()):
+                buckets[index] = buckets.get(index, 0) + count
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.gamma != self.gamma:
+            raise Exception("Cannot merge quantile sketches of different accuracy.")
+        for buckets, other_buckets in (
+            (self.positive, other.positive),
+            (self.negative, other.negative),
+        ):
+            for index, count in other_buckets.items():
+                buckets[index] = buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+
+    def get_bucket_values(self) -> Dict[float, int]:
+        """
+        Return representative value (with relative error within accuracy) and count of each bucket.
+        """
+        factor = 2 / (1 + self.gamma)
+        bucket_values = {
+            -(self.gamma**index) * factor: count
+            for index, count in self.negative.items()
+        }
+        if self.zero_count:
+            bucket_values[0.0] = self.zero_count
+        bucket_values.update(
+            {
+                self.gamma**index * factor: count
+                for index, count in self.positive.items()
+            }
+        )
+        return bucket_values
+
+    def get_cdf(self):
+        """
+        Return sorted representative values and share of values lower or equal to each of them.
+        """
+        bucket_values = self.get_bucket_values()
+        values = np.array(sorted(bucket_values))
+        counts = np.array([bucket_values[value] for value in values], dtype=float)
+        return values, np.cumsum(counts) / max(counts.sum(), 1)
+
+    def quantile(self, q: float) -> float:
+        values, cdf = self.get_cdf()
+        if not len(values):
+            return math.nan
+        return float(values[min(np.searchsorted(cdf, q), len(values) - 1)])
+
+
+def ks_statistic(ori_sketch: QuantileSketch, syn_sketch: QuantileSketch) -> float:
+    """
+    Return Kolmogorov-Smirnov statistic approximated from quantile sketches.
+    """
+    ori_values, ori_cdf = ori_sketch.get_cdf()
+    syn_values, syn_cdf = syn_sketch.get_cdf()
+    if not len(ori_values) or not len(syn_values):
+        return float(len(ori_values) != len(syn_values))
+    points = np.union1d(ori_values, syn_values)
+
+    def cdf_at(values: np.ndarray, cdf: np.ndarray) -> np.ndarray:
+        positions = np.searchsorted(values, points, side="right")
+        return np.concatenate([[0.0], cdf])[positions]
+
+    ori_at_points = cdf_at(ori_values, ori_cdf)
+    syn_at_points = cdf_at(syn_values, syn_cdf)
+    return float(np.max(np.abs(ori_at_points - syn_at_points)))
+
+
+class FrequencySketch:
+    """
+    Counts of distinct values, exact while there are at most max_values of them.
+
+    Beyond that, values are counted in max_values buckets by hash of value,
+    so the same value always falls into the same bucket: sketches of different data
+    are bucketed identically (see frequencies_distance()) and merge doesn't depend
+    on order of chunks. Frequencies of buckets merge colliding values,
+    so distance of bucketed sketches is a lower bound of distance of values.
+    """
+
+    def __init__(self, max_values: int = 10_000):
+        self.max_values = max_values
+        self.counts: Dict[str, int] = {}
+        # counts of buckets, once there are more than max_values distinct values
+        self.buckets: Optional[np.ndarray] = None
+
+    def update(self, value_counts: pd.Series) -> None:
+        """
+        Add counts of values (Series indexed by value), values are stored as strings.
+        """
+        values = value_counts.index.astype(str)
+        if self.buckets is not None:
+            self.add_to_buckets(values.to_numpy(dtype=object), value_counts.to_numpy())
+            return
+        counts = pd.Series(value_counts.to_numpy(), index=values, dtype="int64")
+        counts = counts.groupby(level=0).sum()
+        if self.counts:
+            counts = counts.add(pd.Series(self.counts, dtype="int64"), fill_value=0)
+        self.counts = dict(zip(counts.index, counts.astype("int64").tolist()))
+        if len(self.counts) > self.max_values:
+            self.to_buckets()
+
+    def add_to_buckets(self, values: np.ndarray, counts: np.ndarray) -> None:
+        if not len(values):
+            return
+        indexes = pd.util.hash_array(values) % np.uint64(self.max_values)
+        np.add.at(self.buckets, indexes.astype(np.int64), counts.astype(np.int64))
+
+    def to_buckets(self) -> None:
+        """
+        Move exact counts to buckets.
+        """
+        self.buckets = np.zeros(self.max_values, dtype=np.int64)
+        self.add_to_buckets(
+            np.array(list(self.counts), dtype=object),
+            np.array(list(self.counts.values()), dtype=np.int64),
+        )
+        self.counts = {}
+
+    def merge(self, other: "FrequencySketch") -> None:
+        if other.max_values != self.max_values:
+            raise Exception("Cannot merge frequency sketches of different max values.")
+        if other.buckets is not None:
+            if self.buckets is None:
+                self.to_buckets()
+            self.buckets += other.buckets
+            return
+        self.update(pd.Series(other.counts, dtype="int64"))
+
+    def get_frequencies(self, bucketed: bool = False) -> pd.Series:
+        """
+        Return frequencies of values, or of buckets (if sketch is bucketed or bucketed is set).
+        """
+        if bucketed and self.buckets is None:
+            sketch = copy.deepcopy(self)
+            sketch.to_buckets()
+            return sketch.get_frequencies()
+        if self.buckets is not None:
+            counts = pd.Series(self.buckets, dtype="float64")
+            counts = counts[counts > 0]
+        else:
+            counts = pd.Series(self.counts, dtype="float64")
+        return counts / max(counts.sum(), 1)
+
+
+def frequencies_distance(
+    ori_sketch: FrequencySketch, syn_sketch: FrequencySketch
+) -> float:
+    """
+    Return total variation distance of value frequencies,
+    frequencies of buckets if any of sketches is bucketed.
+    """
+    bucketed = ori_sketch.buckets is not None or syn_sketch.buckets is not None
+    ori_frequencies = ori_sketch.get_frequencies(bucketed)
+    syn_frequencies = syn_sketch.get_frequencies(bucketed)
+    if ori_frequencies.empty or syn_frequencies.empty:
+        return float(ori_frequencies.empty != syn_frequencies.empty)
+    return float(ori_frequencies.sub(syn_frequencies, fill_value=0).abs().sum() / 2)
+
+
+class HyperLogLog:
+    """
+    Approximate count of distinct values, 2^precision one-byte registers
+    (standard error about 1.04 / sqrt(2^precision), 1.6% by default).
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = np.zeros(2**precision, dtype=np.uint8)
+
+    def update(self, values: np.ndarray) -> None:
+        if not len(values):
+            return
+        hashes = pd.util.hash_array(np.asarray(values))
+        value_bits = 64 - self.precision
+        indexes = (hashes >> np.uint64(value_bits)).astype(np.int64)
+        rest = hashes & np.uint64(2**value_bits - 1)
+        # rank is position of first 1 bit in rest (value_bits + 1 if rest is 0),
+        # rest has at most 52 bits, so it's represented exactly as float
+        exponents = np.frexp(rest.astype(np.float64))[1]
+        ranks = np.where(rest == 0, value_bits + 1, value_bits - exponents + 1)
+        np.maximum.at(self.registers, indexes, ranks.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise Exception("Cannot merge HyperLogLog sketches of different precision.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        num_registers = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / num_registers)
+        estimate = (
+            alpha * num_registers**2 / np.sum(2.0 ** -self.registers.astype(float))
+        )
+        empty_registers = int((self.registers == 0).sum())
+        if estimate <= 2.5 * num_registers and empty_registers:
+            # linear counting is more accurate for small cardinalities
+            estimate = num_registers * math.log(num_registers / empty_registers)
+        return int(round(estimate))
+
+
+class ColumnSummary:
+    """
+    Mergeable summary of column values.
+
+    Numeric columns keep running moments and quantile sketch,
+    categorical columns keep value frequencies, both keep distinct count and null count.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.rows = 0
+        self.null_count = 0
+        self.distinct = HyperLogLog()
+        self.moments: Optional[RunningMoments] = None
+        self.quantiles: Optional[QuantileSketch] = None
+        self.frequencies: Optional[FrequencySketch] = None
+
+    def update_numeric(self, values: np.ndarray) -> None:
+        """
+        Add float values (NaN is null).
+        """
+        if self.moments is None:
+            self.moments = RunningMoments()
+            self.quantiles = QuantileSketch()
+        nulls = np.isnan(values)
+        values = values[~nulls]
+        self.rows += len(nulls)
+        self.null_count += int(nulls.sum())
+        self.moments.update(values)
+        self.quantiles.update(values)
+        self.distinct.update(values)
+
+    def update_categorical(self, value_counts: pd.Series) -> None:
+        """
+        Add counts of values (Series indexed by value, None/NaN index is null).
+        """
+        if self.frequencies is None:
+            self.frequencies = FrequencySketch()
+        nulls = value_counts.index.isna()
+        self.rows += int(value_counts.sum())
+        self.null_count += int(value_counts[nulls].sum())
+        value_counts = value_counts[~nulls]
+        self.frequencies.update(value_counts)
+        # distinct values only, each of them is hashed once per chunk
+        self.distinct.update(value_counts.index.astype(str).to_numpy(dtype=object))
+
+    def merge(self, other: "ColumnSummary") -> None:
+        self.rows += other.rows
+        self.null_count += other.null_count
+        self.distinct.merge(other.distinct)
+        for name in ("moments", "quantiles", "frequencies"):
+            other_sketch = getattr(other, name)
+            if other_sketch is None:
+                continue
+            if getattr(self, name) is None:
+                setattr(self, name, copy.deepcopy(other_sketch))
+            else:
+                getattr(self, name).merge(other_sketch)
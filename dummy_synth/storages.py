@@ -1,35 +1,539 @@
+import hashlib
+import logging
 import os
-from typing import Generator
+import shutil
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+from functools import partial
+from typing import IO, Any, Callable, Dict, Generator, Iterable, List, Optional, Set, Tuple
 from abc import ABC, abstractmethod
-import boto3
-import botocore
+from dummy_synth.caches import DiskCache
+from dummy_synth.inotify import Inotify
+from dummy_synth.transfers import S3TransferEngine
+
+
+class ListingFilter:
+    """
+    Filter of files listed by storage, applied while directory is listed,
+    so rejected files (e.g. outputs of previous runs) never reach DirProcessor.
+
+    Glob patterns are matched against path relative to listed directory
+    ("*" matches "/" too), extensions are matched case-insensitively.
+    Directories matched by exclude pattern ending with "/*" (e.g. "tmp/*")
+    are not listed at all. Modified-time bounds are Unix timestamps.
+    """
+
+    def __init__(
+        self,
+        extensions: Optional[Iterable[str]] = None,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[float] = None,
+        modified_before: Optional[float] = None,
+    ):
+        self.extensions = (
+            None if extensions is None else {ext.lower() for ext in extensions}
+        )
+        self.include = include or []
+        self.exclude = exclude or []
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_after = modified_after
+        self.modified_before = modified_before
+        # "tmp/*" and "tmp/**" exclude whole directory "tmp"
+        self.excluded_directories = [
+            pattern.rstrip("*")[:-1]
+            for pattern in self.exclude
+            if pattern.rstrip("*").endswith("/") and pattern.endswith("*")
+        ]
+
+    def with_extensions(self, extensions: Iterable[str]) -> "ListingFilter":
+        """
+        Return copy of filter with extensions allowlist (if it has none).
+        """
+        if self.extensions is not None:
+            return self
+        return ListingFilter(
+            extensions,
+            self.include,
+            self.exclude,
+            self.min_size,
+            self.max_size,
+            self.modified_after,
+            self.modified_before,
+        )
+
+    def with_exclude(self, exclude: List[str]) -> "ListingFilter":
+        """
+        Return copy of filter with more exclude patterns.
+        """
+        return ListingFilter(
+            self.extensions,
+            self.include,
+            self.exclude + exclude,
+            self.min_size,
+            self.max_size,
+            self.modified_after,
+            self.modified_before,
+        )
+
+    def needs_file_info(self) -> bool:
+        return any(
+            bound is not None
+            for bound in (
+                self.min_size,
+                self.max_size,
+                self.modified_after,
+                self.modified_before,
+            )
+        )
+
+    def accepts_path(self, relative_path: str) -> bool:
+        if self.extensions is not None and (
+            os.path.splitext(relative_path)[1].lower() not in self.extensions
+        ):
+            return False
+        if self.include and not any(
+            fnmatchcase(relative_path, pattern) for pattern in self.include
+        ):
+            return False
+        return not any(fnmatchcase(relative_path, pattern) for pattern in self.exclude)
+
+    def accepts_info(self, size: int, mtime: float) -> bool:
+        return not (
+            (self.min_size is not None and size < self.min_size)
+            or (self.max_size is not None and size > self.max_size)
+            or (self.modified_after is not None and mtime < self.modified_after)
+            or (self.modified_before is not None and mtime >= self.modified_before)
+        )
+
+    def prunes_directory(self, relative_directory: str) -> bool:
+        """
+        Return True if no file under directory (relative path, without trailing /) can pass.
+        """
+        return any(
+            fnmatchcase(relative_directory, pattern)
+            for pattern in self.excluded_directories
+        )
 
 
 class AbstractFileStorage(ABC):
+    """
+    Storages keep index of files listed by last get_files() call
+    (updated by add_to_index() when outputs are written),
+    so exists() for paths under listed directory doesn't need to ask storage.
+
+    Index holds all listed files, including ones rejected by listing filter,
+    directories pruned by filter are not indexed.
+    """
+
+    index: Optional[Set[str]] = None
+    index_root: Optional[str] = None
+    index_pruned: List[str] = []
+
     @abstractmethod
-    def get_files(self, directory: str) -> Generator[str, None, None]:
+    def get_files(
+        self, directory: str, listing_filter: Optional[ListingFilter] = None
+    ) -> Generator[str, None, None]:
         raise NotImplementedError()
 
     @abstractmethod
     def exists(self, path: str) -> bool:
         raise NotImplementedError()
 
+    def get_file_info(self, path: str) -> Dict[str, Any]:
+        """
+        Return metadata which changes when file changes (e.g. size and mtime).
+        """
+        raise NotImplementedError()
+
+    def get_content_hash(self, path: str) -> str:
+        """
+        Return hash of file content.
+        """
+        raise NotImplementedError()
+
+    def set_index(
+        self, root: str, paths: Iterable[str], pruned: Optional[List[str]] = None
+    ) -> None:
+        """
+        Set index of files under root, pruned are directories (with trailing /)
+        under root which weren't listed.
+        """
+        self.index = set(paths)
+        self.index_root = root
+        self.index_pruned = pruned or []
+
+    def is_indexed(self, path: str) -> bool:
+        """
+        Return True if existence of path can be answered from index.
+        """
+        return (
+            self.index is not None
+            and path.startswith(self.index_root)
+            and not any(path.startswith(pruned) for pruned in self.index_pruned)
+        )
+
+    def add_to_index(self, path: str) -> None:
+        """
+        Record that file was written to path.
+        """
+        if self.is_indexed(path):
+            self.index.add(path)
+
+    def prefetch(
+        self, paths: Iterable[str], skip: Optional[Callable[[str], bool]] = None
+    ) -> Generator[Tuple[str, Optional[Future]], None, None]:
+        """
+        Yield paths along with future of their content (bytes) downloaded in background,
+        or with None if storage doesn't download files on its own
+        (or if skip returns True for the path, e.g. for files to be read in chunks).
+        """
+        for path in paths:
+            yield path, None
+
+    def watch(
+        self,
+        directory: str,
+        listing_filter: Optional[ListingFilter] = None,
+        interval: float = 2.0,
+    ) -> Generator[List[str], None, None]:
+        """
+        Yield lists of files (passing listing filter) created or changed since previous yield,
+        at least every interval seconds (list may be empty).
+
+        First list is empty and it's yielded as soon as watch is set up,
+        so files changed after that can't be missed.
+        Default implementation lists directory every interval seconds and compares file infos.
+        """
+        known = self.get_files_info(directory, listing_filter)
+        yield []
+        while True:
+            time.sleep(interval)
+            files_info = self.get_files_info(directory, listing_filter)
+            yield [path for path, info in files_info.items() if known.get(path) != info]
+            known = files_info
+
+    def get_files_info(
+        self, directory: str, listing_filter: Optional[ListingFilter] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        return {
+            path: self.get_file_info(path)
+            for path in self.get_files(directory, listing_filter)
+        }
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        Return hits, misses and evictions of cache of inputs (empty if storage has none).
+        """
+        return {}
+
+    def supports_upload(self) -> bool:
+        """
+        Return True if output should be written using upload() instead of by DataFrame IO.
+        """
+        return False
+
+    def upload(self, path: str, data: bytes) -> None:
+        """
+        Start writing data to path in background, see wait_for_uploads().
+        """
+        raise NotImplementedError()
+
+    def open_upload(self, path: str) -> IO:
+        """
+        Return context manager of writable file object, which uploads data written to it
+        to path as it comes (upload is finished on exit, or aborted on error).
+        File object has size attribute (number of bytes written).
+        """
+        raise NotImplementedError()
+
+    def wait_for_uploads(self, paths: Optional[Iterable[str]] = None) -> None:
+        """
+        Block until uploads to given paths (or all uploads) started by upload() finish,
+        re-raise upload error.
+        """
+
+    def write_atomically(self, path: str, data: bytes) -> None:
+        """
+        Write data to path (creating directories as needed),
+        so that readers never see the file partially written.
+        """
+        raise NotImplementedError()
+
+    def supports_copy(self) -> bool:
+        """
+        Return True if storage implements copy().
+        """
+        return False
+
+    def copy(self, source: str, target: str) -> None:
+        """
+        Copy file within storage, without passing its data through this process if possible.
+        """
+        raise NotImplementedError()
+
 
 class LocalDirectoryStorage(AbstractFileStorage):
     def error(self, e):
         raise e
 
-    def get_files(self, directory: str) -> Generator[str, None, None]:
+    def get_files(
+        self, directory: str, listing_filter: Optional[ListingFilter] = None
+    ) -> Generator[str, None, None]:
+        """
+        Yield files in directory tree passing listing filter,
+        tree is walked whole before first file is yielded.
+        """
         directory = os.path.abspath(directory)
-        if not self.exists(directory):
+        if not os.path.exists(directory):
             raise Exception(f"Directory {directory} does not exists.")
-        for dirpath, dirs, files in os.walk(directory, onerror=self.error):
-            for file in files:
-                yield os.path.join(dirpath, file)
+        root = os.path.join(directory, "")
+        paths = []
+        accepted = []
+        pruned = []
+        for entry in self.walk(directory, root, listing_filter, pruned):
+            paths.append(entry.path)
+            if listing_filter is None or self.is_accepted(
+                entry, entry.path[len(root) :], listing_filter
+            ):
+                accepted.append(entry.path)
+        self.set_index(root, paths, pruned)
+        yield from accepted
+
+    def walk(
+        self,
+        directory: str,
+        root: str,
+        listing_filter: Optional[ListingFilter],
+        pruned: List[str],
+    ) -> Generator[os.DirEntry, None, None]:
+        """
+        Yield file entries of directory tree (files of directory before its subdirectories,
+        same as os.walk), skipping directories pruned by listing filter.
+        Symlinks to directories aren't followed (same as by os.walk).
+        """
+        directories = [directory]
+        while directories:
+            subdirectories = []
+            with os.scandir(directories.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        relative_path = entry.path[len(root) :].replace(os.sep, "/")
+                        if listing_filter is not None and (
+                            listing_filter.prunes_directory(relative_path)
+                        ):
+                            pruned.append(os.path.join(entry.path, ""))
+                        else:
+                            subdirectories.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+            directories.extend(reversed(subdirectories))
+
+    def watch(
+        self,
+        directory: str,
+        listing_filter: Optional[ListingFilter] = None,
+        interval: float = 2.0,
+    ) -> Generator[List[str], None, None]:
+        """
+        Yield lists of files written or moved into directory tree, as reported by inotify.
+
+        Files are reported when they're closed after writing, files in new directories
+        are reported when directory is found. Where inotify isn't available
+        (not Linux, limit of watches reached), directory tree is listed every interval seconds.
+        """
+        directory = os.path.abspath(directory)
+        root = os.path.join(directory, "")
+        try:
+            inotify = Inotify()
+        except OSError as e:
+            logging.warning(f"Cannot use inotify ({e}), polling {directory} for changes.")
+            yield from super().watch(directory, listing_filter, interval)
+            return
+        try:
+            try:
+                self.add_watches(inotify, directory, root, listing_filter)
+            except OSError as e:
+                logging.warning(f"{e}, polling {directory} for changes.")
+                yield from super().watch(directory, listing_filter, interval)
+                return
+            yield []
+            last_read = time.time()
+            while True:
+                events, overflow = inotify.read_events(interval)
+                changed = []
+                for path, is_directory in events:
+                    if not is_directory:
+                        changed.append(path)
+                        continue
+                    relative_path = path[len(root) :].replace(os.sep, "/")
+                    if listing_filter is None or not listing_filter.prunes_directory(
+                        relative_path
+                    ):
+                        # files may have been written before directory was watched
+                        self.add_watches(inotify, path, root, listing_filter)
+                        changed.extend(
+                            entry.path for entry in self.walk(path, root, listing_filter, [])
+                        )
+                if overflow:
+                    logging.warning(f"Inotify events were lost, rescanning {directory}.")
+                    changed.extend(
+                        entry.path
+                        for entry in self.walk(directory, root, listing_filter, [])
+                        # 1 s margin for filesystems with coarse mtime
+                        if entry.stat().st_mtime >= last_read - 1
+                    )
+                last_read = time.time()
+                changed = [
+                    path
+                    for path in dict.fromkeys(changed)
+                    if self.is_watched_file_accepted(path, root, listing_filter)
+                ]
+                for path in changed:
+                    self.add_to_index(path)
+                yield changed
+        finally:
+            inotify.close()
+
+    def add_watches(
+        self,
+        inotify: Inotify,
+        directory: str,
+        root: str,
+        listing_filter: Optional[ListingFilter],
+    ) -> None:
+        """
+        Add inotify watches of directory and its subdirectories not pruned by listing filter.
+        """
+        directories = [directory]
+        while directories:
+            directory = directories.pop()
+            try:
+                inotify.add_watch(directory)
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                # removed meanwhile
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    relative_path = entry.path[len(root) :].replace(os.sep, "/")
+                    if listing_filter is None or not listing_filter.prunes_directory(
+                        relative_path
+                    ):
+                        directories.append(entry.path)
+
+    def is_watched_file_accepted(
+        self, path: str, root: str, listing_filter: Optional[ListingFilter]
+    ) -> bool:
+        if listing_filter is None:
+            return True
+        if not listing_filter.accepts_path(path[len(root) :].replace(os.sep, "/")):
+            return False
+        if not listing_filter.needs_file_info():
+            return True
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        return listing_filter.accepts_info(stat.st_size, stat.st_mtime)
+
+    @staticmethod
+    def is_accepted(
+        entry: os.DirEntry, relative_path: str, listing_filter: ListingFilter
+    ) -> bool:
+        if not listing_filter.accepts_path(relative_path.replace(os.sep, "/")):
+            return False
+        if not listing_filter.needs_file_info():
+            return True
+        # stat only files with accepted names, DirEntry caches it
+        stat = entry.stat()
+        return listing_filter.accepts_info(stat.st_size, stat.st_mtime)
 
     def exists(self, path: str) -> bool:
+        path = os.path.abspath(path)
+        if self.is_indexed(path):
+            return path in self.index
         return os.path.exists(path)
 
+    def add_to_index(self, path: str) -> None:
+        super().add_to_index(os.path.abspath(path))
+
+    def write_atomically(self, path: str, data: bytes) -> None:
+        """
+        Write data to hidden temporary file next to path, then rename it to path.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(
+            directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp"
+        )
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+                # data must be on disk before rename makes it visible
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def supports_copy(self) -> bool:
+        return True
+
+    def copy(self, source: str, target: str) -> None:
+        """
+        Copy file using reflink (copy-on-write clone) where filesystem supports it,
+        otherwise let kernel copy data (copy_file_range/sendfile).
+
+        Hardlinks are not used, as writing to output would then modify input too.
+        """
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            try:
+                import fcntl
+
+                FICLONE = 0x40049409
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return
+            except (ImportError, OSError):
+                pass
+            if hasattr(os, "copy_file_range"):
+                size = os.fstat(src.fileno()).st_size
+                copied = 0
+                try:
+                    while copied < size:
+                        count = os.copy_file_range(
+                            src.fileno(), dst.fileno(), size - copied
+                        )
+                        if count == 0:
+                            break
+                        copied += count
+                    if copied == size:
+                        return
+                except OSError:
+                    # e.g. not supported between these filesystems
+                    pass
+        shutil.copyfile(source, target)
+
+    def get_file_info(self, path: str) -> Dict[str, Any]:
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    def get_content_hash(self, path: str) -> str:
+        content_hash = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                content_hash.update(block)
+        return content_hash.hexdigest()
+
 
 class S3Storage(AbstractFileStorage):
     """
@@ -42,30 +546,342 @@ class S3Storage(AbstractFileStorage):
 
     Tested with localstack S3 implementation only,
     which accepts *any* AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY.
+
+    With max_in_flight set, objects are downloaded ahead and uploaded
+    in background by S3TransferEngine, up to max_in_flight requests at once.
+    Outputs are uploaded while they are written, by multipart upload
+    with parts of part_size bytes.
+
+    Objects changed while watching are found by listing objects modified
+    after marker, see watch().
+
+    With cache set, downloaded objects are kept in local disk cache keyed
+    by bucket, key and ETag, so unchanged objects are downloaded once across runs.
     """
 
+    DEFAULT_PART_SIZE = 8 * 1024 * 1024
+    # objects taking longer to upload may be missed by watch()
+    WATCH_MARGIN_SECONDS = 15 * 60
+
     def __init__(
         self,
-        s3_resource: boto3.resources.base.ServiceResource,
+        # boto3 S3 ServiceResource
+        s3_resource: Any,
         bucket_name: str,
+        max_in_flight: Optional[int] = None,
+        part_size: int = DEFAULT_PART_SIZE,
+        cache: Optional[DiskCache] = None,
     ):
         self.s3_resource = s3_resource
+        self.part_size = part_size
+        self.cache = cache
         self.s3_bucket = s3_resource.Bucket(bucket_name)
+        # size and ETag of objects found by get_files()
+        self.files_info: Dict[str, Dict[str, Any]] = {}
+        self.transfers = None
+        if max_in_flight is not None:
+            self.transfers = S3TransferEngine(s3_resource.meta.client, max_in_flight)
+
+    def __getstate__(self) -> dict:
+        # boto3 resources can't be pickled, process pool workers re-create them
+        return {
+            "endpoint_url": self.s3_resource.meta.client.meta.endpoint_url,
+            "bucket_name": self.s3_bucket.name,
+            "max_in_flight": self.transfers and self.transfers.max_in_flight,
+            "part_size": self.part_size,
+            "cache": self.cache,
+            "index": self.index,
+            "index_root": self.index_root,
+            "index_pruned": self.index_pruned,
+            "files_info": self.files_info,
+        }
 
-    def get_files(self, directory: str) -> Generator[str, None, None]:
-        for file in self.s3_bucket.objects.filter(Prefix=directory):
-            yield f"s3://{self.s3_bucket.name}/{file.key}"
+    def __setstate__(self, state: dict) -> None:
+        import boto3
+
+        self.__init__(
+            boto3.resource("s3", endpoint_url=state["endpoint_url"]),
+            state["bucket_name"],
+            state["max_in_flight"],
+            state["part_size"],
+            state["cache"],
+        )
+        self.index = state["index"]
+        self.index_root = state["index_root"]
+        self.index_pruned = state["index_pruned"]
+        self.files_info = state["files_info"]
+
+    def get_files(
+        self, directory: str, listing_filter: Optional[ListingFilter] = None
+    ) -> Generator[str, None, None]:
+        """
+        Yield objects with given prefix passing listing filter,
+        all pages are listed before first object is yielded.
+        """
+        root = f"s3://{self.s3_bucket.name}/{directory}"
+        paths = []
+        pruned = []
+        self.files_info = {}
+        for s3_object in self.list_objects(directory, listing_filter, pruned):
+            path = f"s3://{self.s3_bucket.name}/{s3_object['Key']}"
+            paths.append(path)
+            if listing_filter is None or self.is_accepted(
+                s3_object, s3_object["Key"][len(directory) :], listing_filter
+            ):
+                # info of rejected objects is not kept, there may be many of them
+                self.files_info[path] = {
+                    "size": s3_object["Size"],
+                    "etag": s3_object["ETag"].strip('"'),
+                }
+        self.set_index(
+            root, paths, [f"s3://{self.s3_bucket.name}/{prefix}" for prefix in pruned]
+        )
+        yield from list(self.files_info)
+
+    def list_objects(
+        self,
+        directory: str,
+        listing_filter: Optional[ListingFilter],
+        pruned: List[str],
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Yield objects (ListObjectsV2 dicts) with given prefix.
+
+        If listing filter excludes some directories, prefixes are listed level by level
+        (with "/" delimiter) and excluded ones are not listed at all.
+        """
+        paginator = self.s3_resource.meta.client.get_paginator("list_objects_v2")
+        if listing_filter is None or not listing_filter.excluded_directories:
+            for page in paginator.paginate(Bucket=self.s3_bucket.name, Prefix=directory):
+                yield from page.get("Contents", [])
+            return
+        prefixes = deque([directory])
+        while prefixes:
+            prefix = prefixes.popleft()
+            for page in paginator.paginate(
+                Bucket=self.s3_bucket.name, Prefix=prefix, Delimiter="/"
+            ):
+                yield from page.get("Contents", [])
+                for common_prefix in page.get("CommonPrefixes", []):
+                    subdirectory = common_prefix["Prefix"]
+                    relative_path = subdirectory[len(directory) :].strip("/")
+                    if relative_path and listing_filter.prunes_directory(relative_path):
+                        pruned.append(subdirectory)
+                    else:
+                        prefixes.append(subdirectory)
+
+    def watch(
+        self,
+        directory: str,
+        listing_filter: Optional[ListingFilter] = None,
+        interval: float = 2.0,
+    ) -> Generator[List[str], None, None]:
+        """
+        Yield lists of objects created or modified since previous listing,
+        prefix is listed every interval seconds.
+
+        ListObjectsV2 can't filter by time, so all pages are listed, but only
+        objects modified after marker (newest LastModified seen minus WATCH_MARGIN_SECONDS,
+        as LastModified is time upload started) are compared with objects seen before,
+        so memory doesn't grow with number of objects under prefix.
+        """
+        marker = None
+        seen: Dict[str, Tuple[str, float]] = {}
+        first_listing = True
+        while True:
+            newest = marker
+            changed = []
+            for s3_object in self.list_objects(directory, listing_filter, []):
+                modified = s3_object["LastModified"].timestamp()
+                if marker is not None and modified < marker:
+                    continue
+                newest = modified if newest is None else max(newest, modified)
+                path = f"s3://{self.s3_bucket.name}/{s3_object['Key']}"
+                etag = s3_object["ETag"].strip('"')
+                if path in seen and seen[path][0] == etag:
+                    continue
+                seen[path] = (etag, modified)
+                if first_listing or (
+                    listing_filter is not None
+                    and not self.is_accepted(
+                        s3_object, s3_object["Key"][len(directory) :], listing_filter
+                    )
+                ):
+                    continue
+                self.files_info[path] = {"size": s3_object["Size"], "etag": etag}
+                self.add_to_index(path)
+                changed.append(path)
+            if newest is not None:
+                marker = newest - self.WATCH_MARGIN_SECONDS
+                seen = {
+                    path: (etag, modified)
+                    for path, (etag, modified) in seen.items()
+                    if modified >= marker
+                }
+            yield changed
+            first_listing = False
+            time.sleep(interval)
+
+    @staticmethod
+    def is_accepted(
+        s3_object: Dict[str, Any], relative_path: str, listing_filter: ListingFilter
+    ) -> bool:
+        return listing_filter.accepts_path(
+            relative_path.lstrip("/")
+        ) and listing_filter.accepts_info(
+            s3_object["Size"], s3_object["LastModified"].timestamp()
+        )
 
     def exists(self, path: str) -> bool:
+        if self.is_indexed(path):
+            return path in self.index
+        from botocore.exceptions import ClientError
+
         try:
             self.s3_resource.Object(
                 self.s3_bucket.name, self.full_path_to_key_name(path)
             ).load()
-        except botocore.exceptions.ClientError as e:
+        except ClientError as e:
             if e.response["Error"]["Code"] == "404":
                 return False
         return True
 
+    def get_file_info(self, path: str) -> Dict[str, Any]:
+        if path not in self.files_info:
+            s3_object = self.s3_resource.Object(
+                self.s3_bucket.name, self.full_path_to_key_name(path)
+            )
+            s3_object.load()
+            self.files_info[path] = {
+                "size": s3_object.content_length,
+                "etag": s3_object.e_tag.strip('"'),
+            }
+        return self.files_info[path]
+
+    def get_content_hash(self, path: str) -> str:
+        # ETag is computed by S3 from content, no need to download object
+        return self.get_file_info(path)["etag"]
+
+    def write_atomically(self, path: str, data: bytes) -> None:
+        # object becomes visible only once PUT of all its data succeeds
+        self.s3_resource.meta.client.put_object(
+            Bucket=self.s3_bucket.name,
+            Key=self.full_path_to_key_name(path),
+            Body=data,
+        )
+
+    def supports_copy(self) -> bool:
+        return True
+
+    def copy(self, source: str, target: str) -> None:
+        """
+        Copy object on S3 side (CopyObject, or multipart copy for big objects).
+        """
+        self.s3_resource.meta.client.copy(
+            {"Bucket": self.s3_bucket.name, "Key": self.full_path_to_key_name(source)},
+            self.s3_bucket.name,
+            self.full_path_to_key_name(target),
+        )
+
+    def prefetch(
+        self, paths: Iterable[str], skip: Optional[Callable[[str], bool]] = None
+    ) -> Generator[Tuple[str, Optional[Future]], None, None]:
+        """
+        Keep up to max_in_flight downloads of upcoming paths running,
+        objects found in cache are not downloaded.
+        """
+        if self.transfers is None and self.cache is None:
+            yield from super().prefetch(paths, skip)
+            return
+        window = deque()
+        for path in paths:
+            window.append(
+                (path, None if skip is not None and skip(path) else self.fetch(path))
+            )
+            if len(window) >= (self.transfers.max_in_flight if self.transfers else 1):
+                yield window.popleft()
+        while window:
+            yield window.popleft()
+
+    def fetch(self, path: str) -> Future:
+        """
+        Return future of object content, taken from cache if it has object with the same ETag.
+        """
+        key_name = self.full_path_to_key_name(path)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = f"{self.s3_bucket.name}/{key_name}/{self.get_file_info(path)['etag']}"
+            data = self.cache.get(cache_key)
+            if data is not None:
+                future = Future()
+                future.set_result(data)
+                return future
+        if self.transfers is not None:
+            future = self.transfers.download(self.s3_bucket.name, key_name)
+        else:
+            future = Future()
+            try:
+                future.set_result(
+                    self.s3_resource.meta.client.get_object(
+                        Bucket=self.s3_bucket.name, Key=key_name
+                    )["Body"].read()
+                )
+            except Exception as e:
+                future.set_exception(e)
+        if cache_key is None:
+            return future
+        # content is returned once it's in cache, so next fetch of it is a hit
+        cached = Future()
+        future.add_done_callback(partial(self.store_in_cache, cache_key, cached))
+        return cached
+
+    def store_in_cache(self, cache_key: str, cached: Future, future: Future) -> None:
+        if future.cancelled():
+            cached.cancel()
+            return
+        if future.exception() is not None:
+            cached.set_exception(future.exception())
+            return
+        try:
+            self.cache.put(cache_key, future.result())
+        except Exception as e:
+            # e.g. disk full, input is still processed
+            logging.warning(f"Cannot store {cache_key} in cache: {e}")
+        finally:
+            # consumer waits for cached content, so it must be resolved in any case
+            cached.set_result(future.result())
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        return self.cache.get_stats() if self.cache is not None else {}
+
+    def supports_upload(self) -> bool:
+        return self.transfers is not None
+
+    def upload(self, path: str, data: bytes) -> None:
+        self.transfers.upload(
+            self.s3_bucket.name, self.full_path_to_key_name(path), data
+        )
+
+    @contextmanager
+    def open_upload(self, path: str) -> Generator[IO, None, None]:
+        upload = self.transfers.open_upload(
+            self.s3_bucket.name, self.full_path_to_key_name(path), self.part_size
+        )
+        try:
+            yield upload
+        except BaseException:
+            upload.abort()
+            raise
+        upload.complete()
+
+    def wait_for_uploads(self, paths: Optional[Iterable[str]] = None) -> None:
+        if self.transfers is not None:
+            self.transfers.wait_for_uploads(
+                None
+                if paths is None
+                else [self.full_path_to_key_name(path) for path in paths]
+            )
+
     def full_path_to_key_name(self, path: str) -> str:
         """
         Convert s3://mybucket/full/path.txt to just full/path.txt
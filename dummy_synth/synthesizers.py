@@ -1,14 +1,62 @@
+import math
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
 import pandas as pd
+from dummy_synth import frames
 
 
 class AbstractSynthesizer(ABC):
+    # True if synthesized data is always the same as original data,
+    # DirProcessor then copies files instead of synthesizing them
+    passthrough = False
+    # True if synthesizer takes rows, rows_ratio and seed arguments
+    # (number of synthesized rows is independent of number of original rows)
+    sampling = False
+
     @abstractmethod
     def synthesize(self, ori_df: pd.DataFrame) -> pd.DataFrame:
         raise NotImplementedError()
 
+    def get_config(self) -> Dict[str, Any]:
+        """
+        Return parameters affecting synthesized data (outputs made with other ones are outdated).
+        """
+        return {}
+
+    def synthesize_table(self, ori_table):
+        """
+        Synthesize original data given as pyarrow Table, return pyarrow Table.
+
+        Default implementation converts table to DataFrame for synthesize(),
+        override it to work on Arrow data without conversion.
+        """
+        return frames.to_arrow(self.synthesize(frames.to_pandas(ori_table)))
+
+    def synthesize_frame(self, ori_frame: frames.Frame) -> frames.Frame:
+        """
+        Synthesize DataFrame or pyarrow Table, result is of the same type.
+        """
+        if frames.is_arrow(ori_frame):
+            return self.synthesize_table(ori_frame)
+        return self.synthesize(ori_frame)
+
+    def synthesize_chunks(
+        self, ori_chunks: Iterable[frames.Frame]
+    ) -> Iterator[frames.Frame]:
+        """
+        Synthesize original data given as stream of DataFrame (or pyarrow Table) chunks.
+
+        Default implementation synthesizes each chunk independently,
+        override it if synthesizer needs to see whole data first.
+        """
+        for ori_frame in ori_chunks:
+            yield self.synthesize_frame(ori_frame)
+
 
 class DummySynthesizer(AbstractSynthesizer):
+    passthrough = True
+
     def synthesize(self, ori_df: pd.DataFrame) -> pd.DataFrame:
         """Synthesizes the original data (dummy implementation).
 
@@ -16,6 +64,10 @@ class DummySynthesizer(AbstractSynthesizer):
         """
         return ori_df.copy()
 
+    def synthesize_table(self, ori_table):
+        # Arrow tables are immutable, so there's no need to copy them
+        return ori_table
+
 
 class DummySynthesizerEmptyResult(AbstractSynthesizer):
     def synthesize(self, ori_df: pd.DataFrame) -> pd.DataFrame:
@@ -24,3 +76,299 @@ class DummySynthesizerEmptyResult(AbstractSynthesizer):
         This is not a proper synthesization, just a copy of the input.
         """
         return pd.DataFrame()
+
+    def synthesize_table(self, ori_table):
+        import pyarrow as pa
+
+        return pa.table({})
+
+
+class FittedMarginals:
+    """
+    Per-column distributions of original data, fitted by SamplingSynthesizer.
+
+    Numeric (and datetime) columns keep sorted values of uniform row sample
+    (empirical quantile function) and share of missing values,
+    categorical columns keep frequency of each value (missing values included).
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: List[str] = []
+        self.dtypes: Dict[str, object] = {}
+        self.numeric_columns: List[str] = []
+        self.null_counts: Dict[str, int] = {}
+        self.value_counts: Dict[str, pd.Series] = {}
+        self.sorted_values: Dict[str, np.ndarray] = {}
+        # lower triangular matrix of Gaussian copula of numeric columns
+        self.copula: Optional[np.ndarray] = None
+
+
+class SamplingSynthesizer(AbstractSynthesizer):
+    """
+    Synthesize data by sampling each column from its fitted marginal distribution.
+
+    Numeric columns are sampled from empirical distribution (values of at most
+    max_fit_rows uniformly sampled rows), categorical ones from frequency table.
+    With correlations set, rank correlations of numeric columns are kept
+    by Gaussian copula.
+
+    Number of synthesized rows is rows if given, rows_ratio * original rows otherwise.
+    Rows are generated in vectorized batches of batch_rows from generator seeded by seed,
+    so the same data and parameters (see get_config()) give the same result,
+    however data is chunked, and synthesize_chunks() never holds more than
+    one batch of synthesized rows.
+    """
+
+    sampling = True
+
+    def __init__(
+        self,
+        rows: Optional[int] = None,
+        rows_ratio: float = 1.0,
+        seed: int = 0,
+        correlations: bool = True,
+        batch_rows: int = 100_000,
+        max_fit_rows: int = 1_000_000,
+    ):
+        if rows is not None and rows < 0:
+            raise Exception(f"Number of rows must not be negative, got {rows}.")
+        if rows_ratio < 0:
+            raise Exception(f"Rows ratio must not be negative, got {rows_ratio}.")
+        self.rows = rows
+        self.rows_ratio = rows_ratio
+        self.seed = seed
+        self.correlations = correlations
+        self.batch_rows = batch_rows
+        self.max_fit_rows = max_fit_rows
+
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "rows_ratio": self.rows_ratio,
+            "seed": self.seed,
+            "correlations": self.correlations,
+            "batch_rows": self.batch_rows,
+            "max_fit_rows": self.max_fit_rows,
+        }
+
+    def synthesize(self, ori_df: pd.DataFrame) -> pd.DataFrame:
+        return pd.concat(list(self.synthesize_chunks([ori_df])), ignore_index=True)
+
+    def synthesize_chunks(
+        self, ori_chunks: Iterable[frames.Frame]
+    ) -> Iterator[frames.Frame]:
+        """
+        Fit marginals on all original chunks, then yield synthesized batches
+        (at least one, possibly empty), Tables if original chunks are Tables.
+        """
+        rng = np.random.default_rng(self.seed)
+        chunk_types = set()
+
+        def to_pandas(chunks):
+            for chunk in chunks:
+                chunk_types.add(frames.is_arrow(chunk))
+                yield frames.to_pandas(chunk)
+
+        marginals = self.fit(to_pandas(ori_chunks), rng)
+        rows = self.get_rows(marginals.rows)
+        for offset in range(0, max(rows, 1), self.batch_rows):
+            batch = self.sample(marginals, min(self.batch_rows, rows - offset), rng)
+            if chunk_types == {True}:
+                yield frames.to_arrow(batch)
+            else:
+                yield batch
+
+    def get_rows(self, ori_rows: int) -> int:
+        if self.rows is not None:
+            return self.rows
+        return int(round(ori_rows * self.rows_ratio))
+
+    def fit(
+        self, ori_chunks: Iterable[pd.DataFrame], rng: np.random.Generator
+    ) -> FittedMarginals:
+        marginals = FittedMarginals()
+        # uniform sample of numeric values: rows with max_fit_rows lowest random keys
+        sample = np.empty((0, 0))
+        sample_keys = np.empty(0)
+        for ori_df in ori_chunks:
+            if not marginals.columns:
+                marginals.columns = list(ori_df.columns)
+                marginals.dtypes = dict(ori_df.dtypes)
+                marginals.numeric_columns = [
+                    column
+                    for column, dtype in marginals.dtypes.items()
+                    if is_numeric_dtype(dtype)
+                ]
+                sample = np.empty((0, len(marginals.numeric_columns)))
+            marginals.rows += len(ori_df)
+            for column in marginals.columns:
+                if column in marginals.numeric_columns:
+                    continue
+                counts = ori_df[column].value_counts(dropna=False)
+                previous = marginals.value_counts.get(column)
+                marginals.value_counts[column] = (
+                    counts if previous is None else previous.add(counts, fill_value=0)
+                )
+            values = get_numeric_values(ori_df, marginals.numeric_columns)
+            for i, column in enumerate(marginals.numeric_columns):
+                null_count = int(np.isnan(values[:, i]).sum())
+                marginals.null_counts[column] = (
+                    marginals.null_counts.get(column, 0) + null_count
+                )
+            sample = np.concatenate([sample, values])
+            sample_keys = np.concatenate([sample_keys, rng.random(len(values))])
+            if len(sample_keys) > self.max_fit_rows:
+                kept = np.argpartition(sample_keys, self.max_fit_rows)[
+                    : self.max_fit_rows
+                ]
+                sample, sample_keys = sample[kept], sample_keys[kept]
+
+        # fitted marginals mustn't depend on how original data was chunked,
+        # so sampled rows are ordered by their keys and values of columns by their text
+        sample = sample[np.argsort(sample_keys, kind="stable")]
+        for column, counts in marginals.value_counts.items():
+            labels = counts.index.map(str).to_numpy(dtype=object)
+            order = np.argsort(labels, kind="stable")
+            marginals.value_counts[column] = counts.iloc[order].astype("int64")
+        for i, column in enumerate(marginals.numeric_columns):
+            column_values = sample[:, i]
+            marginals.sorted_values[column] = np.sort(
+                column_values[~np.isnan(column_values)]
+            )
+        if self.correlations and len(marginals.numeric_columns) > 1 and len(sample) > 1:
+            marginals.copula = get_copula(sample)
+        return marginals
+
+    def sample(
+        self, marginals: FittedMarginals, rows: int, rng: np.random.Generator
+    ) -> pd.DataFrame:
+        if marginals.copula is not None:
+            normal = rng.standard_normal((rows, len(marginals.numeric_columns)))
+            uniform = normal_cdf(normal @ marginals.copula.T)
+        else:
+            uniform = rng.random((rows, len(marginals.numeric_columns)))
+        columns = {}
+        for column in marginals.columns:
+            dtype = marginals.dtypes[column]
+            if column in marginals.numeric_columns:
+                i = marginals.numeric_columns.index(column)
+                null_share = marginals.null_counts[column] / max(marginals.rows, 1)
+                values = sample_numeric(
+                    marginals.sorted_values[column], uniform[:, i], null_share, rng
+                )
+                columns[column] = from_numeric_values(values, dtype)
+            else:
+                counts = marginals.value_counts.get(column)
+                if counts is None or not counts.sum():
+                    # no original rows, all values are missing
+                    values = pd.Series([None] * rows, dtype=object)
+                else:
+                    cdf = np.cumsum(counts.to_numpy(dtype="float64"))
+                    indexes = np.searchsorted(cdf, rng.random(rows) * cdf[-1], "right")
+                    values = pd.Series(counts.index.to_numpy(dtype=object)[indexes])
+                try:
+                    columns[column] = values.astype(dtype)
+                except (TypeError, ValueError):
+                    # e.g. bool column with missing values
+                    columns[column] = values
+        return pd.DataFrame(columns, columns=marginals.columns)
+
+
+def is_numeric_dtype(dtype) -> bool:
+    return (
+        pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+    ) or pd.api.types.is_datetime64_any_dtype(dtype)
+
+
+def get_numeric_values(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """
+    Return columns as float matrix (datetimes as nanoseconds), missing values are NaN.
+    """
+    values = np.empty((len(df), len(columns)))
+    for i, column in enumerate(columns):
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            nulls = series.isna().to_numpy()
+            ints = series.dt.tz_localize(None) if series.dt.tz else series
+            values[:, i] = ints.to_numpy("datetime64[ns]").view("int64")
+            values[nulls, i] = np.nan
+        else:
+            values[:, i] = pd.to_numeric(series, errors="coerce").to_numpy(
+                dtype="float64", na_value=np.nan
+            )
+    return values
+
+
+def from_numeric_values(values: np.ndarray, dtype) -> pd.Series:
+    """
+    Return float values (NaN is missing value) as Series of dtype of original column.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        nulls = np.isnan(values)
+        ints = np.where(nulls, 0, np.round(values)).astype("int64")
+        series = pd.Series(ints.view("datetime64[ns]"))
+        series[nulls] = pd.NaT
+        tz = getattr(dtype, "tz", None)
+        return series.dt.tz_localize(tz) if tz else series
+    if pd.api.types.is_integer_dtype(dtype):
+        values = np.round(values)
+        if np.isnan(values).any() and not isinstance(dtype, pd.api.extensions.ExtensionDtype):
+            # missing values in numpy integer column, fall back to nullable integers
+            return pd.Series(values).astype("Int64")
+    return pd.Series(values).astype(dtype)
+
+
+def sample_numeric(
+    sorted_values: np.ndarray,
+    uniform: np.ndarray,
+    null_share: float,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Map uniform values through empirical quantile function of sorted_values,
+    replace null_share of them with NaN.
+    """
+    if not len(sorted_values):
+        return np.full(len(uniform), np.nan)
+    indexes = np.minimum(
+        (uniform * len(sorted_values)).astype(np.int64), len(sorted_values) - 1
+    )
+    values = sorted_values[indexes]
+    if null_share:
+        values[rng.random(len(values)) < null_share] = np.nan
+    return values
+
+
+def get_copula(sample: np.ndarray) -> np.ndarray:
+    """
+    Return Cholesky factor of Gaussian copula correlation matrix of sample columns,
+    fitted from their Spearman rank correlations.
+    """
+    # missing values get average rank, so they don't add correlation
+    ranks = pd.DataFrame(sample).rank().fillna((len(sample) + 1) / 2).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spearman = np.corrcoef(ranks, rowvar=False)
+    spearman = np.nan_to_num(spearman)
+    correlation = 2 * np.sin(math.pi * spearman / 6)
+    np.fill_diagonal(correlation, 1.0)
+    # nearest positive definite matrix with unit diagonal
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+    correlation = (eigenvectors * np.maximum(eigenvalues, 1e-6)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(correlation))
+    correlation = correlation / np.outer(scale, scale)
+    return np.linalg.cholesky(correlation)
+
+
+def normal_cdf(x: np.ndarray) -> np.ndarray:
+    """
+    Standard normal CDF (erf approximation by Abramowitz & Stegun 7.1.26, error < 1.5e-7).
+    """
+    z = np.abs(x) / math.sqrt(2)
+    t = 1 / (1 + 0.3275911 * z)
+    polynomial = t * (
+        0.254829592
+        + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429)))
+    )
+    erf = 1 - polynomial * np.exp(-z * z)
+    return 0.5 * (1 + np.sign(x) * erf)
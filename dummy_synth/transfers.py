@@ -0,0 +1,217 @@
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class S3TransferEngine:
+    """
+    Runs S3 downloads and uploads concurrently,
+    with at most max_in_flight requests running at once.
+
+    boto3 clients are synchronous (but thread safe),
+    so requests are run by thread pool and represented by futures.
+    Submitting new request blocks while max_in_flight requests are running.
+    """
+
+    def __init__(self, s3_client: Any, max_in_flight: int = 16):
+        if max_in_flight < 1:
+            raise Exception(
+                f"Number of requests in flight must be at least 1, got {max_in_flight}."
+            )
+        self.s3_client = s3_client
+        self.max_in_flight = max_in_flight
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        # running uploads and keys of their objects
+        self.uploads: Dict[Future, str] = {}
+        self.uploads_lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def download(self, bucket: str, key: str) -> Future:
+        """
+        Start download of object, returns future of its content (bytes).
+        """
+        return self.submit(self.get_object_bytes, bucket, key)
+
+    def upload(self, bucket: str, key: str, data: bytes) -> Future:
+        """
+        Start upload of data as object, use wait_for_uploads() to make sure it's done.
+        """
+        future = self.submit(self.put_object_bytes, bucket, key, data)
+        with self.uploads_lock:
+            self.uploads[future] = key
+        return future
+
+    def wait_for_uploads(self, keys: Optional[Iterable[str]] = None) -> None:
+        """
+        Block until started uploads of given keys (or all uploads) finish,
+        re-raise first upload error.
+        """
+        with self.uploads_lock:
+            if keys is None:
+                uploads, self.uploads = self.uploads, {}
+            else:
+                keys = set(keys)
+                uploads = [
+                    future for future, key in self.uploads.items() if key in keys
+                ]
+                for future in uploads:
+                    del self.uploads[future]
+        errors = [future.exception() for future in uploads]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def open_upload(
+        self, bucket: str, key: str, part_size: int = 8 * 1024 * 1024
+    ) -> "MultipartUpload":
+        """
+        Return file object uploading data written to it in parts, see MultipartUpload.
+        """
+        return MultipartUpload(self, bucket, key, part_size)
+
+    def get_object_bytes(self, bucket: str, key: str) -> bytes:
+        return self.s3_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+
+    def put_object_bytes(self, bucket: str, key: str, data: bytes) -> None:
+        self.s3_client.put_object(Bucket=bucket, Key=key, Body=data)
+
+    def upload_part_bytes(
+        self, bucket: str, key: str, upload_id: str, part_number: int, data: bytes
+    ) -> str:
+        response = self.s3_client.upload_part(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        return response["ETag"]
+
+
+class MultipartUpload(io.RawIOBase):
+    """
+    Writable file object, which uploads data to S3 object in parts as they fill up.
+
+    Parts are uploaded by S3TransferEngine in parallel with serialization of next parts,
+    writing blocks while engine has max_in_flight requests running,
+    so memory stays at about part_size * (max_in_flight + 1).
+    Data smaller than part_size is uploaded as single object in background
+    (see S3TransferEngine.wait_for_uploads()).
+
+    complete() must be called after all data is written, abort() on failure
+    (multipart upload is aborted, so no parts are left behind).
+    Part size doubles every 1000 parts, to stay within S3 limit of 10000 parts.
+    """
+
+    MIN_PART_SIZE = 5 * 1024 * 1024
+    PARTS_PER_SIZE = 1000
+
+    def __init__(self, engine: S3TransferEngine, bucket: str, key: str, part_size: int):
+        if part_size < self.MIN_PART_SIZE:
+            raise Exception(
+                f"S3 part size must be at least {self.MIN_PART_SIZE} bytes, got {part_size}."
+            )
+        self.engine = engine
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.buffer = bytearray()
+        self.upload_id: Optional[str] = None
+        # futures of ETags of uploaded parts
+        self.parts: List[Future] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.size
+
+    def close(self) -> None:
+        # writers may close file object, upload is finished by complete()/abort()
+        pass
+
+    def write(self, data) -> int:
+        self.raise_part_error()
+        self.buffer += data
+        written = memoryview(data).nbytes
+        self.size += written
+        while len(self.buffer) >= self.part_size:
+            part = bytes(self.buffer[: self.part_size])
+            del self.buffer[: self.part_size]
+            self.upload_part(part)
+        return written
+
+    def upload_part(self, data: bytes) -> None:
+        if self.upload_id is None:
+            self.upload_id = self.engine.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )["UploadId"]
+        self.parts.append(
+            self.engine.submit(
+                self.engine.upload_part_bytes,
+                self.bucket,
+                self.key,
+                self.upload_id,
+                len(self.parts) + 1,
+                data,
+            )
+        )
+        if len(self.parts) % self.PARTS_PER_SIZE == 0:
+            self.part_size *= 2
+
+    def raise_part_error(self) -> None:
+        """
+        Re-raise error of any failed part upload, so writing stops early.
+        """
+        for part in self.parts:
+            if part.done() and part.exception() is not None:
+                raise part.exception()
+
+    def complete(self) -> None:
+        if self.upload_id is None:
+            self.engine.upload(self.bucket, self.key, bytes(self.buffer))
+            self.buffer = bytearray()
+            return
+        try:
+            if self.buffer:
+                self.upload_part(bytes(self.buffer))
+                self.buffer = bytearray()
+            etags = [part.result() for part in self.parts]
+            self.engine.s3_client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={
+                    "Parts": [
+                        {"ETag": etag, "PartNumber": i + 1}
+                        for i, etag in enumerate(etags)
+                    ]
+                },
+            )
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self) -> None:
+        self.buffer = bytearray()
+        if self.upload_id is None:
+            return
+        # parts still running would be stored after abort, so let them finish first
+        for part in self.parts:
+            part.exception()
+        self.engine.s3_client.abort_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+        )
+        self.upload_id = None
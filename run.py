@@ -1,3 +1,4 @@
+import cProfile
 import logging
 import sys
 from dummy_synth.arg_parsers import CommandlineArgumentParserFactory
@@ -26,11 +27,29 @@ if __name__ == "__main__":
 
     if args.debug:
         logging.basicConfig(level=logging.DEBUG)
+    elif args.watch is not None:
+        # report files processed while watching
+        logging.basicConfig(level=logging.INFO)
 
+    profiler = cProfile.Profile() if args.profile else None
     try:
-        files_count = args.get_processor(args).process()
+        processor = args.get_processor(args)
+        if profiler is not None:
+            profiler.enable()
+        files_count = processor.process()
     except Exception as e:
         # logging.exception(e)
         print(f"Stopping due to error: {e}")
         sys.exit(1)
-    print(f"Files processed: {files_count}")
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+    print(f"Files {'queued' if args.plan else 'processed'}: {files_count}")
+    if processor.timings.seconds:
+        print("Time spent per stage:")
+        print(processor.timings.format_summary())
+    if args.metrics_out:
+        print(f"Metrics written to {args.metrics_out}")
+    if args.profile:
+        print(f"Profile written to {args.profile} (view with: python -m pstats {args.profile})")
@@ -0,0 +1,47 @@
+import os
+import pickle
+from dummy_synth.caches import DiskCache
+
+
+def test__disk_cache__get__returns_put_data_and_counts_hits_and_misses(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=100)
+    assert cache.get("bucket/a.csv/etag1") is None
+    cache.put("bucket/a.csv/etag1", b"abc")
+    assert cache.get("bucket/a.csv/etag1") == b"abc"
+    # other process sees the same entries, but has its own counters
+    assert pickle.loads(pickle.dumps(cache)).get("bucket/a.csv/etag1") == b"abc"
+    assert cache.get("bucket/a.csv/etag2") is None
+    assert cache.get_stats() == {"hits": 1, "misses": 2, "evictions": 0}
+
+
+def test__disk_cache__put__evicts_least_recently_used_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=25)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, b"x" * 10)
+        os.utime(cache.get_entry_path(key), ns=(i * 10**9, i * 10**9))
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get("a") is None
+    # using "b" makes "c" the least recently used
+    cache.get("b")
+    cache.put("d", b"x" * 10)
+    assert cache.get("c") is None
+    assert cache.get("b") == cache.get("d") == b"x" * 10
+    assert cache.get_stats()["evictions"] == 2
+    # too big to cache
+    cache.put("e", b"x" * 30)
+    assert cache.get("e") is None
+
+
+def test__disk_cache__put__scans_directory_only_when_over_max_bytes(tmp_path, mocker):
+    cache = DiskCache(str(tmp_path), max_bytes=100)
+    scandir = mocker.spy(os, "scandir")
+    for i in range(10):
+        cache.put(str(i), b"x" * 10)
+    # first put only
+    assert scandir.call_count == 1
+    cache.put("10", b"x" * 10)
+    assert scandir.call_count == 2
+    # evicted down to 90 bytes, so next put fits again
+    assert cache.get_stats()["evictions"] == 2
+    cache.put("11", b"x" * 10)
+    assert scandir.call_count == 2
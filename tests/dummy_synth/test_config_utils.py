@@ -0,0 +1,34 @@
+import sys
+import pytest
+from dummy_synth.config_utils import Backends, BackendType, import_object
+
+
+def test__backends__get_backed_instance__imports_dotted_path_on_first_use():
+    backends = Backends(
+        {
+            BackendType.STORAGE: {
+                "LocalDirectoryStorage": "dummy_synth.storages.LocalDirectoryStorage"
+            }
+        }
+    )
+    from dummy_synth.storages import LocalDirectoryStorage
+
+    storage = backends.get_backed_instance(BackendType.STORAGE, "LocalDirectoryStorage")
+    assert isinstance(storage, LocalDirectoryStorage)
+    assert (
+        backends.get_raw_config(BackendType.STORAGE)["LocalDirectoryStorage"]
+        is LocalDirectoryStorage
+    )
+
+
+def test__backends__get_supported_backends__doesnt_import_backends():
+    backends = Backends(
+        {BackendType.STORAGE: {"Missing": "not_installed_module.Storage"}}
+    )
+    assert list(backends.get_supported_backends(BackendType.STORAGE)) == ["Missing"]
+    assert "not_installed_module" not in sys.modules
+
+
+def test__import_object__raises_for_missing_module():
+    with pytest.raises(Exception, match="Cannot import not_installed_module.Storage"):
+        import_object("not_installed_module.Storage")
@@ -0,0 +1,173 @@
+import pytest
+import pandas as pd
+from dummy_synth.dataframe_io import CsvIO, ParquetStreamIO
+
+
+@pytest.fixture
+def input_data_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {"col1": "A", "col2": 1},
+            {"col1": "B", "col2": 2},
+            {"col1": "C", "col2": 3},
+        ]
+    )
+
+
+@pytest.fixture
+def csv_io() -> CsvIO:
+    return CsvIO()
+
+
+def test__csv_io__read_chunks__returns_chunks_of_expected_size(
+    tmp_path, csv_io, input_data_frame
+):
+    csv_io.write(input_data_frame, str(tmp_path / "a.csv"))
+    chunks = list(csv_io.read_chunks(str(tmp_path / "a.csv"), 2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert pd.concat(chunks).equals(input_data_frame)
+
+
+def test__csv_io__write_chunks__writes_same_file_as_write(
+    tmp_path, csv_io, input_data_frame
+):
+    csv_io.write(input_data_frame, str(tmp_path / "a.csv"))
+    csv_io.write_chunks(
+        [input_data_frame[:2], input_data_frame[2:]], str(tmp_path / "b.csv")
+    )
+    assert (tmp_path / "a.csv").read_text() == (tmp_path / "b.csv").read_text()
+
+
+def test__csv_io__write_chunks__writes_empty_file_for_no_chunks(tmp_path, csv_io):
+    csv_io.write(pd.DataFrame(), str(tmp_path / "a.csv"))
+    csv_io.write_chunks([], str(tmp_path / "b.csv"))
+    assert (tmp_path / "a.csv").read_text() == (tmp_path / "b.csv").read_text()
+
+
+def test__parquet_stream_io__read_chunks__returns_row_groups(tmp_path, input_data_frame):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pq.write_table(
+        pa.Table.from_pandas(input_data_frame), str(tmp_path / "a.parquet"), row_group_size=2
+    )
+    chunks = list(ParquetStreamIO().read_chunks(str(tmp_path / "a.parquet"), None))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert pd.concat(chunks, ignore_index=True).equals(input_data_frame)
+
+
+def test__parquet_stream_io__write_chunks__writes_all_chunks(tmp_path, input_data_frame):
+    parquet_io = ParquetStreamIO()
+    parquet_io.write_chunks(
+        [input_data_frame[:2], input_data_frame[2:]], str(tmp_path / "a.parquet")
+    )
+    assert parquet_io.read(str(tmp_path / "a.parquet")).equals(input_data_frame)
+
+
+def test__parquet_io__estimate_memory__uses_row_count_and_types_from_footer(
+    tmp_path, input_data_frame
+):
+    from dummy_synth.dataframe_io import ParquetIO
+
+    path = str(tmp_path / "a.parquet")
+    big_frame = pd.concat([input_data_frame] * 1000, ignore_index=True)
+    ParquetIO().write(big_frame, path)
+    size = (tmp_path / "a.parquet").stat().st_size
+    estimate = ParquetIO().estimate_memory(path, size)
+    # repeated values compress well, decoded frame is much bigger than file
+    assert estimate > 5 * size
+    assert estimate >= big_frame.memory_usage(deep=True).sum()
+    assert ParquetIO().estimate_memory("s3://bucket/a.parquet", size) == 5 * size
+
+
+def test__read_ahead__returns_all_items_and_reraises_errors():
+    from dummy_synth.dataframe_io import read_ahead
+
+    assert list(read_ahead(range(5))) == [0, 1, 2, 3, 4]
+
+    def failing():
+        yield 1
+        raise ValueError("broken")
+
+    with pytest.raises(ValueError, match="broken"):
+        list(read_ahead(failing()))
+
+
+def test__arrow_csv_io__read__returns_same_data_as_csv_io(tmp_path, input_data_frame):
+    from dummy_synth.dataframe_io import ArrowCsvIO
+
+    CsvIO().write(input_data_frame, str(tmp_path / "a.csv"))
+    arrow_csv_io = ArrowCsvIO(schema_cache_dir=str(tmp_path / "schemas"))
+    assert arrow_csv_io.read(str(tmp_path / "a.csv")).equals(input_data_frame)
+    # second read uses cached schema
+    assert arrow_csv_io.schema_cache.get(str(tmp_path / "a.csv")) is not None
+    assert arrow_csv_io.read(str(tmp_path / "a.csv")).equals(input_data_frame)
+
+
+def test__arrow_csv_io__read__ignores_schema_cached_for_changed_file(
+    tmp_path, input_data_frame
+):
+    from dummy_synth.dataframe_io import ArrowCsvIO
+
+    arrow_csv_io = ArrowCsvIO(schema_cache_dir=str(tmp_path / "schemas"))
+    arrow_csv_io.write(input_data_frame, str(tmp_path / "a.csv"))
+    changed_df = input_data_frame.assign(col2=["x", "y", "z"])
+    CsvIO().write(changed_df, str(tmp_path / "a.csv"))
+    assert arrow_csv_io.read(str(tmp_path / "a.csv")).equals(changed_df)
+
+
+def test__arrow_parquet_io__read__returns_arrow_table(tmp_path, input_data_frame):
+    import pyarrow as pa
+    from dummy_synth.dataframe_io import ArrowParquetIO
+
+    arrow_parquet_io = ArrowParquetIO()
+    arrow_parquet_io.write(input_data_frame, str(tmp_path / "a.parquet"))
+    table = arrow_parquet_io.read(str(tmp_path / "a.parquet"))
+    assert isinstance(table, pa.Table)
+    assert table.to_pandas().equals(input_data_frame)
+
+
+def test__feather_io__write_and_read__keeps_data_and_dtypes(tmp_path, input_data_frame):
+    import pyarrow as pa
+    from dummy_synth.dataframe_io import FeatherIO
+
+    feather_io = FeatherIO()
+    feather_io.write_chunks(
+        [input_data_frame[:2], input_data_frame[2:]], str(tmp_path / "a.arrow")
+    )
+    table = feather_io.read(str(tmp_path / "a.arrow"))
+    assert isinstance(table, pa.Table)
+    assert table.to_pandas().equals(input_data_frame)
+    chunks = list(feather_io.read_chunks(str(tmp_path / "a.arrow"), 1))
+    assert [chunk.num_rows for chunk in chunks] == [1, 1, 1]
+
+
+def test__arrow_csv_io__read_chunks__falls_back_to_pandas_for_types_not_in_first_block(
+    tmp_path,
+):
+    from dummy_synth.dataframe_io import ArrowCsvIO
+
+    # first block of pyarrow reader (1 MB) has ints only
+    values = [*range(300_000), 1.5]
+    (tmp_path / "a.csv").write_text("".join(f"{value}\n" for value in ["col1", *values]))
+    arrow_csv_io = ArrowCsvIO(schema_cache_dir=str(tmp_path / "schemas"))
+    chunks = list(arrow_csv_io.read_chunks(str(tmp_path / "a.csv"), 100_000))
+    assert pd.concat(chunks, ignore_index=True)["col1"].tolist() == values
+
+
+def test__arrow_csv_io__read__uses_csv_io_kwargs(tmp_path, input_data_frame):
+    from dummy_synth.dataframe_io import ArrowCsvIO
+
+    arrow_csv_io = ArrowCsvIO(schema_cache_dir=str(tmp_path / "schemas"), sep=";")
+    arrow_csv_io.write(input_data_frame, str(tmp_path / "a.csv"))
+    assert (tmp_path / "a.csv").read_text().startswith("col1;col2")
+    assert arrow_csv_io.read(str(tmp_path / "a.csv")).equals(input_data_frame)
+    chunks = list(arrow_csv_io.read_chunks(str(tmp_path / "a.csv"), 2))
+    assert pd.concat(chunks, ignore_index=True).equals(input_data_frame)
+
+
+def test__arrow_csv_io__init__rejects_kwargs_not_supported_by_reader(tmp_path):
+    from dummy_synth.dataframe_io import ArrowCsvIO
+
+    with pytest.raises(Exception, match="na_rep"):
+        ArrowCsvIO(schema_cache_dir=str(tmp_path / "schemas"), na_rep="-")
@@ -47,3 +47,253 @@ def test__constant_evaluator__evaluate__returns_expected_value(
     assert list(result.columns) == ["utility score", "privacy score"]
     assert result["utility score"][0] == 0
     assert result["privacy score"][0] == 1
+
+
+@pytest.fixture
+def statistical_evaluator():
+    from dummy_synth.evaluators import StatisticalEvaluator
+
+    return StatisticalEvaluator(bins=4)
+
+
+@pytest.fixture
+def mixed_data_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "num": [1.0, 2.0, 3.0, 4.0],
+            "int": [1, 1, 2, 2],
+            "cat": ["a", "a", "b", "b"],
+        }
+    )
+
+
+def test__statistical_evaluator__evaluate__same_data_has_full_utility(
+    statistical_evaluator, mixed_data_frame
+):
+    result = statistical_evaluator.evaluate(mixed_data_frame, mixed_data_frame)
+    assert list(result["column"]) == ["num", "int", "cat", "*"]
+    assert list(result["type"][:3]) == ["numeric", "numeric", "categorical"]
+    assert (result["utility score"] == 1).all()
+    assert (result["ks_statistic"][:2] == 0).all()
+    assert result["total_variation_distance"][2] == 0
+
+
+def test__statistical_evaluator__evaluate__returns_distances_of_columns(
+    statistical_evaluator, mixed_data_frame
+):
+    syn_df = pd.DataFrame(
+        {
+            "num": [3.0, 4.0, 5.0, 6.0],
+            "int": [1, 2, 2, 1],
+            "cat": ["a", "b", "b", "b"],
+        }
+    )
+    result = statistical_evaluator.evaluate(mixed_data_frame, syn_df).set_index(
+        "column"
+    )
+    assert result["ks_statistic"]["num"] == 0.5
+    assert result["histogram_distance"]["num"] == 0.5
+    assert result["ks_statistic"]["int"] == 0
+    assert result["total_variation_distance"]["cat"] == 0.25
+    assert result["utility score"]["cat"] == 0.75
+    assert 0 < result["utility score"]["*"] < 1
+
+
+def test__statistical_evaluator__evaluate__missing_column_has_zero_utility(
+    statistical_evaluator, mixed_data_frame
+):
+    result = statistical_evaluator.evaluate(
+        mixed_data_frame, mixed_data_frame.drop(columns=["cat"])
+    ).set_index("column")
+    assert result["utility score"]["cat"] == 0
+    assert result["utility score"]["num"] == 1
+
+
+def test__statistical_evaluator__evaluate_frames__arrow_tables_give_same_result(
+    statistical_evaluator, mixed_data_frame
+):
+    import pyarrow as pa
+
+    syn_df = mixed_data_frame.assign(
+        num=[1.0, None, 2.0, 8.0], cat=["a", "c", "b", "b"]
+    )
+    pandas_result = statistical_evaluator.evaluate(mixed_data_frame, syn_df)
+    arrow_result = statistical_evaluator.evaluate_frames(
+        pa.Table.from_pandas(mixed_data_frame), pa.Table.from_pandas(syn_df)
+    )
+    pd.testing.assert_frame_equal(arrow_result, pandas_result)
+
+
+@pytest.fixture
+def datetime_data_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "time": pd.to_datetime(["2024-01-01", "2024-01-02", None, "2024-03-01"]),
+            "cat": ["a", None, "b", "b"],
+        }
+    )
+
+
+def test__combined_evaluator__evaluate_frames__pandas_and_arrow_data_match(
+    datetime_data_frame,
+):
+    import pyarrow as pa
+    from dummy_synth.evaluators import (
+        CombinedEvaluator,
+        SketchEvaluator,
+        StatisticalEvaluator,
+    )
+
+    evaluator = CombinedEvaluator(
+        {
+            "StatisticalEvaluator": StatisticalEvaluator(),
+            "SketchEvaluator": SketchEvaluator(),
+        }
+    )
+    result = evaluator.evaluate_frames(
+        datetime_data_frame, pa.Table.from_pandas(datetime_data_frame)
+    )
+    assert list(result["type"][:2]) == ["numeric", "categorical"]
+    assert (result["utility score"] == 1).all()
+
+
+def test__sketch_evaluator__evaluate_chunks__pandas_and_arrow_chunks_match(
+    datetime_data_frame,
+):
+    import pyarrow as pa
+    from dummy_synth.evaluators import SketchEvaluator
+
+    result = SketchEvaluator().evaluate_chunks(
+        [datetime_data_frame], [pa.Table.from_pandas(datetime_data_frame)]
+    )
+    assert list(result["type"][:2]) == ["numeric", "categorical"]
+    assert result["ks_statistic"][0] == 0
+    assert (result["utility score"] == 1).all()
+
+
+def test__total_variation_distance__missing_values_of_pandas_and_arrow_match(
+    datetime_data_frame,
+):
+    import pyarrow as pa
+    from dummy_synth.evaluators import get_value_frequencies, total_variation_distance
+
+    table = pa.Table.from_pandas(datetime_data_frame)
+    distance = total_variation_distance(
+        get_value_frequencies(datetime_data_frame, "cat"),
+        get_value_frequencies(table, "cat"),
+    )
+    assert distance == 0
+    # missing value is counted as value of its own
+    other_table = table.set_column(1, "cat", pa.array(["a", "b", "b", "b"]))
+    distance = total_variation_distance(
+        get_value_frequencies(datetime_data_frame, "cat"),
+        get_value_frequencies(other_table, "cat"),
+    )
+    assert distance == 0.25
+
+
+@pytest.fixture
+def sketch_evaluator():
+    from dummy_synth.evaluators import SketchEvaluator
+
+    return SketchEvaluator()
+
+
+def test__sketch_evaluator__evaluate__same_data_has_full_utility(
+    sketch_evaluator, mixed_data_frame
+):
+    result = sketch_evaluator.evaluate(mixed_data_frame, mixed_data_frame)
+    assert list(result["column"]) == ["num", "int", "cat", "*"]
+    assert list(result["type"][:3]) == ["numeric", "numeric", "categorical"]
+    assert (result["utility score"] == 1).all()
+    assert (result["distinct_ratio"] == 1).all()
+
+
+def test__sketch_evaluator__evaluate_chunks__equals_evaluate_of_whole_frames(
+    sketch_evaluator, mixed_data_frame
+):
+    syn_df = pd.DataFrame(
+        {
+            "num": [3.0, 4.0, 5.0, None],
+            "int": [1, 2, 2, 1],
+            "cat": ["a", "b", "b", "b"],
+        }
+    )
+    result = sketch_evaluator.evaluate_chunks(
+        [mixed_data_frame[:1], mixed_data_frame[1:]], [syn_df[:3], syn_df[3:]]
+    )
+    pd.testing.assert_frame_equal(
+        result, sketch_evaluator.evaluate(mixed_data_frame, syn_df)
+    )
+    result = result.set_index("column")
+    assert result["ks_statistic"]["num"] == 0.5
+    assert result["null_share_difference"]["num"] == 0.25
+    assert result["total_variation_distance"]["cat"] == 0.25
+
+
+def test__sketch_evaluator__evaluate__missing_column_has_zero_utility(
+    sketch_evaluator, mixed_data_frame
+):
+    result = sketch_evaluator.evaluate(
+        mixed_data_frame, mixed_data_frame.drop(columns=["cat"])
+    ).set_index("column")
+    assert result["utility score"]["cat"] == 0
+    assert result["utility score"]["num"] == 1
+
+
+def test__abstract_evaluator__evaluate_chunks__concatenates_chunks(
+    mocker, constant_evaluator, input_data_frame
+):
+    evaluate = mocker.spy(constant_evaluator, "evaluate")
+    constant_evaluator.evaluate_chunks(
+        [input_data_frame[:1], input_data_frame[1:]], [input_data_frame]
+    )
+    assert evaluate.call_args[0][0].equals(input_data_frame)
+
+
+def test__combined_evaluator__evaluate__concatenates_results_of_evaluators(
+    statistical_evaluator, sketch_evaluator, constant_evaluator, mixed_data_frame
+):
+    from dummy_synth.evaluators import CombinedEvaluator
+
+    evaluator = CombinedEvaluator(
+        {
+            "statistical": statistical_evaluator,
+            "sketch": sketch_evaluator,
+            "constant": constant_evaluator,
+        }
+    )
+    result = evaluator.evaluate(mixed_data_frame, mixed_data_frame)
+    assert list(result["evaluator"]) == ["statistical"] * 4 + ["sketch"] * 4 + [
+        "constant"
+    ]
+    assert result.columns[0] == "evaluator"
+    assert {"histogram_distance", "std_ratio", "privacy score"} <= set(result.columns)
+    assert not evaluator.streaming
+
+
+def test__combined_evaluator__evaluate__computes_shared_statistics_once(
+    mocker, statistical_evaluator, sketch_evaluator, mixed_data_frame
+):
+    from dummy_synth import evaluators
+
+    get_value_counts = mocker.spy(evaluators, "get_value_counts")
+    evaluators.CombinedEvaluator(
+        {"statistical": statistical_evaluator, "sketch": sketch_evaluator}
+    ).evaluate(mixed_data_frame, mixed_data_frame)
+    # categorical column "cat" of original and synthetic data
+    assert get_value_counts.call_count == 2
+
+
+def test__combined_evaluator__evaluate_chunks__streaming_evaluators_summarize_chunks(
+    mixed_data_frame,
+):
+    from dummy_synth.evaluators import CombinedEvaluator, SketchEvaluator
+
+    evaluator = CombinedEvaluator({"a": SketchEvaluator(), "b": SketchEvaluator()})
+    assert evaluator.streaming
+    result = evaluator.evaluate_chunks(
+        [mixed_data_frame[:2], mixed_data_frame[2:]], [mixed_data_frame]
+    )
+    assert list(result["evaluator"]) == ["a"] * 4 + ["b"] * 4
+    assert (result["utility score"] == 1).all()
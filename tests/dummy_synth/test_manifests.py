@@ -0,0 +1,23 @@
+from dummy_synth.manifests import Manifest
+
+
+def test__manifest__record__is_loaded_by_new_instance(tmp_path):
+    manifest = Manifest(str(tmp_path / "manifest.jsonl"))
+    manifest.record("a.csv", {"size": 1}, "hash1", {"synthesizer": "S"})
+    manifest.record("a.csv", {"size": 2}, "hash2", {"synthesizer": "S"})
+
+    entry = Manifest(str(tmp_path / "manifest.jsonl")).get("a.csv")
+    assert entry["info"] == {"size": 2}
+    assert entry["hash"] == "hash2"
+    assert entry["config"] == {"synthesizer": "S"}
+
+
+def test__manifest__load__ignores_truncated_last_line(tmp_path):
+    manifest = Manifest(str(tmp_path / "manifest.jsonl"))
+    manifest.record("a.csv", {"size": 1}, "hash1", {})
+    with open(tmp_path / "manifest.jsonl", "a") as f:
+        f.write('{"path": "b.csv", "in')
+
+    manifest = Manifest(str(tmp_path / "manifest.jsonl"))
+    assert manifest.get("a.csv") is not None
+    assert manifest.get("b.csv") is None
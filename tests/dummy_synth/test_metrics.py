@@ -0,0 +1,41 @@
+import time
+from dummy_synth.metrics import StageTimings
+
+
+def test__stage_timings__measure__attributes_nested_time_to_innermost_stage():
+    timings = StageTimings()
+    with timings.measure("write"):
+        with timings.measure("synthesize"):
+            time.sleep(0.02)
+    assert timings.seconds["synthesize"] >= 0.02
+    assert timings.seconds["write"] < 0.02
+
+
+def test__stage_timings__measure_iter__returns_all_items():
+    timings = StageTimings()
+    assert list(timings.measure_iter("read", [1, 2, 3])) == [1, 2, 3]
+    assert "read" in timings.seconds
+
+
+def test__stage_timings__file__records_stages_and_counters_per_file():
+    timings = StageTimings(record_files=True)
+    with timings.file("a.csv"):
+        with timings.measure("read"):
+            pass
+        timings.count("read", rows=3, bytes_read=100)
+    timings.count("read", rows=2)
+
+    assert timings.counters["read"] == {"rows": 5, "bytes_read": 100}
+    (record,) = timings.pop_files()
+    assert record["path"] == "a.csv"
+    assert record["stages"]["read"]["rows"] == 3
+    assert record["stages"]["read"]["bytes_read"] == 100
+    assert timings.files == []
+
+
+def test__stage_timings__file__doesnt_record_files_by_default():
+    timings = StageTimings()
+    with timings.file("a.csv"):
+        with timings.measure("read"):
+            pass
+    assert timings.files == []
@@ -101,3 +101,772 @@ def test__dir_processor__check_overwrite_doesnt_throw_exception_if_file_exist_an
 
     # just don't rise excetpion
     dir_processor.check_overwrite('foo/bar/a.csv')
+
+
+##############################
+# Tests for process()
+##############################
+
+
+@pytest.fixture
+def data_dir_copy(tmp_path) -> str:
+    import shutil
+    from pathlib import Path
+
+    target = tmp_path / "data"
+    shutil.copytree(Path(__file__).parent.parent / "test_data", target)
+    return str(target)
+
+
+def get_local_dir_processor(directory: str, **kwargs) -> DirProcessor:
+    from dummy_synth.storages import LocalDirectoryStorage
+    from dummy_synth.synthesizers import DummySynthesizer
+
+    return DirProcessor(
+        directory,
+        LocalDirectoryStorage(),
+        {
+            ".csv": {"read": CsvIO(), "write": CsvIO()},
+            ".parquet": {"read": ParquetIO(), "write": ParquetIO()},
+        },
+        False,
+        DummySynthesizer(),
+        ".syn",
+        **kwargs,
+    )
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("executor", DirProcessor.EXECUTORS)
+def test__dir_processor__process__parallel_returns_same_count_as_serial(
+    data_dir_copy, executor
+):
+    processor = get_local_dir_processor(data_dir_copy, jobs=2, executor=executor)
+    assert processor.process() == 2
+    assert processor.storage.exists(data_dir_copy + "/mydata/1/1.csv.syn")
+    assert processor.storage.exists(data_dir_copy + "/mydata/1/1.parquet.syn")
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("executor", DirProcessor.EXECUTORS)
+def test__dir_processor__process__parallel_reraises_file_error(data_dir_copy, executor):
+    get_local_dir_processor(data_dir_copy).process()
+    processor = get_local_dir_processor(data_dir_copy, jobs=2, executor=executor)
+    with pytest.raises(Exception, match="already exists"):
+        processor.process()
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__in_chunks_writes_same_output_as_whole_file(
+    data_dir_copy,
+):
+    assert get_local_dir_processor(data_dir_copy, chunk_rows=1).process() == 2
+    csv_path = data_dir_copy + "/mydata/1/1.csv"
+    assert CsvIO().read(csv_path + ".syn").equals(CsvIO().read(csv_path))
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__s3_storage_with_transfers_uploads_outputs():
+    import boto3
+    from moto import mock_aws
+    from dummy_synth.storages import S3Storage
+    from dummy_synth.synthesizers import DummySynthesizer
+
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my_bucket")
+        for i in range(3):
+            s3.Object("my_bucket", f"data/{i}.csv").put(Body=f"a\n{i}\n".encode())
+        processor = DirProcessor(
+            "data",
+            S3Storage(s3, "my_bucket", max_in_flight=2),
+            {".csv": {"read": CsvIO(), "write": CsvIO()}},
+            False,
+            DummySynthesizer(),
+            ".syn",
+        )
+
+        assert processor.process() == 3
+        for i in range(3):
+            body = s3.Object("my_bucket", f"data/{i}.csv.syn").get()["Body"].read()
+            assert body == f"a\n{i}\n".encode()
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__in_chunks_evaluates_output_still_being_uploaded(
+    monkeypatch,
+):
+    import time
+    import boto3
+    from moto.server import ThreadedMotoServer
+    from dummy_synth.evaluators import RandomEvaluator
+    from dummy_synth.storages import S3Storage
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    # files read in chunks are read by s3fs, which needs S3 server
+    server = ThreadedMotoServer(port=0, verbose=False)
+    server.start()
+    try:
+        _, port = server.get_host_and_port()
+        endpoint_url = f"http://127.0.0.1:{port}"
+        s3 = boto3.resource("s3", endpoint_url=endpoint_url)
+        s3.create_bucket(Bucket="my_bucket")
+        for i in range(3):
+            s3.Object("my_bucket", f"data/{i}.csv").put(Body=f"a\n{i}\n{i}\n".encode())
+        storage = S3Storage(s3, "my_bucket", max_in_flight=2)
+        put_object_bytes = storage.transfers.put_object_bytes
+
+        def slow_put(bucket, key, data):
+            time.sleep(0.2)
+            put_object_bytes(bucket, key, data)
+
+        # outputs smaller than part size are uploaded in background
+        storage.transfers.put_object_bytes = slow_put
+        csv_io = CsvIO(storage_options={"client_kwargs": {"endpoint_url": endpoint_url}})
+        processor = DirProcessor(
+            "data",
+            storage,
+            {".csv": {"read": csv_io, "write": csv_io}},
+            False,
+            SamplingSynthesizer(),
+            ".syn",
+            RandomEvaluator(),
+            ".eval",
+            chunk_rows=1,
+        )
+
+        assert processor.process() == 3
+        for i in range(3):
+            assert storage.exists(f"s3://my_bucket/data/{i}.csv.syn")
+            assert storage.exists(f"s3://my_bucket/data/{i}.csv.eval")
+    finally:
+        server.stop()
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("chunk_rows,streaming", [(1, False), (None, True)])
+def test__dir_processor__get_inputs__s3_files_read_in_chunks_are_not_downloaded(
+    mocker, chunk_rows, streaming
+):
+    import boto3
+    from moto import mock_aws
+    from dummy_synth.dataframe_io import ParquetStreamIO
+    from dummy_synth.storages import S3Storage
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my_bucket")
+        for i in range(3):
+            s3.Object("my_bucket", f"data/{i}.parquet").put(Body=b"data")
+        storage = S3Storage(s3, "my_bucket", max_in_flight=2)
+        processor = DirProcessor(
+            "data",
+            storage,
+            {
+                ".parquet": {
+                    "read": ParquetStreamIO() if streaming else ParquetIO(),
+                    "write": ParquetIO(),
+                }
+            },
+            False,
+            # synthesizer which doesn't copy files, so they're prefetched
+            SamplingSynthesizer(),
+            ".syn",
+            chunk_rows=chunk_rows,
+        )
+        get_object = mocker.spy(s3.meta.client, "get_object")
+        fetch = mocker.spy(storage, "fetch")
+
+        inputs = list(processor.get_inputs())
+
+    assert [content for _, content in inputs] == [None] * 3
+    assert fetch.call_count == 0
+    assert get_object.call_count == 0
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__with_manifest_processes_only_changed_files(
+    data_dir_copy, tmp_path
+):
+    from dummy_synth.manifests import Manifest
+
+    manifest_path = str(tmp_path / "manifest.jsonl")
+    processor = get_local_dir_processor(data_dir_copy, manifest=Manifest(manifest_path))
+    assert processor.process() == 2
+
+    processor = get_local_dir_processor(data_dir_copy, manifest=Manifest(manifest_path))
+    assert processor.process() == 0
+
+    with open(data_dir_copy + "/mydata/1/1.csv", "a") as f:
+        f.write("Memories of Murder,8.1,4444\n")
+    processor = get_local_dir_processor(data_dir_copy, manifest=Manifest(manifest_path))
+    assert processor.process() == 1
+    assert len(CsvIO().read(data_dir_copy + "/mydata/1/1.csv.syn")) == 4
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__with_manifest_hashes_only_files_whose_info_changed(
+    data_dir_copy, tmp_path, mocker
+):
+    import os
+    from dummy_synth.manifests import Manifest
+
+    manifest_path = str(tmp_path / "manifest.jsonl")
+    csv_path = data_dir_copy + "/mydata/1/1.csv"
+
+    def process_touched(mtime_ns):
+        os.utime(csv_path, ns=(mtime_ns, mtime_ns))
+        processor = get_local_dir_processor(
+            data_dir_copy, manifest=Manifest(manifest_path)
+        )
+        get_content_hash = mocker.spy(processor.storage, "get_content_hash")
+        return processor.process(), get_content_hash.call_count
+
+    assert process_touched(10**18) == (2, 0)
+    # touched file isn't hashed, it's processed again and hashed when recorded
+    assert process_touched(2 * 10**18) == (1, 1)
+    # touched again, hash shows content didn't change
+    assert process_touched(3 * 10**18) == (0, 1)
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__with_manifest_reprocesses_files_when_sampling_changes(
+    data_dir_copy, tmp_path
+):
+    from dummy_synth.manifests import Manifest
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    manifest_path = str(tmp_path / "manifest.jsonl")
+    for rows, processed in [(5, 2), (5, 0), (6, 2)]:
+        processor = get_local_dir_processor(
+            data_dir_copy, manifest=Manifest(manifest_path)
+        )
+        processor.synthesizer = SamplingSynthesizer(rows=rows)
+        assert processor.process() == processed
+    assert len(CsvIO().read(data_dir_copy + "/mydata/1/1.csv.syn")) == 6
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__with_manifest_reprocesses_files_when_evaluators_change(
+    data_dir_copy, tmp_path
+):
+    from dummy_synth.evaluators import (
+        CombinedEvaluator,
+        ConstantEvaluator,
+        RandomEvaluator,
+        SketchEvaluator,
+    )
+    from dummy_synth.manifests import Manifest
+
+    manifest_path = str(tmp_path / "manifest.jsonl")
+    for evaluators, processed in [
+        ({"A": ConstantEvaluator(), "B": RandomEvaluator()}, 2),
+        ({"B": RandomEvaluator(), "A": ConstantEvaluator()}, 0),
+        ({"A": ConstantEvaluator(), "C": SketchEvaluator()}, 2),
+    ]:
+        processor = get_local_dir_processor(
+            data_dir_copy,
+            evaluator=CombinedEvaluator(evaluators),
+            evaluate_suffix=".eval",
+            manifest=Manifest(manifest_path),
+        )
+        processor.overwrite = True
+        assert processor.process() == processed
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__synthesize_and_evaluate_doesnt_read_synthesized_file(
+    data_dir_copy, mocker
+):
+    from dummy_synth.evaluators import ConstantEvaluator
+
+    processor = get_local_dir_processor(
+        data_dir_copy, evaluator=ConstantEvaluator(), evaluate_suffix=".eval"
+    )
+    read_synthesized = mocker.spy(processor, "read_synthesized")
+    assert processor.process() == 2
+    read_synthesized.assert_not_called()
+    # DummySynthesizer is passthrough, so synthesize files are copied
+    assert set(processor.timings.seconds) == {
+        "list",
+        "check",
+        "read",
+        "copy",
+        "evaluate",
+        "write",
+    }
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__passthrough_synthesizer_copies_files(
+    data_dir_copy, mocker
+):
+    processor = get_local_dir_processor(data_dir_copy)
+    synthesize = mocker.spy(processor.synthesizer, "synthesize")
+    assert processor.process() == 2
+    synthesize.assert_not_called()
+    for extension in ("csv", "parquet"):
+        path = f"{data_dir_copy}/mydata/1/1.{extension}"
+        with open(path, "rb") as ori, open(path + ".syn", "rb") as syn:
+            assert ori.read() == syn.read()
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__evaluate_reads_synthesize_file_with_write_backend(
+    data_dir_copy,
+):
+    from dummy_synth.dataframe_io import FeatherIO
+    from dummy_synth.evaluators import ConstantEvaluator
+    from dummy_synth.storages import LocalDirectoryStorage
+    from dummy_synth.synthesizers import DummySynthesizer
+
+    io_wrappers = {".csv": {"read": CsvIO(), "write": FeatherIO()}}
+    synthesize_processor = DirProcessor(
+        data_dir_copy,
+        LocalDirectoryStorage(),
+        io_wrappers,
+        False,
+        DummySynthesizer(),
+        ".syn",
+    )
+    assert synthesize_processor.process() == 1
+    evaluate_processor = DirProcessor(
+        data_dir_copy,
+        LocalDirectoryStorage(),
+        io_wrappers,
+        False,
+        None,
+        ".syn",
+        ConstantEvaluator(),
+        ".eval",
+    )
+    assert evaluate_processor.process() == 1
+    syn_table = FeatherIO().read(data_dir_copy + "/mydata/1/1.csv.syn")
+    assert syn_table.to_pandas().equals(CsvIO().read(data_dir_copy + "/mydata/1/1.csv"))
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("jobs,executor", [(1, None), (2, DirProcessor.EXECUTOR_PROCESS)])
+def test__dir_processor__process__writes_stages_of_each_file_to_metrics_report(
+    data_dir_copy, tmp_path, jobs, executor
+):
+    import json
+    from dummy_synth.evaluators import ConstantEvaluator
+    from dummy_synth.metrics import MetricsReport
+
+    report_path = str(tmp_path / "metrics.jsonl")
+    processor = get_local_dir_processor(
+        data_dir_copy,
+        evaluator=ConstantEvaluator(),
+        evaluate_suffix=".eval",
+        jobs=jobs,
+        executor=executor or DirProcessor.EXECUTOR_PROCESS,
+        metrics_report=MetricsReport(report_path),
+    )
+    assert processor.process() == 2
+
+    with open(report_path) as f:
+        records = [json.loads(line) for line in f]
+    file_records = [record for record in records if record["type"] == "file"]
+    assert {record["path"] for record in file_records} == {
+        data_dir_copy + "/mydata/1/1.csv",
+        data_dir_copy + "/mydata/1/1.parquet",
+    }
+    for record in file_records:
+        assert record["stages"]["read"]["rows"] == 3
+        assert record["stages"]["read"]["bytes_read"] > 0
+        assert record["stages"]["write"]["bytes_written"] > 0
+    assert records[-1]["type"] == "run"
+    assert records[-1]["files"] == 2
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("passthrough", [True, False, None])
+def test__dir_processor__process__in_chunks_with_streaming_evaluator(
+    data_dir_copy, passthrough
+):
+    from dummy_synth.evaluators import SketchEvaluator
+    from dummy_synth.storages import LocalDirectoryStorage
+    from dummy_synth.synthesizers import DummySynthesizer
+
+    synthesizer = None
+    if passthrough is None:
+        # evaluate only, synthesize files are read in chunks
+        get_local_dir_processor(data_dir_copy).process()
+    else:
+        synthesizer = DummySynthesizer()
+        synthesizer.passthrough = passthrough
+    processor = DirProcessor(
+        data_dir_copy,
+        LocalDirectoryStorage(),
+        {
+            ".csv": {"read": CsvIO(), "write": CsvIO()},
+            ".parquet": {"read": ParquetIO(), "write": ParquetIO()},
+        },
+        False,
+        synthesizer,
+        ".syn",
+        SketchEvaluator(),
+        ".eval",
+        chunk_rows=1,
+    )
+    assert processor.process() == 2
+    result = CsvIO().read(data_dir_copy + "/mydata/1/1.csv.eval")
+    assert result["column"].iloc[-1] == "*"
+    assert (result["utility score"] == 1).all()
+    assert "evaluate" in processor.timings.seconds
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__outputs_are_filtered_out_by_storage_listing(
+    data_dir_copy, mocker
+):
+    processor = get_local_dir_processor(data_dir_copy)
+    assert processor.process() == 2
+    is_supported = mocker.spy(processor, "is_supported")
+    processor.overwrite = True
+    assert processor.process() == 2
+    # .syn outputs of first run never reached processor
+    assert is_supported.call_count == 2
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("jobs", [1, 2])
+def test__dir_processor__process__workers_drain_planned_queue(
+    data_dir_copy, tmp_path, jobs
+):
+    from dummy_synth.queues import SqliteWorkQueue
+
+    queue_path = str(tmp_path / "queue.db")
+    with pytest.raises(Exception, match="No run was planned"):
+        get_local_dir_processor(
+            data_dir_copy, work_queue=SqliteWorkQueue(queue_path)
+        ).process()
+    planner = get_local_dir_processor(
+        data_dir_copy, work_queue=SqliteWorkQueue(queue_path), plan=True
+    )
+    assert planner.process() == 2
+    assert not planner.storage.exists(data_dir_copy + "/mydata/1/1.csv.syn")
+
+    # 1.csv fails in first worker, until it runs out of attempts
+    worker = get_local_dir_processor(
+        data_dir_copy,
+        work_queue=SqliteWorkQueue(queue_path, max_attempts=2, poll_seconds=0),
+        jobs=jobs,
+        executor=DirProcessor.EXECUTOR_THREAD,
+    )
+    copy = worker.storage.copy
+    worker.storage.copy = lambda source, target: (
+        copy(source, target) if source.endswith(".parquet") else 1 / 0
+    )
+    assert worker.process() == 1
+    assert worker.timings.counters["queue"] == {"done": 1, "failed": 1}
+
+    # planning again retries failed file
+    assert planner.process() == 1
+    worker = get_local_dir_processor(
+        data_dir_copy, work_queue=SqliteWorkQueue(queue_path), jobs=jobs
+    )
+    assert worker.process() == 1
+    assert worker.storage.exists(data_dir_copy + "/mydata/1/1.csv.syn")
+    assert SqliteWorkQueue(queue_path).get_counts() == {"done": 2}
+
+    # planning again adds done file changed since
+    with open(data_dir_copy + "/mydata/1/1.csv", "a") as f:
+        f.write("Memories of Murder,8.1,4444\n")
+    assert planner.process() == 1
+    worker = get_local_dir_processor(
+        data_dir_copy, work_queue=SqliteWorkQueue(queue_path), jobs=jobs
+    )
+    worker.overwrite = True
+    assert worker.process() == 1
+    assert len(CsvIO().read(data_dir_copy + "/mydata/1/1.csv.syn")) == 4
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("jobs", [1, 2])
+def test__dir_processor__process__failed_background_upload_fails_queued_file(
+    tmp_path, jobs
+):
+    import boto3
+    from moto import mock_aws
+    from dummy_synth.queues import SqliteWorkQueue
+    from dummy_synth.storages import S3Storage
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my_bucket")
+        for i in range(3):
+            s3.Object("my_bucket", f"data/{i}.csv").put(Body=f"a\n{i}\n".encode())
+        storage = S3Storage(s3, "my_bucket", max_in_flight=2)
+        put_object_bytes = storage.transfers.put_object_bytes
+
+        def failing_put(bucket, key, data):
+            if key == "data/1.csv.syn":
+                raise Exception("upload failed")
+            put_object_bytes(bucket, key, data)
+
+        # outputs smaller than part size are uploaded in background
+        storage.transfers.put_object_bytes = failing_put
+        queue = SqliteWorkQueue(str(tmp_path / "queue.db"), max_attempts=1)
+        processor = DirProcessor(
+            "data",
+            storage,
+            {".csv": {"read": CsvIO(), "write": CsvIO()}},
+            False,
+            SamplingSynthesizer(),
+            ".syn",
+            jobs=jobs,
+            executor=DirProcessor.EXECUTOR_THREAD,
+            work_queue=queue,
+        )
+        queue.set_config(processor.get_queue_config())
+        queue.put(f"s3://my_bucket/data/{i}.csv" for i in range(3))
+
+        assert processor.process() == 2
+    assert processor.timings.counters["queue"] == {"done": 2, "failed": 1}
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__watch_processes_changed_files_after_first_pass(
+    data_dir_copy, mocker
+):
+    import shutil
+    import time
+
+    csv_path = data_dir_copy + "/mydata/1/1.csv"
+
+    def watch(directory, listing_filter, interval):
+        yield []
+        # first pass is done by now
+        assert processor.storage.exists(csv_path + ".syn")
+        with open(csv_path, "a") as f:
+            f.write("Memories of Murder,8.1,4444\n")
+        shutil.copy(csv_path, data_dir_copy + "/mydata/2.csv")
+        yield [csv_path, data_dir_copy + "/mydata/2.csv"]
+        time.sleep(0.02)
+        yield []
+
+    processor = get_local_dir_processor(data_dir_copy, watch_seconds=0.01)
+    mocker.patch.object(processor.storage, "watch", watch)
+    assert processor.process() == 4
+    assert len(CsvIO().read(csv_path + ".syn")) == 4
+    assert processor.storage.exists(data_dir_copy + "/mydata/2.csv.syn")
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("jobs", [1, 2])
+def test__dir_processor__process__watch_interrupted_during_first_pass_returns_count(
+    data_dir_copy, mocker, jobs
+):
+    def watch(directory, listing_filter, interval):
+        yield []
+        yield []
+
+    processor = get_local_dir_processor(
+        data_dir_copy,
+        watch_seconds=0.01,
+        jobs=jobs,
+        executor=DirProcessor.EXECUTOR_THREAD,
+    )
+    mocker.patch.object(processor.storage, "watch", watch)
+    mocker.patch.object(processor, "process_file", side_effect=KeyboardInterrupt)
+    assert processor.process() == 0
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__memory_budget_processes_files_over_budget_in_chunks(
+    data_dir_copy, mocker
+):
+    from dummy_synth.scheduling import MemoryBudget
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    processor = get_local_dir_processor(
+        data_dir_copy, memory_budget=MemoryBudget(1024 * 1024)
+    )
+    processor.synthesizer = SamplingSynthesizer()
+    estimates = {data_dir_copy + "/mydata/1/1.csv": 10 * 1024 * 1024}
+    mocker.patch.object(
+        processor, "estimate_memory", lambda file_path: estimates.get(file_path, 1)
+    )
+    process_file_in_chunks = mocker.spy(processor, "process_file_in_chunks")
+    assert processor.process() == 2
+    assert process_file_in_chunks.call_count == 1
+    assert process_file_in_chunks.call_args.args[0] == data_dir_copy + "/mydata/1/1.csv"
+    assert processor.timings.counters["memory"] == {"chunked_files": 1}
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__memory_budget_charges_full_estimate_with_non_streaming_evaluator(
+    data_dir_copy, mocker
+):
+    from dummy_synth.evaluators import ConstantEvaluator
+    from dummy_synth.scheduling import MemoryBudget
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    budget = MemoryBudget(1024 * 1024)
+    processor = get_local_dir_processor(
+        data_dir_copy,
+        evaluator=ConstantEvaluator(),
+        evaluate_suffix=".eval",
+        jobs=2,
+        executor=DirProcessor.EXECUTOR_THREAD,
+        memory_budget=budget,
+    )
+    processor.synthesizer = SamplingSynthesizer()
+    big_path = data_dir_copy + "/mydata/1/1.csv"
+    estimates = {big_path: 10 * 1024 * 1024}
+    mocker.patch.object(
+        processor, "estimate_memory", lambda file_path: estimates.get(file_path, 1)
+    )
+    process_file_in_chunks = mocker.spy(processor, "process_file_in_chunks")
+    charge = mocker.spy(budget, "charge")
+    assert processor.process() == 2
+    # evaluator reads whole files, so chunks wouldn't bound memory
+    assert process_file_in_chunks.call_count == 0
+    assert mocker.call(big_path, 10 * 1024 * 1024) in charge.call_args_list
+    assert "memory" not in processor.timings.counters
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__memory_budget_fails_only_file_which_cannot_be_estimated(
+    data_dir_copy, tmp_path
+):
+    from pathlib import Path
+    from dummy_synth.queues import SqliteWorkQueue
+    from dummy_synth.scheduling import MemoryBudget
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    bad_path = data_dir_copy + "/mydata/2/bad.parquet"
+    Path(bad_path).parent.mkdir()
+    Path(bad_path).write_bytes(b"not a parquet file")
+    queue = SqliteWorkQueue(str(tmp_path / "queue.db"), max_attempts=1)
+    processor = get_local_dir_processor(
+        data_dir_copy, memory_budget=MemoryBudget(1024 * 1024), work_queue=queue
+    )
+    processor.synthesizer = SamplingSynthesizer()
+    # corrupt footer, estimated by size
+    size = len(b"not a parquet file")
+    assert processor.estimate_memory(bad_path) == size + 2 * int(
+        size * ParquetIO.memory_factor
+    )
+    queue.set_config(processor.get_queue_config())
+    queue.put(processor.get_listed_files())
+
+    assert processor.process() == 2
+    assert queue.get_counts() == {"done": 2, "failed": 1}
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__memory_budget_limits_files_processed_at_once(
+    data_dir_copy, mocker
+):
+    import threading
+    import time
+    from dummy_synth.scheduling import MemoryBudget
+
+    processor = get_local_dir_processor(
+        data_dir_copy,
+        jobs=2,
+        executor=DirProcessor.EXECUTOR_THREAD,
+        memory_budget=MemoryBudget(100),
+    )
+    mocker.patch.object(processor, "estimate_memory", return_value=60)
+    running = []
+    max_running = []
+    lock = threading.Lock()
+    process_file_data = processor.process_file_data
+
+    def tracked(*args):
+        with lock:
+            running.append(args[0])
+            max_running.append(len(running))
+        time.sleep(0.05)
+        process_file_data(*args)
+        with lock:
+            running.remove(args[0])
+
+    processor.process_file_data = tracked
+    assert processor.process() == 2
+    assert max(max_running) == 1
+
+
+@pytest.mark.integration_test
+@pytest.mark.parametrize("jobs", [1, 2])
+def test__dir_processor__process__appends_evaluation_rows_to_results_dataset(
+    data_dir_copy, tmp_path, jobs
+):
+    import pandas as pd
+    from dummy_synth.evaluators import ConstantEvaluator
+    from dummy_synth.results import ResultsDataset
+
+    # dataset within processed directory isn't taken for input by later runs
+    results_root = data_dir_copy + "/results"
+    for _ in range(2):
+        processor = get_local_dir_processor(
+            data_dir_copy,
+            evaluator=ConstantEvaluator(),
+            evaluate_suffix=".eval",
+            jobs=jobs,
+            results_dataset=ResultsDataset(results_root),
+        )
+        processor.overwrite = True
+        assert processor.process() == 2
+    assert not processor.storage.exists(data_dir_copy + "/mydata/1/1.csv.eval")
+
+    results = pd.read_parquet(results_root)
+    assert set(results["evaluator"]) == {"ConstantEvaluator"}
+    assert sorted(results["source_path"].value_counts().items()) == [
+        (data_dir_copy + "/mydata/1/1.csv", 2),
+        (data_dir_copy + "/mydata/1/1.parquet", 2),
+    ]
+
+
+@pytest.mark.integration_test
+def test__dir_processor__process__results_dataset_keeps_columns_of_evaluators_across_runs(
+    tmp_path,
+):
+    import pandas as pd
+    from dummy_synth.evaluators import (
+        CombinedEvaluator,
+        SketchEvaluator,
+        StatisticalEvaluator,
+    )
+    from dummy_synth.results import ResultsDataset
+
+    results_root = str(tmp_path / "results")
+    # first run has no numeric columns, so its numeric metrics are all empty
+    data = {
+        "categorical": pd.DataFrame({"c": ["x", "y"] * 5}),
+        "numeric": pd.DataFrame({"n": range(10), "c": ["x", "y"] * 5}),
+    }
+    for name, df in data.items():
+        (tmp_path / name).mkdir()
+        df.to_csv(tmp_path / name / "data.csv", index=False)
+        processor = get_local_dir_processor(
+            str(tmp_path / name),
+            evaluator=CombinedEvaluator(
+                {
+                    "StatisticalEvaluator": StatisticalEvaluator(),
+                    "SketchEvaluator": SketchEvaluator(),
+                }
+            ),
+            evaluate_suffix=".eval",
+            results_dataset=ResultsDataset(results_root),
+        )
+        assert processor.process() == 1
+
+    for evaluator in (StatisticalEvaluator, SketchEvaluator):
+        results = pd.read_parquet(f"{results_root}/evaluator={evaluator.__name__}")
+        assert list(results.columns) == [
+            "source_path",
+            "evaluated_at",
+            *evaluator.RESULT_COLUMNS,
+        ]
+        numeric_row = results[results["column"] == "n"]
+        assert numeric_row["ks_statistic"].tolist() == [0.0]
@@ -0,0 +1,92 @@
+import pickle
+import pytest
+from dummy_synth.queues import SqliteWorkQueue
+
+
+@pytest.fixture
+def work_queue(tmp_path) -> SqliteWorkQueue:
+    return SqliteWorkQueue(str(tmp_path / "queue.db"), lease_seconds=60, max_attempts=2)
+
+
+def test__sqlite_work_queue__put__adds_only_new_or_failed_paths(work_queue):
+    assert work_queue.put(["a.csv", "b.csv"]) == 2
+    assert work_queue.put(["a.csv", "b.csv", "c.csv"]) == 1
+    assert work_queue.get_counts() == {"pending": 3}
+
+
+def test__sqlite_work_queue__claim__gives_each_task_to_one_worker(work_queue):
+    work_queue.put(["a.csv", "b.csv"])
+    # workers in other processes use pickled copy of queue
+    other_queue = pickle.loads(pickle.dumps(work_queue))
+    assert work_queue.claim("w1") == "a.csv"
+    assert other_queue.claim("w2") == "b.csv"
+    assert work_queue.claim("w1") is None
+    work_queue.complete("a.csv", "w1")
+    assert not work_queue.is_drained()
+    other_queue.complete("b.csv", "w2")
+    assert work_queue.is_drained()
+    assert work_queue.get_counts() == {"done": 2}
+
+
+def test__sqlite_work_queue__claim__retries_failed_and_expired_tasks_up_to_max_attempts(
+    work_queue, mocker
+):
+    time = mocker.patch("dummy_synth.queues.time.time", return_value=1000)
+    work_queue.put(["a.csv", "b.csv"])
+    assert work_queue.claim("w1") == "a.csv"
+    work_queue.fail("a.csv", "w1", "ValueError: bad data")
+    assert work_queue.claim("w1") == "a.csv"
+    work_queue.fail("a.csv", "w1", "ValueError: bad data")
+    # w1 dies while holding b.csv
+    assert work_queue.claim("w1") == "b.csv"
+    assert work_queue.claim("w2") is None
+    time.return_value = 1061
+    assert work_queue.claim("w2") == "b.csv"
+    # lease of w1 is over, w2 owns the task now
+    work_queue.complete("b.csv", "w1")
+    time.return_value = 1122
+    assert work_queue.claim("w3") is None
+    assert work_queue.get_counts() == {"failed": 2}
+    assert work_queue.is_drained()
+    assert work_queue.put(["a.csv"]) == 1
+
+
+def test__sqlite_work_queue__release__returns_tasks_of_worker_to_queue(work_queue):
+    work_queue.put(["a.csv", "b.csv"])
+    work_queue.claim("w1")
+    work_queue.claim("w2")
+    work_queue.release("w1")
+    assert work_queue.get_counts() == {"pending": 1, "claimed": 1}
+    assert work_queue.claim("w2") == "a.csv"
+
+
+def test__sqlite_work_queue__put__adds_done_paths_again_when_their_version_changes(
+    work_queue,
+):
+    versions = {"a.csv": "1", "b.csv": "1"}
+    assert work_queue.put(["a.csv", "b.csv"], versions.get) == 2
+    for path in ("a.csv", "b.csv"):
+        assert work_queue.claim("w1") == path
+        work_queue.complete(path, "w1")
+    versions["b.csv"] = "2"
+    assert work_queue.put(["a.csv", "b.csv"], versions.get) == 1
+    assert work_queue.get_counts() == {"done": 1, "pending": 1}
+    assert work_queue.claim("w1") == "b.csv"
+
+
+def test__sqlite_work_queue__init__adds_version_column_to_old_queue_file(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "queue.db")
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE tasks (path TEXT PRIMARY KEY, status TEXT NOT NULL,"
+        " attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_until REAL,"
+        " error TEXT)"
+    )
+    db.execute("INSERT INTO tasks (path, status) VALUES ('a.csv', 'done')")
+    db.commit()
+    db.close()
+    work_queue = SqliteWorkQueue(path)
+    assert work_queue.put(["a.csv"], lambda path: "1") == 1
+    assert work_queue.get_counts() == {"pending": 1}
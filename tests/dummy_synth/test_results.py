@@ -0,0 +1,63 @@
+from io import BytesIO
+import pandas as pd
+from dummy_synth.results import ResultsDataset
+
+RESULT_COLUMNS = {
+    "RandomEvaluator": ["utility score", "privacy score"],
+    "SketchEvaluator": ["column", "ks_statistic"],
+}
+
+
+def test__results_dataset__pop_parts__splits_rows_of_combined_evaluators():
+    dataset = ResultsDataset("results", batch_rows=3)
+    dataset.add(
+        "a.csv",
+        pd.DataFrame({"utility score": [0.5], "privacy score": [0.1]}),
+        {"RandomEvaluator": RESULT_COLUMNS["RandomEvaluator"]},
+    )
+    assert not dataset.is_full()
+    dataset.add(
+        "b.csv",
+        pd.DataFrame(
+            {
+                "evaluator": ["RandomEvaluator", "SketchEvaluator"],
+                "utility score": [0.7, None],
+                "privacy score": [0.2, None],
+                "column": [None, "x"],
+                "ks_statistic": [None, None],
+            }
+        ),
+        RESULT_COLUMNS,
+    )
+    assert dataset.is_full()
+
+    parts = {}
+    for path, data in dataset.pop_parts():
+        assert path.startswith("results/evaluator=")
+        assert path.endswith(".parquet")
+        parts[path.split("/")[1]] = pd.read_parquet(BytesIO(data))
+    assert dataset.rows == 0
+    assert list(parts["evaluator=RandomEvaluator"]["source_path"]) == ["a.csv", "b.csv"]
+    # columns of other evaluators aren't in partition, empty columns of its own are
+    sketch_rows = parts["evaluator=SketchEvaluator"]
+    assert list(sketch_rows.columns) == [
+        "source_path",
+        "evaluated_at",
+        "column",
+        "ks_statistic",
+    ]
+    assert sketch_rows["ks_statistic"].dtype == "float64"
+
+
+def test__results_dataset__pickled_copy_has_empty_buffer():
+    import pickle
+
+    dataset = ResultsDataset("results", batch_rows=10)
+    dataset.add(
+        "a.csv",
+        pd.DataFrame({"utility score": [0.5], "privacy score": [0.1]}),
+        {"RandomEvaluator": RESULT_COLUMNS["RandomEvaluator"]},
+    )
+    copy = pickle.loads(pickle.dumps(dataset))
+    assert (copy.root, copy.batch_rows, copy.rows) == ("results", 10, 0)
+    assert copy.pop_parts() == []
@@ -0,0 +1,14 @@
+from dummy_synth.scheduling import MemoryBudget
+
+
+def test__memory_budget__fits__admits_files_while_sum_fits_in_budget():
+    budget = MemoryBudget(100)
+    # file bigger than budget is admitted when it's alone
+    assert budget.fits(150)
+    budget.charge("a.csv", 60)
+    assert budget.fits(40)
+    assert not budget.fits(41)
+    budget.charge("b.csv", 40)
+    budget.release("a.csv")
+    assert budget.get_used() == 40
+    assert budget.fits(60)
@@ -0,0 +1,97 @@
+import math
+import pickle
+import numpy as np
+import pandas as pd
+from dummy_synth.sketches import (
+    ColumnSummary,
+    FrequencySketch,
+    HyperLogLog,
+    QuantileSketch,
+    RunningMoments,
+    frequencies_distance,
+    ks_statistic,
+)
+
+
+def test__running_moments__merge__equals_moments_of_all_values():
+    values = np.random.default_rng(0).normal(3, 2, size=1000)
+    moments = RunningMoments()
+    for chunk in np.array_split(values, 7):
+        chunk_moments = RunningMoments()
+        chunk_moments.update(chunk)
+        moments.merge(chunk_moments)
+    assert moments.count == 1000
+    assert math.isclose(moments.mean, values.mean())
+    assert math.isclose(moments.std, values.std())
+    assert (moments.min, moments.max) == (values.min(), values.max())
+
+
+def test__quantile_sketch__quantile__is_within_relative_accuracy():
+    values = np.random.default_rng(0).lognormal(size=10_000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.update(values)
+    for q in (0.1, 0.5, 0.9):
+        expected = np.quantile(values, q, method="inverted_cdf")
+        assert abs(sketch.quantile(q) - expected) <= 0.01 * expected
+
+
+def test__ks_statistic__approximates_shift_of_distributions():
+    rng = np.random.default_rng(0)
+    ori_sketch, syn_sketch = QuantileSketch(), QuantileSketch()
+    ori_sketch.update(rng.uniform(0, 1, size=10_000))
+    syn_sketch.update(rng.uniform(0.5, 1.5, size=10_000))
+    assert ks_statistic(ori_sketch, ori_sketch) == 0
+    assert abs(ks_statistic(ori_sketch, syn_sketch) - 0.5) < 0.03
+
+
+def test__frequency_sketch__values_over_limit_are_counted_in_hashed_buckets():
+    sketch = FrequencySketch(max_values=2)
+    sketch.update(pd.Series([3, 2], index=["a", "b"]))
+    assert sketch.get_frequencies()["a"] == 0.6
+    sketch.update(pd.Series([1], index=["c"]))
+    assert sketch.buckets is not None
+    assert sketch.get_frequencies().sum() == 1
+    assert frequencies_distance(sketch, sketch) == 0
+
+
+def test__frequency_sketch__permuted_high_cardinality_values_have_zero_distance():
+    values = pd.Series(np.arange(30_000).astype(str))
+    sketches = []
+    for seed in (0, 1):
+        sketch = FrequencySketch(max_values=1000)
+        permuted = values.sample(frac=1, random_state=seed)
+        for start in range(0, len(permuted), 4000):
+            chunk_sketch = FrequencySketch(max_values=1000)
+            chunk_sketch.update(permuted.iloc[start : start + 4000].value_counts())
+            sketch.merge(chunk_sketch)
+        sketches.append(sketch)
+    assert frequencies_distance(*sketches) == 0
+    # exact sketch is bucketed for comparison with bucketed one
+    exact = FrequencySketch(max_values=1000)
+    exact.update(pd.Series([1], index=["0"]))
+    assert 0 < frequencies_distance(exact, sketches[0]) < 1
+
+
+def test__hyper_log_log__count__is_close_to_distinct_count():
+    values = np.random.default_rng(0).integers(0, 50_000, size=200_000)
+    sketch, other_sketch = HyperLogLog(), HyperLogLog()
+    sketch.update(values[:100_000])
+    other_sketch.update(values[100_000:])
+    sketch.merge(other_sketch)
+    assert abs(sketch.count() - len(np.unique(values))) < 0.05 * len(np.unique(values))
+
+
+def test__column_summary__merged_chunks_equal_summary_of_whole_column():
+    values = np.array([1.0, np.nan, 2.0, 2.0, 5.0, np.nan])
+    whole = ColumnSummary("numeric")
+    whole.update_numeric(values)
+    merged = ColumnSummary("numeric")
+    for chunk in (values[:2], values[2:]):
+        chunk_summary = ColumnSummary("numeric")
+        chunk_summary.update_numeric(chunk)
+        # summaries may be built by other processes
+        merged.merge(pickle.loads(pickle.dumps(chunk_summary)))
+    assert (merged.rows, merged.null_count) == (6, 2)
+    assert merged.distinct.count() == whole.distinct.count() == 3
+    assert merged.quantiles.get_bucket_values() == whole.quantiles.get_bucket_values()
+    assert math.isclose(merged.moments.mean, whole.moments.mean)
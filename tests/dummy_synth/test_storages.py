@@ -43,3 +43,284 @@ def test__local_dir_storage__get_files__returns_expected_files_in_generator(
     assert str(data_dir / 'mydata/1/1.csv') in files
     assert str(data_dir / 'mydata/1/1.parquet') in files
 
+
+
+@pytest.mark.integration_test
+def test__S3Storage__prefetch_returns_contents_of_files_in_order(data_dir):
+    import boto3
+    from moto import mock_aws
+
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my_bucket")
+        for i in range(5):
+            s3.Object("my_bucket", f"data/{i}.csv").put(Body=f"a\n{i}\n".encode())
+        storage = S3Storage(s3, "my_bucket", max_in_flight=2)
+
+        prefetched = list(storage.prefetch(storage.get_files("data")))
+        assert [path for path, _ in prefetched] == [
+            f"s3://my_bucket/data/{i}.csv" for i in range(5)
+        ]
+        assert [content.result() for _, content in prefetched] == [
+            f"a\n{i}\n".encode() for i in range(5)
+        ]
+
+
+@pytest.mark.integration_test
+def test__local_dir_storage__exists_is_answered_from_index_after_get_files(
+    data_dir, local_dir_storage, mocker
+):
+    list(local_dir_storage.get_files(data_dir))
+    os_exists = mocker.patch("os.path.exists")
+    assert local_dir_storage.exists(data_dir / "mydata/1/1.csv")
+    assert local_dir_storage.exists(data_dir / "mydata/1/1.csv.syn") is False
+    local_dir_storage.add_to_index(str(data_dir / "mydata/1/1.csv.syn"))
+    assert local_dir_storage.exists(data_dir / "mydata/1/1.csv.syn")
+    os_exists.assert_not_called()
+
+
+@pytest.mark.integration_test
+def test__S3Storage__exists_is_answered_from_index_after_get_files(mocker):
+    import boto3
+    from moto import mock_aws
+
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my_bucket")
+        s3.Object("my_bucket", "data/1.csv").put(Body=b"a\n1\n")
+        storage = S3Storage(s3, "my_bucket")
+        list(storage.get_files("data"))
+        head_request = mocker.spy(s3, "Object")
+
+        assert storage.exists("s3://my_bucket/data/1.csv")
+        assert storage.exists("s3://my_bucket/data/1.csv.syn") is False
+        storage.add_to_index("s3://my_bucket/data/1.csv.syn")
+        assert storage.exists("s3://my_bucket/data/1.csv.syn")
+        head_request.assert_not_called()
+        # paths outside of listed prefix are still checked by HEAD request
+        assert storage.exists("s3://my_bucket/other/1.csv") is False
+        head_request.assert_called_once()
+
+
+@pytest.mark.integration_test
+def test__local_dir_storage__copy__creates_identical_file(
+    data_dir, local_dir_storage, tmp_path
+):
+    local_dir_storage.copy(str(data_dir / "mydata/1/1.csv"), str(tmp_path / "1.csv"))
+    assert (tmp_path / "1.csv").read_bytes() == (data_dir / "mydata/1/1.csv").read_bytes()
+
+
+@pytest.mark.integration_test
+def test__S3Storage__copy__creates_identical_object():
+    import boto3
+    from moto import mock_aws
+
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my_bucket")
+        s3.Object("my_bucket", "data/1.csv").put(Body=b"a\n1\n")
+        S3Storage(s3, "my_bucket").copy(
+            "s3://my_bucket/data/1.csv", "s3://my_bucket/data/1.csv.syn"
+        )
+        assert s3.Object("my_bucket", "data/1.csv.syn").get()["Body"].read() == b"a\n1\n"
+
+
+def test__listing_filter__accepts_path__applies_extensions_and_globs():
+    from dummy_synth.storages import ListingFilter
+
+    listing_filter = ListingFilter(
+        extensions=[".csv"], include=["2024/*"], exclude=["*/tmp_*"]
+    )
+    assert listing_filter.accepts_path("2024/01/data.CSV")
+    assert not listing_filter.accepts_path("2024/01/data.csv.syn")
+    assert not listing_filter.accepts_path("2023/data.csv")
+    assert not listing_filter.accepts_path("2024/01/tmp_data.csv")
+    assert not listing_filter.prunes_directory("2024")
+    assert ListingFilter(exclude=["*/archive/*"]).prunes_directory("2024/archive")
+
+
+def test__listing_filter__accepts_info__applies_size_and_time_ranges():
+    from dummy_synth.storages import ListingFilter
+
+    listing_filter = ListingFilter(
+        min_size=10, max_size=100, modified_after=1000, modified_before=2000
+    )
+    assert listing_filter.accepts_info(10, 1000)
+    assert not listing_filter.accepts_info(9, 1500)
+    assert not listing_filter.accepts_info(101, 1500)
+    assert not listing_filter.accepts_info(50, 2000)
+
+
+@pytest.mark.integration_test
+def test__local_dir_storage__get_files__does_not_follow_directory_symlinks(
+    tmp_path, local_dir_storage
+):
+    (tmp_path / "data/a").mkdir(parents=True)
+    (tmp_path / "data/a/1.csv").write_text("a\n1\n")
+    (tmp_path / "outside").mkdir()
+    (tmp_path / "outside/2.csv").write_text("a\n2\n")
+    (tmp_path / "data/a/loop").symlink_to(tmp_path / "data")
+    (tmp_path / "data/outside").symlink_to(tmp_path / "outside")
+    # symlinks to files are listed, same as by os.walk
+    (tmp_path / "data/3.csv").symlink_to(tmp_path / "outside/2.csv")
+
+    files = list(local_dir_storage.get_files(str(tmp_path / "data")))
+    assert sorted(files) == [
+        str(tmp_path / "data/3.csv"),
+        str(tmp_path / "data/a/1.csv"),
+    ]
+
+
+@pytest.mark.integration_test
+def test__local_dir_storage__get_files__with_listing_filter_keeps_rejected_files_in_index(
+    tmp_path, local_dir_storage, mocker
+):
+    from dummy_synth.storages import ListingFilter
+
+    for path in ("a/1.csv", "a/1.csv.syn", "tmp/2.csv"):
+        (tmp_path / path).parent.mkdir(exist_ok=True)
+        (tmp_path / path).write_text("a\n1\n")
+    scandir = mocker.spy(__import__("os"), "scandir")
+
+    files = list(
+        local_dir_storage.get_files(
+            tmp_path, ListingFilter(extensions=[".csv"], exclude=["tmp/*"])
+        )
+    )
+    assert files == [str(tmp_path / "a/1.csv")]
+    # tmp directory was pruned
+    assert [str(call.args[0]) for call in scandir.call_args_list] == [
+        str(tmp_path),
+        str(tmp_path / "a"),
+    ]
+    assert local_dir_storage.is_indexed(str(tmp_path / "a/1.csv.syn"))
+    assert local_dir_storage.exists(tmp_path / "a/1.csv.syn")
+    assert not local_dir_storage.is_indexed(str(tmp_path / "tmp/2.csv.syn"))
+
+
+@pytest.mark.integration_test
+def test__S3Storage__get_files__with_listing_filter_prunes_excluded_prefixes():
+    import boto3
+    from moto import mock_aws
+    from dummy_synth.storages import ListingFilter
+
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my_bucket")
+        for key in ("data/1.csv", "data/1.csv.syn", "data/x/2.csv", "data/tmp/3.csv"):
+            s3.Object("my_bucket", key).put(Body=b"a\n1\n")
+        storage = S3Storage(s3, "my_bucket")
+
+        files = list(
+            storage.get_files(
+                "data", ListingFilter(extensions=[".csv"], exclude=["tmp/*"])
+            )
+        )
+        assert files == ["s3://my_bucket/data/1.csv", "s3://my_bucket/data/x/2.csv"]
+        assert storage.exists("s3://my_bucket/data/1.csv.syn")
+        assert not storage.is_indexed("s3://my_bucket/data/tmp/3.csv")
+        assert list(storage.get_files("data", ListingFilter(min_size=5))) == []
+
+
+@pytest.mark.integration_test
+def test__S3Storage__open_upload__aborts_upload_on_write_error():
+    import boto3
+    from moto import mock_aws
+
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my_bucket")
+        storage = S3Storage(s3, "my_bucket", max_in_flight=2, part_size=5 * 1024 * 1024)
+
+        with pytest.raises(Exception, match="serialization failed"):
+            with storage.open_upload("s3://my_bucket/data/1.csv.syn") as f:
+                f.write(b"x" * (6 * 1024 * 1024))
+                raise Exception("serialization failed")
+        storage.wait_for_uploads()
+
+        client = s3.meta.client
+        assert "Uploads" not in client.list_multipart_uploads(Bucket="my_bucket")
+        assert "Contents" not in client.list_objects_v2(Bucket="my_bucket")
+
+
+@pytest.mark.integration_test
+def test__S3Storage__prefetch__reads_unchanged_objects_from_cache(tmp_path):
+    import boto3
+    from moto import mock_aws
+    from dummy_synth.caches import DiskCache
+
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my_bucket")
+        for i in range(3):
+            s3.Object("my_bucket", f"data/{i}.csv").put(Body=f"a\n{i}\n".encode())
+        cache = DiskCache(str(tmp_path), max_bytes=1024)
+        for _ in range(2):
+            storage = S3Storage(s3, "my_bucket", max_in_flight=2, cache=cache)
+            prefetched = list(storage.prefetch(storage.get_files("data")))
+            assert [content.result() for _, content in prefetched] == [
+                f"a\n{i}\n".encode() for i in range(3)
+            ]
+        s3.Object("my_bucket", "data/0.csv").put(Body=b"a\nchanged\n")
+        storage = S3Storage(s3, "my_bucket", cache=cache)
+        prefetched = list(storage.prefetch(storage.get_files("data")))
+        assert prefetched[0][1].result() == b"a\nchanged\n"
+        assert storage.get_cache_stats() == {"hits": 5, "misses": 4, "evictions": 0}
+
+
+def test__S3Storage__store_in_cache__resolves_content_when_cache_put_fails(mocker):
+    from concurrent.futures import Future
+
+    cache = mocker.Mock()
+    cache.put.side_effect = ValueError("broken cache")
+    storage = S3Storage(mocker.Mock(), "my_bucket", cache=cache)
+    downloaded, cached = Future(), Future()
+    downloaded.set_result(b"a\n1\n")
+    storage.store_in_cache("my_bucket/data/1.csv/etag", cached, downloaded)
+    assert cached.result(timeout=1) == b"a\n1\n"
+
+
+@pytest.mark.integration_test
+def test__local_dir_storage__watch__reports_written_files_and_files_of_new_directories(
+    tmp_path, local_dir_storage
+):
+    from dummy_synth.storages import ListingFilter
+
+    (tmp_path / "skip").mkdir()
+    changes = local_dir_storage.watch(
+        str(tmp_path), ListingFilter(extensions=[".csv"], exclude=["skip/*"]), 0.1
+    )
+    assert next(changes) == []
+    (tmp_path / "a.csv").write_text("a\n1\n")
+    (tmp_path / "a.txt").write_text("a\n1\n")
+    (tmp_path / "skip/b.csv").write_text("a\n1\n")
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new/c.csv").write_text("a\n1\n")
+    changed = set()
+    for _ in range(3):
+        changed.update(next(changes))
+    assert changed == {str(tmp_path / "a.csv"), str(tmp_path / "new/c.csv")}
+    (tmp_path / "new/c.csv").write_text("a\n2\n")
+    assert next(changes) == [str(tmp_path / "new/c.csv")]
+    changes.close()
+
+
+@pytest.mark.integration_test
+def test__S3Storage__watch__reports_objects_created_or_modified_after_start():
+    import boto3
+    from moto import mock_aws
+
+    with mock_aws():
+        s3 = boto3.resource("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="my_bucket")
+        s3.Object("my_bucket", "data/0.csv").put(Body=b"a\n0\n")
+        s3.Object("my_bucket", "data/1.csv").put(Body=b"a\n1\n")
+        storage = S3Storage(s3, "my_bucket")
+        changes = storage.watch("data", interval=0)
+        assert next(changes) == []
+        assert next(changes) == []
+        s3.Object("my_bucket", "data/1.csv").put(Body=b"a\nchanged\n")
+        s3.Object("my_bucket", "data/2.csv").put(Body=b"a\n2\n")
+        assert next(changes) == ["s3://my_bucket/data/1.csv", "s3://my_bucket/data/2.csv"]
+        assert storage.exists("s3://my_bucket/data/2.csv")
+        assert next(changes) == []
@@ -41,3 +41,115 @@ def test__dummy_synhesizer_empty_result__synthesize__returns_empty_dataframe(
 ):
     result = dummy_synhesizer_empty_result.synthesize(input_data_frame)
     assert result.empty
+
+
+def test__dummy_synhesizer__synthesize_frame__returns_arrow_table_without_copy(
+    dummy_synhesizer, input_data_frame
+):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(input_data_frame)
+    assert dummy_synhesizer.synthesize_frame(table) is table
+
+
+def test__abstract_synthesizer__synthesize_table__adapts_pandas_synthesizer(
+    input_data_frame,
+):
+    import pyarrow as pa
+    from dummy_synth.synthesizers import AbstractSynthesizer
+
+    class UppercaseSynthesizer(AbstractSynthesizer):
+        def synthesize(self, ori_df):
+            return ori_df.apply(lambda column: column.str.upper())
+
+    table = pa.Table.from_pandas(input_data_frame.apply(lambda c: c.str.lower()))
+    result = UppercaseSynthesizer().synthesize_frame(table)
+    assert isinstance(result, pa.Table)
+    assert result.to_pandas().equals(input_data_frame)
+
+
+@pytest.fixture
+def numeric_data_frame() -> pd.DataFrame:
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=1000)
+    return pd.DataFrame(
+        {
+            "x": x,
+            "y": 2 * x + rng.normal(scale=0.1, size=1000),
+            "count": rng.integers(0, 10, size=1000),
+            "category": rng.choice(["a", "b"], size=1000, p=[0.8, 0.2]),
+        }
+    )
+
+
+def test__sampling_synthesizer__synthesize__returns_requested_rows_of_same_columns(
+    numeric_data_frame,
+):
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    result = SamplingSynthesizer(rows=2500).synthesize(numeric_data_frame)
+    assert len(result) == 2500
+    assert (result.dtypes == numeric_data_frame.dtypes).all()
+    assert set(result["category"]) == {"a", "b"}
+    assert result["count"].between(0, 9).all()
+    assert len(SamplingSynthesizer(rows_ratio=0.5).synthesize(numeric_data_frame)) == 500
+
+
+def test__sampling_synthesizer__synthesize__same_seed_gives_same_result(
+    numeric_data_frame,
+):
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    result = SamplingSynthesizer(seed=1).synthesize(numeric_data_frame)
+    assert result.equals(SamplingSynthesizer(seed=1).synthesize(numeric_data_frame))
+    assert not result.equals(SamplingSynthesizer(seed=2).synthesize(numeric_data_frame))
+
+
+def test__sampling_synthesizer__synthesize__keeps_rank_correlations(
+    numeric_data_frame,
+):
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    # Spearman correlation (pandas needs scipy for method="spearman")
+    ranks = SamplingSynthesizer().synthesize(numeric_data_frame).rank()
+    assert ranks["x"].corr(ranks["y"]) > 0.95
+    ranks = SamplingSynthesizer(correlations=False).synthesize(numeric_data_frame).rank()
+    assert abs(ranks["x"].corr(ranks["y"])) < 0.1
+
+
+def test__sampling_synthesizer__synthesize_chunks__yields_batches_fitted_on_all_chunks(
+    numeric_data_frame,
+):
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    synthesizer = SamplingSynthesizer(rows_ratio=2, batch_rows=300, max_fit_rows=100)
+    chunks = list(
+        synthesizer.synthesize_chunks(
+            [numeric_data_frame[:10], numeric_data_frame[10:]]
+        )
+    )
+    assert [len(chunk) for chunk in chunks] == [300] * 6 + [200]
+    assert sum(chunk["category"].eq("b").sum() for chunk in chunks) > 0
+
+
+def test__sampling_synthesizer__synthesize_chunks__result_does_not_depend_on_chunks(
+    numeric_data_frame,
+):
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    synthesizer = SamplingSynthesizer(max_fit_rows=100)
+    # "b" is the most frequent value of first chunk, "z" of the whole frame
+    df = numeric_data_frame.replace({"category": {"a": "z"}}).sort_values("category")
+    chunks = [df[:150], df[150:600], df[600:]]
+    chunked = pd.concat(synthesizer.synthesize_chunks(chunks), ignore_index=True)
+    assert chunked.equals(synthesizer.synthesize(df))
+
+
+def test__sampling_synthesizer__get_config__has_parameters_affecting_result():
+    from dummy_synth.synthesizers import SamplingSynthesizer
+
+    config = SamplingSynthesizer(batch_rows=10, max_fit_rows=20).get_config()
+    assert config["batch_rows"] == 10
+    assert config["max_fit_rows"] == 20
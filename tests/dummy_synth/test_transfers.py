@@ -0,0 +1,85 @@
+import boto3
+import pytest
+from moto import mock_aws
+from dummy_synth.transfers import S3TransferEngine
+
+
+@pytest.fixture
+def s3_client():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="my_bucket")
+        yield client
+
+
+def test__s3_transfer_engine__uploads_and_downloads_objects(s3_client):
+    engine = S3TransferEngine(s3_client, 2)
+    for i in range(5):
+        engine.upload("my_bucket", f"data/{i}.csv", f"a\n{i}\n".encode())
+    engine.wait_for_uploads()
+
+    downloads = [engine.download("my_bucket", f"data/{i}.csv") for i in range(5)]
+    assert [future.result() for future in downloads] == [
+        f"a\n{i}\n".encode() for i in range(5)
+    ]
+
+
+def test__s3_transfer_engine__wait_for_uploads_reraises_upload_error(s3_client):
+    engine = S3TransferEngine(s3_client, 2)
+    engine.upload("missing_bucket", "data/1.csv", b"a\n1\n")
+    with pytest.raises(Exception, match="NoSuchBucket"):
+        engine.wait_for_uploads()
+
+
+def test__s3_transfer_engine__wait_for_uploads_of_keys_leaves_other_uploads(s3_client):
+    engine = S3TransferEngine(s3_client, 2)
+    engine.upload("missing_bucket", "data/1.csv", b"a\n1\n")
+    engine.upload("my_bucket", "data/2.csv", b"a\n2\n")
+    engine.wait_for_uploads(["data/2.csv"])
+    assert s3_client.get_object(Bucket="my_bucket", Key="data/2.csv")["Body"].read()
+    with pytest.raises(Exception, match="NoSuchBucket"):
+        engine.wait_for_uploads()
+
+
+def test__multipart_upload__uploads_data_in_parts(s3_client):
+    engine = S3TransferEngine(s3_client, 2)
+    part_size = 5 * 1024 * 1024
+    data = bytes(range(256)) * (part_size * 2 // 256 + 100)
+    upload = engine.open_upload("my_bucket", "data/big.bin", part_size)
+    for offset in range(0, len(data), 1024 * 1024):
+        upload.write(data[offset : offset + 1024 * 1024])
+    upload.complete()
+
+    assert len(upload.parts) == 3
+    assert upload.size == len(data)
+    body = s3_client.get_object(Bucket="my_bucket", Key="data/big.bin")["Body"]
+    assert body.read() == data
+
+
+def test__multipart_upload__small_data_is_uploaded_as_single_object(s3_client, mocker):
+    engine = S3TransferEngine(s3_client, 2)
+    create_multipart_upload = mocker.spy(s3_client, "create_multipart_upload")
+    upload = engine.open_upload("my_bucket", "data/1.csv")
+    upload.write(b"a\n1\n")
+    upload.complete()
+    engine.wait_for_uploads()
+
+    create_multipart_upload.assert_not_called()
+    body = s3_client.get_object(Bucket="my_bucket", Key="data/1.csv")["Body"]
+    assert body.read() == b"a\n1\n"
+
+
+def test__multipart_upload__failed_part_aborts_upload(s3_client, mocker):
+    engine = S3TransferEngine(s3_client, 2)
+    mocker.patch.object(
+        engine, "upload_part_bytes", side_effect=Exception("part failed")
+    )
+    part_size = 5 * 1024 * 1024
+    upload = engine.open_upload("my_bucket", "data/big.bin", part_size)
+    upload.write(b"x" * (part_size + 1))
+    with pytest.raises(Exception, match="part failed"):
+        upload.complete()
+
+    assert "Uploads" not in s3_client.list_multipart_uploads(Bucket="my_bucket")
+    with pytest.raises(Exception, match="NoSuchKey"):
+        s3_client.get_object(Bucket="my_bucket", Key="data/big.bin")
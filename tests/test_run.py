@@ -0,0 +1,43 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = {"boto3", "botocore", "s3fs", "fastparquet", "pandas", "pyarrow"}
+
+
+def get_imported_modules(tmp_path, *args: str) -> set:
+    """
+    Run run.py with python -X importtime and return names of modules it imported.
+    """
+    shutil.copy(
+        os.path.join(ROOT_DIR, "local_config.py.sample"),
+        str(tmp_path / "local_config.py"),
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmp_path), ROOT_DIR]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(ROOT_DIR, "run.py"), *args],
+        env=env,
+        cwd=str(tmp_path),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return set(re.findall(r"^import time:.*\|\s*(\S+)$", result.stderr, re.MULTILINE))
+
+
+@pytest.mark.integration_test
+def test__run__help__doesnt_import_backends(tmp_path):
+    assert not get_imported_modules(tmp_path, "--help") & HEAVY_MODULES
+
+
+@pytest.mark.integration_test
+def test__run__local_synthesize__doesnt_import_s3_libraries(tmp_path):
+    data_dir = str(tmp_path / "data")
+    shutil.copytree(os.path.join(ROOT_DIR, "tests", "test_data"), data_dir)
+    modules = get_imported_modules(tmp_path, "synthesize", data_dir)
+    assert not modules & {"boto3", "botocore", "s3fs"}